@@ -1,110 +1,62 @@
-import json
-import csv
-import urllib.request
-import re
-import os
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Share the IOC sync's fetch, cache and normalization code.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "crowdstrike_ioc"))
+
+from artifacts import ArtifactCollector  # noqa: E402
+from feed_cache import FeedCache  # noqa: E402
+from source import LOLRMM_URL, iter_lolrmm  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Build the LogScale RMM lookup CSVs from the LOLRMM feed"
+    )
+    parser.add_argument(
+        "--out-dir", default=".", help="Where to write the CSVs (default: .)"
+    )
+    parser.add_argument(
+        "--feed-cache-dir",
+        help="Directory for cached LOLRMM feed snapshots (enables conditional GET)",
+    )
+    parser.add_argument(
+        "--max-feed-age",
+        type=int,
+        default=0,
+        help="Reuse a cached feed younger than this many seconds without revalidating",
+    )
+    return parser.parse_args()
 
-URL = "https://lolrmm.io/api/rmm_tools.json"
 
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    cache = FeedCache(Path(args.feed_cache_dir)) if args.feed_cache_dir else None
 
-def get_data():
+    print(f"Fetching data from {LOLRMM_URL}...")
+    collector = ArtifactCollector(Path(args.out_dir))
     try:
-        req = urllib.request.Request(URL, headers={"User-Agent": "Mozilla/5.0"})
-        with urllib.request.urlopen(req) as url:
-            data = json.loads(url.read().decode())
-        return data
+        tools = sum(
+            1 for _ in collector.observe(iter_lolrmm(cache, max_age=args.max_feed_age))
+        )
     except Exception as e:
+        collector.discard()
         print(f"Error fetching data: {e}")
-        return []
-
-
-def is_hash(s):
-    # Simple regex for md5, sha1, sha256
-    s = s.strip()
-    if re.match(r"^[a-fA-F0-9]{32}$", s):
-        return True
-    if re.match(r"^[a-fA-F0-9]{40}$", s):
-        return True
-    if re.match(r"^[a-fA-F0-9]{64}$", s):
-        return True
-    return False
-
+        return 1
 
-def main():
-    print(f"Fetching data from {URL}...")
-    data = get_data()
-
-    if not data:
+    if not tools:
+        collector.discard()
         print("No data found.")
-        return
-
-    file_artifacts = []  # (Artifact, Type, Tool)
-    domain_artifacts = []  # (Artifact, Type, Tool)
-
-    for tool in data:
-        name = tool.get("Name")
-        details = tool.get("Details") or {}
-        artifacts = tool.get("Artifacts") or {}
-
-        # Domains
-        # From Network
-        for net in artifacts.get("Network") or []:
-            for domain in net.get("Domains") or []:
-                domain = domain.strip()
-                if domain:
-                    domain_artifacts.append((domain, "domain", name))
-
-        # Files and Hashes
-        # From PEMetadata
-        for pe in details.get("PEMetadata") or []:
-            if isinstance(pe, dict):
-                fname = pe.get("Filename")
-                if fname:
-                    file_artifacts.append((fname, "filename", name))
-            elif isinstance(pe, str):
-                file_artifacts.append((pe, "filename", name))
-
-        # From InstallationPaths
-        for path in details.get("InstallationPaths") or []:
-            path = path.strip()
-            if not path:
-                continue
-
-            # Check if hash
-            if is_hash(path):
-                file_artifacts.append((path, "hash", name))
-            else:
-                # Extract filename if it's a path
-                if "\\" in path or "/" in path:
-                    fname = os.path.basename(path.replace("\\", "/"))
-                    # filtering out potential directory wildcards or non-files if needed
-                    # but usually basename is good enough for "filename" type
-                    if fname and fname != "*" and "?" not in fname:
-                        file_artifacts.append((fname, "filename", name))
-                else:
-                    if path != "*" and "?" not in path:
-                        file_artifacts.append((path, "filename", name))
-
-    # Deduplicate
-    file_artifacts = sorted(list(set(file_artifacts)))
-    domain_artifacts = sorted(list(set(domain_artifacts)))
-
-    # Write RMM_Artifacts.csv
-    print(f"Writing {len(file_artifacts)} artifacts to RMM_Artifacts.csv...")
-    with open("RMM_Artifacts.csv", "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["Artifact", "Type", "Tool"])
-        writer.writerows(file_artifacts)
-
-    # Write RMM_Domain_Artifacts.csv
-    print(f"Writing {len(domain_artifacts)} artifacts to RMM_Domain_Artifacts.csv...")
-    with open("RMM_Domain_Artifacts.csv", "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["Artifact", "Type", "Tool"])
-        writer.writerows(domain_artifacts)
+        return 1
 
+    for name, changed in collector.finish().items():
+        print(f"{name}: {'updated' if changed else 'unchanged'}")
     print("Done.")
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,309 @@
+import argparse
+import csv
+import json
+import logging
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from artifacts import FILE_ARTIFACTS_CSV
+from hunt import iter_lines
+
+LOGGER = logging.getLogger(__name__)
+
+# NetworkConnectIP4 carries ContextBaseFileName, ProcessRollup2 FileName/ImageFileName.
+FILENAME_FIELDS = ("ContextBaseFileName", "FileName")
+IMAGE_FIELDS = ("ImageFileName",)
+HASH_FIELDS = ("SHA256HashData", "SHA1HashData", "MD5HashData")
+HOST_FIELDS = ("ComputerName", "aid")
+IP_FIELDS = ("RemoteAddressIP4", "RemoteAddressIP6", "RemoteIP")
+PORT_FIELDS = ("RemotePort",)
+# The dashboard's default "Unsanctioned Apps" filter. Its NetworkConnectIP4 widget
+# applies it to ContextBaseFileName (case-sensitive), so it is matched against the
+# event's filename here too, not the tool name.
+DEFAULT_EXCLUDE_APPS = "mstsc|PsExec|Microsoft Remote Desktop"
+
+# Set by the worker initializer so the artifact rows are pickled once per process.
+_MATCHER = None
+_FIELD_KEYS = {}
+
+
+def glob_regex(pattern: str) -> str:
+    """Regex for a LogScale ``mode=glob`` pattern, where only ``*`` is special."""
+    return "(?s:%s)\\Z" % ".*".join(re.escape(x) for x in pattern.split("*"))
+
+
+class ArtifactMatcher:
+    """Case-insensitive filename and hash matcher over ``RMM_Artifacts.csv`` rows.
+
+    Hashes and plain filenames are dict lookups. All glob filenames are joined
+    into one regex that rejects a non-matching name in a single pass; only a
+    name it accepts is checked against each glob to find its tools. Events whose
+    filename matches the ``exclude_apps`` regex never match.
+    """
+
+    __slots__ = ("_names", "_hashes", "_globs", "_any_glob", "_exclude")
+
+    def __init__(self, rows, exclude_apps: str = ""):
+        self._exclude = re.compile(exclude_apps) if exclude_apps else None
+        names, hashes, globs = {}, {}, {}
+        for artifact, kind, tool in rows:
+            value = artifact.strip().lower()
+            if not value:
+                continue
+            if kind == "hash":
+                target = hashes
+            elif "*" in value:
+                target = globs
+            else:
+                target = names
+            target.setdefault(value, set()).add(tool)
+        self._names = {k: tuple(sorted(v)) for k, v in names.items()}
+        self._hashes = {k: tuple(sorted(v)) for k, v in hashes.items()}
+        patterns = sorted(globs)
+        self._globs = [
+            (re.compile(glob_regex(p)), tuple(sorted(globs[p])))
+            for p in patterns
+        ]
+        self._any_glob = (
+            re.compile("|".join(glob_regex(p) for p in patterns))
+            if patterns
+            else None
+        )
+
+    @classmethod
+    def from_csv(cls, path: Path, exclude_apps: str = "") -> "ArtifactMatcher":
+        with Path(path).open(encoding="utf-8", newline="") as handle:
+            rows = [
+                (row["Artifact"], row["Type"], row["Tool"])
+                for row in csv.DictReader(handle)
+            ]
+        return cls(rows, exclude_apps)
+
+    @property
+    def has_hashes(self) -> bool:
+        return bool(self._hashes)
+
+    def __len__(self) -> int:
+        return len(self._names) + len(self._hashes) + len(self._globs)
+
+    def match(self, filename: str | None, hashes=()) -> tuple[str, ...]:
+        """Tools whose artifacts match ``filename`` or any of ``hashes``."""
+        if filename and self._exclude is not None and self._exclude.search(filename):
+            return ()
+        found = ()
+        for value in hashes:
+            if value:
+                found += self._hashes.get(value.lower(), ())
+        if filename:
+            name = filename.lower()
+            found += self._names.get(name, ())
+            if self._any_glob is not None and self._any_glob.match(name):
+                for pattern, tools in self._globs:
+                    if pattern.match(name):
+                        found += tools
+        return tuple(sorted(set(found))) if len(found) > 1 else found
+
+
+_BARE_VALUE_RE = re.compile(rb"[^,}\s]*")
+
+
+def _json_field(line: bytes, names) -> str | None:
+    # Find the quoted key, then slice out its value: much cheaper per event than
+    # json.loads or a regex search over the whole line. Values of the fields
+    # read here (names, paths, hashes, IPs, ports) never contain a quote.
+    for name in names:
+        key = _FIELD_KEYS.get(name)
+        if key is None:
+            key = _FIELD_KEYS[name] = b'"%s"' % name.encode()
+        at = line.find(key)
+        if at < 0:
+            continue
+        start = line.find(b":", at + len(key)) + 1
+        while line[start : start + 1] == b" ":
+            start += 1
+        if line[start : start + 1] == b'"':
+            value = line[start + 1 : line.find(b'"', start + 1)]
+        else:
+            value = _BARE_VALUE_RE.match(line, start).group()
+        if value:
+            return value.decode("utf-8", "replace").replace("\\\\", "\\")
+    return None
+
+
+def _row_field(row: dict, names) -> str | None:
+    for name in names:
+        value = row.get(name)
+        if value:
+            return value
+    return None
+
+
+def _basename(path: str | None) -> str | None:
+    if not path:
+        return None
+    return path.replace("\\", "/").rsplit("/", 1)[-1]
+
+
+def _iter_events(path: Path):
+    """``(get, record)`` pairs for each NDJSON line or CSV row of an export."""
+    if ".csv" in path.suffixes:
+        text = (line.decode("utf-8", "replace") for line in iter_lines(path))
+        for row in csv.DictReader(text):
+            yield _row_field, row
+        return
+    for line in iter_lines(path):
+        if line.strip():
+            yield _json_field, line
+
+
+def scan_export(path: Path, matcher: ArtifactMatcher) -> tuple[int, dict]:
+    """``(records, {tool: [events, hosts, ips, ports, files]})`` for one export."""
+    records = 0
+    groups = {}
+    with_hashes = matcher.has_hashes
+    for get, record in _iter_events(Path(path)):
+        records += 1
+        name = get(record, FILENAME_FIELDS) or _basename(get(record, IMAGE_FIELDS))
+        hashes = [get(record, (x,)) for x in HASH_FIELDS] if with_hashes else ()
+        tools = matcher.match(name, hashes)
+        if not tools:
+            continue
+        host = get(record, HOST_FIELDS)
+        ip = get(record, IP_FIELDS)
+        port = get(record, PORT_FIELDS)
+        for tool in tools:
+            group = groups.get(tool)
+            if group is None:
+                group = groups[tool] = [0, set(), set(), set(), set()]
+            group[0] += 1
+            if host:
+                group[1].add(host)
+            if ip:
+                group[2].add(ip)
+            if port:
+                group[3].add(port)
+            if name:
+                group[4].add(name)
+    return records, groups
+
+
+def _init_worker(artifacts: str, exclude_apps: str):
+    global _MATCHER
+    _MATCHER = ArtifactMatcher.from_csv(Path(artifacts), exclude_apps)
+
+
+def _scan_worker(path: str):
+    return path, *scan_export(Path(path), _MATCHER)
+
+
+def match_exports(
+    paths: list,
+    artifacts: Path,
+    exclude_apps: str = DEFAULT_EXCLUDE_APPS,
+    workers: int = 1,
+) -> dict:
+    """Scan exports against an artifact CSV and aggregate matches per tool."""
+    started = time.perf_counter()
+    merged = {}
+    stats = {"files": 0, "records": 0, "matched": 0}
+    paths = [str(p) for p in paths]
+
+    def merge(path, records, groups):
+        stats["files"] += 1
+        stats["records"] += records
+        for tool, (events, *sets) in groups.items():
+            group = merged.setdefault(tool, [0, set(), set(), set(), set()])
+            group[0] += events
+            for into, values in zip(group[1:], sets):
+                into |= values
+            stats["matched"] += events
+
+    if workers <= 1 or len(paths) <= 1:
+        matcher = ArtifactMatcher.from_csv(Path(artifacts), exclude_apps)
+        LOGGER.info("Loaded %d artifacts from %s", len(matcher), artifacts)
+        for path in paths:
+            merge(path, *scan_export(Path(path), matcher))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(paths)),
+            initializer=_init_worker,
+            initargs=(str(artifacts), exclude_apps),
+        ) as pool:
+            for result in pool.map(_scan_worker, paths):
+                merge(*result)
+
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = round(elapsed, 3)
+    stats["records_per_sec"] = int(stats["records"] / elapsed) if elapsed else 0
+    tools = {
+        tool: {
+            "events": events,
+            "hosts": len(hosts),
+            "host_names": sorted(hosts),
+            "remote_ips": sorted(ips),
+            "remote_ports": sorted(ports, key=lambda x: (len(x), x)),
+            "files": sorted(files),
+        }
+        for tool, (events, hosts, ips, ports, files) in sorted(merged.items())
+    }
+    return {"stats": stats, "tools": tools}
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Match NetworkConnect/ProcessRollup exports against RMM artifacts"
+    )
+    parser.add_argument("paths", nargs="+", help="NDJSON or CSV event exports, .gz ok")
+    parser.add_argument(
+        "--artifacts",
+        default=FILE_ARTIFACTS_CSV,
+        help="Filename/hash lookup from generate_artifacts.py "
+        f"(default: {FILE_ARTIFACTS_CSV})",
+    )
+    parser.add_argument(
+        "--exclude-apps",
+        default=DEFAULT_EXCLUDE_APPS,
+        help="Regex of filenames to ignore, as the dashboard's Application Filter "
+        f"(default: {DEFAULT_EXCLUDE_APPS!r}; '' for all)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=4, help="Files scanned in parallel (default 4)"
+    )
+    parser.add_argument("--json-out", help="Write the full per-tool result as JSON")
+    return parser.parse_args(argv)
+
+
+def print_match_summary(result: dict):
+    stats = result["stats"]
+    print(
+        f"{stats['records']} events in {stats['files']} files, "
+        f"{stats['matched']} matched ({stats['records_per_sec']}/s)"
+    )
+    for tool, group in result["tools"].items():
+        ports = ", ".join(group["remote_ports"][:10])
+        print(
+            f"{tool}: {group['hosts']} hosts, {len(group['remote_ips'])} remote IPs, "
+            f"{group['events']} events, ports: {ports or '-'}"
+        )
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if not Path(args.artifacts).exists():
+        LOGGER.error("Artifact lookup not found: %s", args.artifacts)
+        return 1
+    result = match_exports(
+        args.paths, Path(args.artifacts), args.exclude_apps, workers=args.workers
+    )
+    print_match_summary(result)
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(result, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+import csv
+import hashlib
+import io
+import logging
+import re
+from pathlib import Path
+
+from feed_cache import AtomicWriter
+from source import DOMAIN_IPV4, DOMAIN_VALID, classify_domain
+
+# Labels of letters, digits, "-" and "*", with at least one letter or digit.
+GLOB_RE = re.compile(r"(?=.*[a-z0-9])[a-z0-9*-]+(?:\.[a-z0-9*-]+)*")
+HASH_RE = re.compile(r"[0-9a-f]{32}|[0-9a-f]{40}|[0-9a-f]{64}")
+ARTIFACT_HEADER = ("Artifact", "Type", "Tool")
+FILE_ARTIFACTS_CSV = "RMM_Artifacts.csv"
+DOMAIN_ARTIFACTS_CSV = "RMM_Domain_Artifacts.csv"
+
+LOGGER = logging.getLogger(__name__)
+
+
+def is_hash(value: str) -> bool:
+    """MD5, SHA-1 or SHA-256 hex digest."""
+    return HASH_RE.fullmatch(value.strip().lower()) is not None
+
+
+def domain_glob(raw: str) -> str | None:
+    """Domain, IP or glob for a LogScale ``mode=glob`` lookup, or ``None`` to skip it.
+
+    Scheme, port and path are dropped and the value lower-cased. A plain value
+    must be a valid domain or IPv4 address per ``classify_domain``; a wildcard
+    entry keeps every ``*`` where the feed put it (``*vendor.com``,
+    ``relay*.vendor.com``, ``vendor.*``, ``10.0.*.*``). Placeholders are skipped.
+    """
+    host = raw.strip().lower().split("://", 1)[-1]
+    host = host.split("/", 1)[0].split(":", 1)[0].strip().rstrip(".")
+    if "*" not in host:
+        kind, domain = classify_domain(host)
+        return domain if kind in (DOMAIN_VALID, DOMAIN_IPV4) else None
+    if GLOB_RE.fullmatch(host) is None or "." not in host:
+        return None
+    return host
+
+
+def file_artifact(path: str) -> tuple[str, str] | None:
+    """``(artifact, type)`` for an installation path, PE filename or hash."""
+    path = path.strip()
+    if not path:
+        return None
+    if is_hash(path):
+        return path, "hash"
+    name = path.replace("\\", "/").rsplit("/", 1)[-1]
+    if not name or name == "*" or "?" in name:
+        return None
+    return name, "filename"
+
+
+class CsvStage:
+    """CSV rows streamed to a private temporary file next to ``path``.
+
+    The content is hashed as it is written; ``finish`` swaps the file in only if
+    that hash differs from the current ``path``, so an unchanged lookup keeps
+    its modification time and upload jobs keyed on the file can skip it.
+    """
+
+    def __init__(self, path: Path, header):
+        self.path = Path(path)
+        self.count = 0
+        self._out = AtomicWriter(self.path)
+        self._hasher = hashlib.sha256()
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._put(header)
+
+    def _put(self, row):
+        self._writer.writerow(row)
+        data = self._buffer.getvalue().encode("utf-8")
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._hasher.update(data)
+        self._out.write(data)
+
+    def writerow(self, row):
+        self._put(row)
+        self.count += 1
+
+    def finish(self) -> bool:
+        """Commit or drop the staged file; return whether ``path`` was rewritten."""
+        if self._hasher.hexdigest() == _file_digest(self.path):
+            self._out.discard()
+            LOGGER.info("%s unchanged (%d artifacts)", self.path.name, self.count)
+            return False
+        self._out.commit()
+        LOGGER.info("Wrote %d artifacts to %s", self.count, self.path)
+        return True
+
+    def discard(self):
+        self._out.discard()
+
+
+class ArtifactCollector:
+    """Write domain, filename and hash artifacts while records stream past.
+
+    ``observe`` wraps the record iterator handed to ``collect_domains``, so the
+    IOC sync and the LogScale lookups come from a single fetch and parse. Rows
+    go straight to the staged CSVs in feed order; only a short digest per row
+    is kept to drop duplicates. Call ``finish`` once the records are consumed,
+    or ``discard`` if the run failed.
+    """
+
+    def __init__(self, out_dir: Path):
+        out_dir = Path(out_dir)
+        self.files = CsvStage(out_dir / FILE_ARTIFACTS_CSV, ARTIFACT_HEADER)
+        self.domains = CsvStage(out_dir / DOMAIN_ARTIFACTS_CSV, ARTIFACT_HEADER)
+        self._seen = set()
+
+    def _emit(self, stage: CsvStage, row: tuple[str, str, str]):
+        key = hashlib.blake2b("\0".join(row).encode(), digest_size=8).digest()
+        if key not in self._seen:
+            self._seen.add(key)
+            stage.writerow(row)
+
+    def add(self, tool: dict):
+        name = (tool.get("Name") or "Unknown Tool").strip()
+        details = tool.get("Details") or {}
+        artifacts = tool.get("Artifacts") or {}
+        for net in artifacts.get("Network") or []:
+            for raw in net.get("Domains") or []:
+                if isinstance(raw, str):
+                    domain = domain_glob(raw)
+                    if domain:
+                        self._emit(self.domains, (domain, "domain", name))
+        for pe in details.get("PEMetadata") or []:
+            filename = pe.get("Filename") if isinstance(pe, dict) else pe
+            if isinstance(filename, str) and filename.strip():
+                self._emit(self.files, (filename.strip(), "filename", name))
+        for path in details.get("InstallationPaths") or []:
+            found = file_artifact(path) if isinstance(path, str) else None
+            if found:
+                self._emit(self.files, (found[0], found[1], name))
+
+    def observe(self, records):
+        for record in records:
+            self.add(record)
+            yield record
+
+    def finish(self) -> dict:
+        """Commit both lookup CSVs; return ``{filename: changed}``."""
+        return {
+            stage.path.name: stage.finish() for stage in (self.files, self.domains)
+        }
+
+    def discard(self):
+        self.files.discard()
+        self.domains.discard()
+
+
+def _file_digest(path: Path) -> str | None:
+    if not path.exists():
+        return None
+    hasher = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 16), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def write_csv_if_changed(path: Path, header, rows) -> bool:
+    """Stream ``rows`` through a ``CsvStage``; return whether ``path`` was rewritten."""
+    stage = CsvStage(path, header)
+    try:
+        for row in rows:
+            stage.writerow(row)
+    except BaseException:
+        stage.discard()
+        raise
+    return stage.finish()
@@ -0,0 +1,472 @@
+"""Asyncio Falcon API backend: one pooled HTTP/1.1 session per tenant.
+
+``AsyncFalconClient`` exposes coroutine versions of the falconpy IOC methods this
+tool uses and returns falconpy-shaped ``{"status_code", "headers", "body"}``
+dicts, so the response handling in ``crowdstrike_api``, ``reconcile`` and
+``reporting`` is shared with the synchronous path.
+"""
+
+import asyncio
+import base64
+import gzip
+import json
+import logging
+import ssl
+import time
+import urllib.parse
+import urllib.request
+
+from throttle import (
+    DEFAULT_MAX_RETRIES,
+    RETRY_STATUS_CODES,
+    ClientStats,
+    RateLimiter,
+    RateLimitPacer,
+    RequestNotSent,
+    request_not_sent,
+    retry_delay,
+)
+
+DEFAULT_BASE_URL = "https://api.crowdstrike.com"
+BASE_URL_ALIASES = {
+    "auto": DEFAULT_BASE_URL,
+    "us1": DEFAULT_BASE_URL,
+    "us-1": DEFAULT_BASE_URL,
+    "us2": "https://api.us-2.crowdstrike.com",
+    "us-2": "https://api.us-2.crowdstrike.com",
+    "eu1": "https://api.eu-1.crowdstrike.com",
+    "eu-1": "https://api.eu-1.crowdstrike.com",
+    "usgov1": "https://api.laggar.gcw.crowdstrike.com",
+    "us-gov-1": "https://api.laggar.gcw.crowdstrike.com",
+}
+DEFAULT_MAX_CONNECTIONS = 16
+# Refresh the OAuth2 token this many seconds before it expires.
+TOKEN_REFRESH_MARGIN = 60
+# Safe to send twice. A POST/PATCH/DELETE that timed out or lost its connection
+# may already have been applied, so it is only resent when it never went out.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+LOGGER = logging.getLogger(__name__)
+
+
+def resolve_base_url(base_url: str | None) -> str:
+    if not base_url:
+        return DEFAULT_BASE_URL
+    alias = BASE_URL_ALIASES.get(base_url.strip().lower())
+    if alias:
+        return alias
+    if "://" not in base_url:
+        return f"https://{base_url}"
+    return base_url.rstrip("/")
+
+
+def proxy_for(url: str) -> str | None:
+    """Proxy URL the environment sets for ``url`` (``HTTPS_PROXY``, ``HTTP_PROXY``
+    and ``NO_PROXY``, either case), as ``urllib`` and ``requests`` read them."""
+    parts = urllib.parse.urlsplit(url)
+    proxies = urllib.request.getproxies_environment()
+    proxy = proxies.get(parts.scheme)
+    if not proxy or urllib.request.proxy_bypass_environment(parts.netloc, proxies):
+        return None
+    return proxy if "://" in proxy else f"http://{proxy}"
+
+
+class AsyncHTTPPool:
+    """Minimal keep-alive HTTP/1.1 connection pool for a single origin.
+
+    HTTPS is tunnelled through an HTTP proxy with ``CONNECT``; plain HTTP is sent
+    to the proxy in absolute form. ``proxy`` defaults to ``proxy_for(base_url)``;
+    pass ``""`` to connect directly. Responses may be gzip-encoded.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        timeout: float = 60,
+        proxy: str | None = None,
+    ):
+        parts = urllib.parse.urlsplit(base_url)
+        self.host = parts.hostname or "localhost"
+        self.secure = parts.scheme == "https"
+        self.port = parts.port or (443 if self.secure else 80)
+        default_port = self.port == (443 if self.secure else 80)
+        host = f"[{self.host}]" if ":" in self.host else self.host
+        self.authority = host if default_port else f"{host}:{self.port}"
+        self._tunnel_target = f"{host}:{self.port}"
+        self.base_path = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._ssl = ssl.create_default_context() if self.secure else None
+        self.proxy = None
+        self._proxy_headers = {}
+        proxy = proxy_for(base_url) if proxy is None else proxy
+        if proxy:
+            proxy_parts = urllib.parse.urlsplit(proxy)
+            if proxy_parts.scheme != "http":
+                raise ValueError(f"Unsupported proxy scheme: {proxy}")
+            self.proxy = (proxy_parts.hostname, proxy_parts.port or 80)
+            if proxy_parts.username is not None:
+                credentials = "{}:{}".format(
+                    urllib.parse.unquote(proxy_parts.username),
+                    urllib.parse.unquote(proxy_parts.password or ""),
+                )
+                self._proxy_headers["Proxy-Authorization"] = "Basic " + (
+                    base64.b64encode(credentials.encode("utf-8")).decode("ascii")
+                )
+        self._idle = []
+        self._slots = asyncio.Semaphore(max(1, max_connections))
+
+    async def close(self):
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: dict | None = None,
+        body: bytes | None = None,
+        headers: dict | None = None,
+        idempotent: bool | None = None,
+    ) -> tuple[int, dict, bytes]:
+        """Send one request; a stale pooled connection is retried fresh only if
+        ``idempotent`` (default: ``method`` is in ``IDEMPOTENT_METHODS``).
+
+        Failing to open a connection raises ``RequestNotSent``.
+        """
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        target = self.base_path + path
+        if params:
+            target += "?" + urllib.parse.urlencode(params, doseq=True)
+        request_headers = {
+            "Host": self.authority,
+            "Connection": "keep-alive",
+            "Accept-Encoding": "gzip",
+            "Content-Length": str(len(body or b"")),
+        }
+        if self.proxy and not self.secure:
+            target = f"http://{self.authority}{target}"
+            request_headers.update(self._proxy_headers)
+        request_headers.update(headers or {})
+        head = f"{method} {target} HTTP/1.1\r\n" + "".join(
+            f"{key}: {value}\r\n" for key, value in request_headers.items()
+        )
+        payload = head.encode("latin-1") + b"\r\n" + (body or b"")
+
+        async with self._slots:
+            # A pooled connection may have been closed by the server; an idempotent
+            # request is retried once on a fresh one.
+            for reused in (True, False):
+                conn = self._idle_connection() if reused else None
+                if conn is None:
+                    reused = False
+                    conn = await self._connect()
+                try:
+                    status, response_headers, data, keep_alive = await asyncio.wait_for(
+                        self._roundtrip(conn, payload, method), self.timeout
+                    )
+                except (OSError, asyncio.IncompleteReadError, ValueError):
+                    conn[1].close()
+                    if reused and idempotent:
+                        continue
+                    raise
+                if keep_alive:
+                    self._idle.append(conn)
+                else:
+                    conn[1].close()
+                return status, response_headers, data
+        raise ConnectionError(f"Could not complete {method} {path}")
+
+    def _idle_connection(self):
+        # Skip connections the server already closed, so writes rarely meet one.
+        while self._idle:
+            conn = self._idle.pop()
+            if not conn[0].at_eof() and not conn[1].is_closing():
+                return conn
+            conn[1].close()
+        return None
+
+    async def _connect(self):
+        if self.proxy is None:
+            host, port, tls = self.host, self.port, self._ssl
+        else:
+            host, port, tls = *self.proxy, None
+        try:
+            conn = await asyncio.wait_for(
+                asyncio.open_connection(host, port, ssl=tls), self.timeout
+            )
+        except OSError as exc:
+            raise RequestNotSent(f"Could not connect to {host}:{port}: {exc}") from exc
+        if self.proxy and self.secure:
+            try:
+                await asyncio.wait_for(self._tunnel(conn), self.timeout)
+            except BaseException:
+                conn[1].close()
+                raise
+        return conn
+
+    async def _tunnel(self, conn):
+        reader, writer = conn
+        target = self._tunnel_target
+        head = f"CONNECT {target} HTTP/1.1\r\nHost: {target}\r\n" + "".join(
+            f"{key}: {value}\r\n" for key, value in self._proxy_headers.items()
+        )
+        writer.write(head.encode("latin-1") + b"\r\n")
+        try:
+            await writer.drain()
+            status_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+        except OSError as exc:
+            raise RequestNotSent(f"Proxy tunnel to {target} failed: {exc}") from exc
+        parts = status_line.decode("latin-1").split(" ", 2)
+        if len(parts) < 2 or parts[1] != "200":
+            raise RequestNotSent(
+                f"Proxy refused tunnel to {target}: {status_line.decode('latin-1')}"
+            )
+        try:
+            await writer.start_tls(self._ssl, server_hostname=self.host)
+        except OSError as exc:
+            raise RequestNotSent(
+                f"TLS through proxy to {target} failed: {exc}"
+            ) from exc
+
+    async def _roundtrip(self, conn, payload: bytes, method: str):
+        reader, writer = conn
+        writer.write(payload)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed before response")
+        parts = status_line.decode("latin-1").split(" ", 2)
+        status = int(parts[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip()] = value.strip()
+        lowered = {k.lower(): v for k, v in headers.items()}
+
+        keep_alive = lowered.get("connection", "").lower() != "close"
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            data = b""
+        elif "chunked" in lowered.get("transfer-encoding", "").lower():
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";", 1)[0], 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            data = b"".join(chunks)
+        elif "content-length" in lowered:
+            data = await reader.readexactly(int(lowered["content-length"]))
+        else:
+            data = await reader.read()
+            keep_alive = False
+        if data and lowered.get("content-encoding", "").lower() == "gzip":
+            data = gzip.decompress(data)
+        return status, headers, data, keep_alive
+
+
+class AsyncFalconClient:
+    """Coroutine versions of the falconpy IOC calls, with OAuth2 and retries.
+
+    Reads are retried like ``RetryingClient`` does; writes only on a 429 or when
+    the connection could not be opened. Calls are paced from
+    ``X-RateLimit-Remaining`` with the same ``RateLimitPacer``.
+    """
+
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        base_url: str | None = None,
+        member_cid: str | None = None,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        rate: float = 0,
+        stats: ClientStats | None = None,
+    ):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.member_cid = member_cid
+        self.pool = AsyncHTTPPool(
+            resolve_base_url(base_url), max_connections=max_connections
+        )
+        self.max_retries = max(0, int(max_retries))
+        self.limiter = RateLimiter(rate=rate)
+        self.pacer = RateLimitPacer()
+        self.stats = stats or ClientStats()
+        self._token = None
+        self._token_expires = 0.0
+        self._token_lock = asyncio.Lock()
+
+    async def close(self):
+        await self.pool.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _bearer(self, force: bool = False) -> str:
+        async with self._token_lock:
+            if not force and self._token and time.time() < self._token_expires:
+                return self._token
+            form = {"client_id": self.client_id, "client_secret": self.client_secret}
+            if self.member_cid:
+                form["member_cid"] = self.member_cid
+            status, _, data = await self.pool.request(
+                "POST",
+                "/oauth2/token",
+                body=urllib.parse.urlencode(form).encode("utf-8"),
+                headers={"Content-Type": "application/x-www-form-urlencoded"},
+                idempotent=True,
+            )
+            self.stats.add(calls=1)
+            if status not in (200, 201):
+                raise RuntimeError(f"OAuth2 token request failed with status {status}")
+            token = json.loads(data or b"{}")
+            self._token = token["access_token"]
+            expires_in = float(token.get("expires_in") or 1799)
+            self._token_expires = time.time() + expires_in - TOKEN_REFRESH_MARGIN
+            return self._token
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: dict | None = None,
+        json_body=None,
+    ) -> dict:
+        body = None
+        headers = {"Accept": "application/json"}
+        if json_body is not None:
+            body = json.dumps(json_body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        idempotent = method in IDEMPOTENT_METHODS
+
+        refreshed = False
+        attempt = 0
+        while True:
+            delay = self.limiter.reserve()
+            if delay:
+                await asyncio.sleep(delay)
+            spacing = self.pacer.reserve()
+            if spacing:
+                await asyncio.sleep(spacing)
+            if delay or spacing:
+                self.stats.add(throttled_seconds=delay + spacing)
+            headers["Authorization"] = f"Bearer {await self._bearer()}"
+            self.stats.add(calls=1)
+            try:
+                status, response_headers, data = await self.pool.request(
+                    method, path, params=params, body=body, headers=headers
+                )
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as exc:
+                if attempt >= self.max_retries or (
+                    not idempotent and not request_not_sent(exc)
+                ):
+                    self.stats.add(failures=1)
+                    raise
+                wait = retry_delay(attempt, None, 0.5, 30.0)
+                LOGGER.warning(
+                    "%s %s failed (%s); retrying in %.1fs", method, path, exc, wait
+                )
+            else:
+                self.pacer.observe(response_headers)
+                if status == 401 and not refreshed:
+                    refreshed = True
+                    await self._bearer(force=True)
+                    continue
+                give_up = attempt >= self.max_retries or (
+                    not idempotent and status != 429
+                )
+                if status not in RETRY_STATUS_CODES or give_up:
+                    if status in RETRY_STATUS_CODES:
+                        self.stats.add(failures=1)
+                    try:
+                        parsed = json.loads(data) if data else {}
+                    except ValueError:
+                        parsed = {
+                            "errors": [{"message": data.decode("utf-8", "replace")}]
+                        }
+                    return {
+                        "status_code": status,
+                        "headers": response_headers,
+                        "body": parsed,
+                    }
+                wait = retry_delay(attempt, response_headers, 0.5, 30.0)
+                if status == 429:
+                    self.stats.add(throttled=1)
+                LOGGER.warning(
+                    "%s %s returned %s; retrying in %.1fs", method, path, status, wait
+                )
+            attempt += 1
+            self.stats.add(retries=1, throttled_seconds=wait)
+            await asyncio.sleep(wait)
+
+    async def indicator_combined(self, **params) -> dict:
+        return await self.request("GET", "/iocs/combined/indicator/v1", params=params)
+
+    async def _write_indicators(
+        self,
+        method: str,
+        indicators: list,
+        comment: str | None = None,
+        ignore_warnings: bool = False,
+        retrodetects: bool = False,
+    ) -> dict:
+        params = {}
+        if ignore_warnings:
+            params["ignore_warnings"] = "true"
+        if retrodetects:
+            params["retrodetects"] = "true"
+        body = {"indicators": indicators}
+        if comment:
+            body["comment"] = comment
+        return await self.request(
+            method, "/iocs/entities/indicators/v1", params=params, json_body=body
+        )
+
+    async def indicator_create(self, indicators: list, **kwargs) -> dict:
+        return await self._write_indicators("POST", indicators, **kwargs)
+
+    async def indicator_update(self, indicators: list, **kwargs) -> dict:
+        return await self._write_indicators("PATCH", indicators, **kwargs)
+
+    async def indicator_delete(self, ids: list, **params) -> dict:
+        return await self.request(
+            "DELETE", "/iocs/entities/indicators/v1", params=dict(params, ids=ids)
+        )
+
+    async def devices_count(self, **params) -> dict:
+        return await self.request(
+            "GET", "/iocs/aggregates/indicators/device-count/v1", params=params
+        )
+
+    async def action_query(self, **params) -> dict:
+        return await self.request("GET", "/iocs/queries/actions/v1", params=params)
+
+    async def platform_query(self, **params) -> dict:
+        return await self.request("GET", "/iocs/queries/platforms/v1", params=params)
+
+
+def run_with_client(client_kwargs: dict, func, *args, **kwargs):
+    """Run ``func(client, ...)`` on a fresh event loop with its own pooled client."""
+
+    async def runner():
+        async with AsyncFalconClient(**client_kwargs) as client:
+            return await func(client, *args, **kwargs)
+
+    return asyncio.run(runner())
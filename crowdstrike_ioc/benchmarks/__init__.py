@@ -0,0 +1 @@
+"""Synthetic-feed benchmarks for the sync pipeline (``python -m benchmarks.run``)."""
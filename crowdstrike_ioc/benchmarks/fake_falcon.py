@@ -0,0 +1,175 @@
+import random
+import re
+import threading
+import time
+
+MODIFIED_SINCE_RE = re.compile(r"modified_on:>=?'([^']*)'")
+
+
+class FakeIOCClient:
+    """In-memory stand-in for falconpy's IOC service (the calls this tool makes)."""
+
+    def __init__(self, page_size: int = 500, device_counts: dict | None = None):
+        self.device_counts = device_counts or {}
+        self.indicators = {}
+        self.calls = []
+        self.page_size = page_size
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _tick(self) -> tuple[int, str]:
+        with self._lock:
+            self._next_id += 1
+            return self._next_id, f"2025-01-01T00:00:{self._next_id:06d}Z"
+
+    def _ok(self, resources, total=None, after=None):
+        pagination = {"total": len(resources) if total is None else total}
+        if after:
+            pagination["after"] = after
+        return {
+            "status_code": 200,
+            "body": {"resources": resources, "meta": {"pagination": pagination}},
+        }
+
+    def indicator_combined(self, **kwargs):
+        self.calls.append("indicator_combined")
+        items = sorted(self.indicators.values(), key=lambda x: x["modified_on"])
+        match = MODIFIED_SINCE_RE.search(kwargs.get("filter") or "")
+        if match:
+            items = [x for x in items if x["modified_on"] >= match.group(1)]
+        if kwargs.get("sort") == "modified_on.desc":
+            items.reverse()
+        limit = min(kwargs.get("limit") or self.page_size, self.page_size)
+        start = int(kwargs.get("after") or 0)
+        page = [dict(x) for x in items[start : start + limit]]
+        after = str(start + limit) if start + limit < len(items) else None
+        return self._ok(page, total=len(items), after=after)
+
+    def indicator_create(self, indicators, **kwargs):
+        self.calls.append("indicator_create")
+        created = []
+        for item in indicators:
+            seq, stamp = self._tick()
+            record = dict(item, id=f"ioc{seq}", modified_on=stamp)
+            self.indicators[record["id"]] = record
+            created.append(dict(record))
+        return self._ok(created)
+
+    def indicator_update(self, indicators, **kwargs):
+        self.calls.append("indicator_update")
+        for item in indicators:
+            self.indicators[item["id"]].update(item, modified_on=self._tick()[1])
+        return self._ok([])
+
+    def indicator_delete(self, ids, **kwargs):
+        self.calls.append("indicator_delete")
+        for ioc_id in ids:
+            self.indicators.pop(ioc_id, None)
+        return self._ok([])
+
+    def devices_count(self, type: str, value: str, **kwargs):
+        self.calls.append("devices_count")
+        count = self.device_counts.get(value, 0)
+        return {"status_code": 200, "body": {"resources": [{"device_count": count}]}}
+
+
+class BenchIOCClient(FakeIOCClient):
+    """``FakeIOCClient`` with per-call latency, page size and injected errors.
+
+    ``error_rate`` is the fraction of calls that answer 429 (``throttle_share``)
+    or 503 before doing any work, so a ``RetryingClient`` wrapper retries them.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        page_size: int = 500,
+        error_rate: float = 0.0,
+        throttle_share: float = 0.5,
+        device_counts: dict | None = None,
+        seed: int = 0,
+    ):
+        super().__init__(page_size=page_size, device_counts=device_counts)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_share = throttle_share
+        self.injected_errors = 0
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._sorted = None
+
+    def _fault(self):
+        if self.latency:
+            time.sleep(self.latency)
+        if not self.error_rate:
+            return None
+        with self._rng_lock:
+            roll = self._rng.random()
+            if roll >= self.error_rate:
+                return None
+            self.injected_errors += 1
+            throttled = self._rng.random() < self.throttle_share
+        status = 429 if throttled else 503
+        return {
+            "status_code": status,
+            "headers": {"Retry-After": "0"},
+            "body": {"errors": [{"code": status, "message": "injected"}]},
+        }
+
+    def seed_indicators(self, items: list):
+        """Load existing tenant indicators without going through the API."""
+        for item in items:
+            seq, stamp = self._tick()
+            record = dict(item, id=f"ioc{seq}", modified_on=stamp)
+            self.indicators[record["id"]] = record
+        self._sorted = None
+
+    def _ordered(self) -> list:
+        # Cached between writes so listing cost is not dominated by the fake
+        # re-sorting the whole tenant for every page.
+        if self._sorted is None:
+            self._sorted = sorted(
+                self.indicators.values(), key=lambda x: x["modified_on"]
+            )
+        return self._sorted
+
+    def indicator_combined(self, **kwargs):
+        fault = self._fault()
+        if fault:
+            return fault
+        self.calls.append("indicator_combined")
+        items = self._ordered()
+        match = MODIFIED_SINCE_RE.search(kwargs.get("filter") or "")
+        if match:
+            items = [x for x in items if x["modified_on"] >= match.group(1)]
+        if kwargs.get("sort") == "modified_on.desc":
+            items = items[::-1]
+        limit = min(kwargs.get("limit") or self.page_size, self.page_size)
+        start = int(kwargs.get("after") or 0)
+        page = [dict(x) for x in items[start : start + limit]]
+        after = str(start + limit) if start + limit < len(items) else None
+        return self._ok(page, total=len(items), after=after)
+
+    def indicator_create(self, indicators, **kwargs):
+        fault = self._fault()
+        if fault:
+            return fault
+        self._sorted = None
+        return super().indicator_create(indicators, **kwargs)
+
+    def indicator_update(self, indicators, **kwargs):
+        fault = self._fault()
+        if fault:
+            return fault
+        self._sorted = None
+        return super().indicator_update(indicators, **kwargs)
+
+    def indicator_delete(self, ids, **kwargs):
+        fault = self._fault()
+        if fault:
+            return fault
+        self._sorted = None
+        return super().indicator_delete(ids, **kwargs)
+
+    def devices_count(self, type: str, value: str, **kwargs):
+        return self._fault() or super().devices_count(type=type, value=value, **kwargs)
@@ -0,0 +1,441 @@
+"""Local HTTP stand-in for the Falcon OAuth2, IOC and HostGroup APIs.
+
+Point ``main.py`` (falconpy or ``--engine async``) at it with ``--base-url``::
+
+    python -m benchmarks.falcon_server --port 8787 --seed-indicators 100000 \
+        --latency 0.02 --rate-limit 6000 --error-rate 0.01
+    python cs-sync.py --base-url http://127.0.0.1:8787 --stage deploy --confirm-write
+
+Per-endpoint call counts are served at ``GET /_stats`` and printed on exit.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.fake_falcon import BenchIOCClient
+from crowdstrike_api import PROJECT_SOURCE, PROJECT_TAGS
+
+TOKEN_TTL_SECONDS = 1799
+IOC_ACTIONS = ["allow", "detect", "no_action", "prevent", "prevent_no_ui"]
+IOC_PLATFORMS = ["linux", "mac", "windows"]
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class ServerProfile:
+    """How the stand-in misbehaves.
+
+    ``rate_limit`` is requests per minute for the tenant, reported through the
+    ``X-RateLimit-*`` headers and enforced with 429 + ``Retry-After``.
+    ``error_rate`` fails whole requests with 503; ``partial_error_rate`` rejects
+    individual indicators inside otherwise successful create batches. Tokens
+    stop working ``token_ttl`` seconds after they are issued.
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    rate_limit: int = 0
+    error_rate: float = 0.0
+    partial_error_rate: float = 0.0
+    page_size: int = 500
+    token_ttl: float = TOKEN_TTL_SECONDS
+    host_groups: list = field(default_factory=list)
+    seed: int = 0
+
+
+class FalconState:
+    """Tenant data plus the throttling window and call counters."""
+
+    def __init__(self, profile: ServerProfile, device_counts: dict | None = None):
+        self.profile = profile
+        self.store = BenchIOCClient(
+            page_size=profile.page_size, device_counts=device_counts
+        )
+        self.host_groups = [
+            {"id": hashlib.sha1(name.encode("utf-8")).hexdigest()[:32], "name": name}
+            for name in profile.host_groups
+        ]
+        self.calls = Counter()
+        # Host header of each request, as the client sent it.
+        self.hosts = Counter()
+        self.lock = threading.Lock()
+        self.tokens = {}
+        # Scripted failures: the next ``fail_next`` API requests answer 503.
+        self.fail_next = 0
+        self._rng = random.Random(profile.seed)
+        self._window_start = time.monotonic()
+        self._window_used = 0
+
+    def roll(self, probability: float) -> bool:
+        if probability <= 0:
+            return False
+        with self.lock:
+            return self._rng.random() < probability
+
+    def take_scripted_failure(self) -> bool:
+        with self.lock:
+            if self.fail_next <= 0:
+                return False
+            self.fail_next -= 1
+            return True
+
+    def token_valid(self, token: str) -> bool:
+        with self.lock:
+            expires = self.tokens.get(token)
+            if expires is not None and time.time() >= expires:
+                del self.tokens[token]
+                expires = None
+        return expires is not None
+
+    def take_rate_slot(self):
+        """Return ``(allowed, remaining, retry_after)`` for the current minute."""
+        limit = self.profile.rate_limit
+        if limit <= 0:
+            return True, None, 0
+        with self.lock:
+            now = time.monotonic()
+            if now - self._window_start >= 60:
+                self._window_start = now
+                self._window_used = 0
+            if self._window_used >= limit:
+                return False, 0, max(1, int(60 - (now - self._window_start)) + 1)
+            self._window_used += 1
+            return True, limit - self._window_used, 0
+
+    def seed_indicators(self, count: int, source: str = PROJECT_SOURCE):
+        self.store.seed_indicators(
+            [
+                {
+                    "type": "domain",
+                    "value": f"seed{i}.example.com",
+                    "action": "detect",
+                    "severity": "informational",
+                    "source": source,
+                    "description": "Seeded indicator",
+                    "tags": list(PROJECT_TAGS),
+                    "platforms": list(IOC_PLATFORMS),
+                    "applied_globally": True,
+                }
+                for i in range(count)
+            ]
+        )
+
+
+class FalconHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FalconStandIn/1.0"
+
+    def log_message(self, *args):
+        LOGGER.debug(*args)
+
+    @property
+    def state(self) -> FalconState:
+        return self.server.state
+
+    def _send(self, status: int, body: dict, headers: dict | None = None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if "gzip" in (self.headers.get("Accept-Encoding") or ""):
+            data = gzip.compress(data)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, str(value))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status: int, message: str, headers: dict | None = None):
+        body = {"errors": [{"code": status, "message": message}], "resources": []}
+        self._send(status, body, headers)
+
+    def _dispatch(self):
+        url = urllib.parse.urlsplit(self.path)
+        params = urllib.parse.parse_qs(url.query)
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        route = f"{self.command} {url.path}"
+        with self.state.lock:
+            self.state.calls[route] += 1
+            self.state.hosts[self.headers.get("Host")] += 1
+
+        profile = self.state.profile
+        if profile.latency or profile.jitter:
+            time.sleep(profile.latency + random.uniform(0, profile.jitter))
+
+        if url.path == "/oauth2/token":
+            return self._token(raw)
+        if url.path == "/_stats":
+            return self._send(200, {"calls": dict(self.state.calls)})
+        if url.path == "/oauth2/revoke":
+            return self._send(200, {"resources": []})
+
+        auth = self.headers.get("Authorization") or ""
+        if not self.state.token_valid(auth.removeprefix("Bearer ")):
+            return self._error(401, "access denied, authorization failed")
+
+        allowed, remaining, retry_after = self.state.take_rate_slot()
+        headers = {}
+        if remaining is not None:
+            headers["X-RateLimit-Limit"] = profile.rate_limit
+            headers["X-RateLimit-Remaining"] = remaining
+        if not allowed:
+            headers["Retry-After"] = retry_after
+            return self._error(429, "API rate limit exceeded.", headers)
+        if self.state.take_scripted_failure() or self.state.roll(profile.error_rate):
+            return self._error(503, "Service temporarily unavailable", headers)
+
+        handler = ROUTES.get(route)
+        if handler is None:
+            return self._error(404, f"No route for {route}")
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            return self._error(400, "Invalid JSON body")
+        status, payload = handler(self.state, params, body)
+        self._send(status, payload, headers)
+
+    def _token(self, raw: bytes):
+        form = urllib.parse.parse_qs(raw.decode("utf-8"))
+        if not form.get("client_id") or not form.get("client_secret"):
+            return self._error(400, "client_id and client_secret are required")
+        token = hashlib.sha256(f"{time.time()}{random.random()}".encode()).hexdigest()
+        ttl = self.state.profile.token_ttl
+        with self.state.lock:
+            self.state.tokens[token] = time.time() + ttl
+        self._send(
+            201,
+            {"access_token": token, "token_type": "bearer", "expires_in": int(ttl)},
+        )
+
+    do_GET = do_POST = do_PATCH = do_DELETE = _dispatch
+
+
+def _first(params: dict, name: str, default=None):
+    values = params.get(name)
+    return values[0] if values else default
+
+
+def _body_of(response: dict) -> tuple[int, dict]:
+    return response["status_code"], response["body"]
+
+
+def _combined(state: FalconState, params: dict, body: dict):
+    kwargs = {
+        "filter": _first(params, "filter"),
+        "sort": _first(params, "sort"),
+        "after": _first(params, "after"),
+        "limit": int(_first(params, "limit", state.profile.page_size)),
+    }
+    with state.lock:
+        return _body_of(state.store.indicator_combined(**kwargs))
+
+
+def _create(state: FalconState, params: dict, body: dict):
+    indicators = body.get("indicators") or []
+    rejected = [x for x in indicators if state.roll(state.profile.partial_error_rate)]
+    rejected_values = {id(x) for x in rejected}
+    accepted = [x for x in indicators if id(x) not in rejected_values]
+    with state.lock:
+        status, payload = _body_of(state.store.indicator_create(accepted))
+    if rejected:
+        payload["resources"] += [
+            dict(x, message_type="error", message="Indicator rejected by stand-in")
+            for x in rejected
+        ]
+        payload["errors"] = [
+            {"code": 400, "message": f"{len(rejected)} indicators failed"}
+        ]
+    return status, payload
+
+
+def _update(state: FalconState, params: dict, body: dict):
+    indicators = body.get("indicators") or []
+    with state.lock:
+        missing = [x for x in indicators if x.get("id") not in state.store.indicators]
+        found = [x for x in indicators if x.get("id") in state.store.indicators]
+        state.store.indicator_update(found)
+        updated = [dict(state.store.indicators[x["id"]]) for x in found]
+    payload = {"resources": updated, "errors": None}
+    if missing:
+        payload["errors"] = [
+            {"code": 404, "message": f"Indicator not found: {x.get('id')}"}
+            for x in missing
+        ]
+    return 200, payload
+
+
+def _delete(state: FalconState, params: dict, body: dict):
+    ids = params.get("ids") or []
+    with state.lock:
+        existing = [x for x in ids if x in state.store.indicators]
+        state.store.indicator_delete(existing)
+    return 200, {"resources": existing, "errors": None}
+
+
+def _device_count(state: FalconState, params: dict, body: dict):
+    value = _first(params, "value", "")
+    with state.lock:
+        count = state.store.device_counts.get(value, 0)
+    resource = {"id": f"domain:{value}", "type": "domain", "value": value}
+    return 200, {"resources": [dict(resource, device_count=count)], "errors": None}
+
+
+def _actions(state: FalconState, params: dict, body: dict):
+    return 200, {"resources": list(IOC_ACTIONS), "errors": None}
+
+
+def _platforms(state: FalconState, params: dict, body: dict):
+    return 200, {"resources": list(IOC_PLATFORMS), "errors": None}
+
+
+def _host_groups(state: FalconState, params: dict, body: dict):
+    fql = _first(params, "filter", "") or ""
+    # Matches the name:*'<text>*' wildcard filter resolve_host_group_ids sends.
+    needle = fql.split("'")[1] if "'" in fql else ""
+    needle = needle.rstrip("*").lower()
+    groups = [dict(g) for g in state.host_groups if needle in g["name"].lower()]
+    return 200, {"resources": groups, "errors": None}
+
+
+ROUTES = {
+    "GET /iocs/combined/indicator/v1": _combined,
+    "POST /iocs/entities/indicators/v1": _create,
+    "PATCH /iocs/entities/indicators/v1": _update,
+    "DELETE /iocs/entities/indicators/v1": _delete,
+    "GET /iocs/aggregates/indicators/device-count/v1": _device_count,
+    "GET /iocs/queries/actions/v1": _actions,
+    "GET /iocs/queries/platforms/v1": _platforms,
+    "GET /devices/combined/host-groups/v1": _host_groups,
+}
+
+
+def make_server(
+    profile: ServerProfile,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    device_counts: dict | None = None,
+) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), FalconHandler)
+    server.daemon_threads = True
+    server.state = FalconState(profile, device_counts=device_counts)
+    return server
+
+
+def serve_in_thread(server: ThreadingHTTPServer) -> str:
+    """Start ``server`` on a daemon thread and return its base URL."""
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+class _DeviceCounts(dict):
+    """Stable pseudo-random device count for any domain asked about."""
+
+    def __init__(self, rng: random.Random, maximum: int):
+        super().__init__()
+        self._rng = rng
+        self._maximum = maximum
+
+    def get(self, key, default=None):
+        if key not in self:
+            self[key] = self._rng.randint(0, self._maximum)
+        return self[key]
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    defaults = ServerProfile()
+    parser = argparse.ArgumentParser(description="Local Falcon IOC API stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", type=float, default=defaults.latency)
+    parser.add_argument("--jitter", type=float, default=defaults.jitter)
+    parser.add_argument(
+        "--rate-limit",
+        type=int,
+        default=defaults.rate_limit,
+        help="Requests per minute before answering 429 (0=unlimited)",
+    )
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument(
+        "--partial-error-rate",
+        type=float,
+        default=defaults.partial_error_rate,
+        help="Fraction of created indicators rejected individually",
+    )
+    parser.add_argument("--page-size", type=int, default=defaults.page_size)
+    parser.add_argument(
+        "--token-ttl",
+        type=float,
+        default=defaults.token_ttl,
+        help="Seconds an OAuth2 token stays valid before requests get 401",
+    )
+    parser.add_argument(
+        "--seed-indicators",
+        type=int,
+        default=0,
+        help="Managed indicators present in the tenant at start",
+    )
+    parser.add_argument(
+        "--device-count-max",
+        type=int,
+        default=0,
+        help="Give each seeded domain a random device count up to this value",
+    )
+    parser.add_argument(
+        "--host-groups",
+        default="",
+        help="Comma-separated host group names the tenant knows about",
+    )
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    profile = ServerProfile(
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit=args.rate_limit,
+        error_rate=args.error_rate,
+        partial_error_rate=args.partial_error_rate,
+        page_size=args.page_size,
+        token_ttl=args.token_ttl,
+        host_groups=[x.strip() for x in args.host_groups.split(",") if x.strip()],
+        seed=args.seed,
+    )
+    server = make_server(profile, host=args.host, port=args.port)
+    server.state.seed_indicators(args.seed_indicators)
+    if args.device_count_max:
+        rng = random.Random(args.seed)
+        server.state.store.device_counts = _DeviceCounts(rng, args.device_count_max)
+    LOGGER.info(
+        "Falcon stand-in on http://%s:%d (%d seeded indicators)",
+        args.host,
+        server.server_address[1],
+        args.seed_indicators,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps({"calls": dict(server.state.calls)}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
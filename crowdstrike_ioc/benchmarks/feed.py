@@ -0,0 +1,63 @@
+import json
+import random
+from pathlib import Path
+
+# Domain shapes seen in the real feed, weighted roughly by frequency.
+DOMAIN_SHAPES = (
+    ("*.{name}.com", 30),
+    ("{name}.net", 20),
+    ("relay{n}.{name}.io", 15),
+    ("https://api.{name}.com/v1/connect", 8),
+    ("{name}-cdn.com:443", 5),
+    ("*.shared{shared}.cloudfront.net", 10),
+    ("10.{a}.{b}.{c}", 4),
+    ("user_managed", 4),
+    ("bad domain {n}", 2),
+    ("-{name}.org.", 2),
+)
+
+
+def iter_feed(tools: int, seed: int = 0, domains_per_tool: int = 4):
+    """Yield ``tools`` LOLRMM-shaped tool records, deterministic for a seed."""
+    rng = random.Random(seed)
+    shapes = [shape for shape, _ in DOMAIN_SHAPES]
+    weights = [weight for _, weight in DOMAIN_SHAPES]
+    shared_pool = max(1, tools // 20)
+    for index in range(tools):
+        name = f"tool{index}"
+        count = rng.randint(1, domains_per_tool * 2 - 1)
+        domains = [
+            shape.format(
+                name=name,
+                n=rng.randint(0, 9),
+                shared=rng.randrange(shared_pool),
+                a=rng.randint(0, 255),
+                b=rng.randint(0, 255),
+                c=rng.randint(0, 300),
+            )
+            for shape in rng.choices(shapes, weights=weights, k=count)
+        ]
+        yield {
+            "Name": f"Tool {index}",
+            "Category": "RMM",
+            "Description": f"Synthetic remote management tool {index}",
+            "Artifacts": {
+                "Disk": [],
+                "Network": [{"Description": "C2", "Domains": domains, "Ports": []}],
+            },
+        }
+
+
+def write_feed(path: Path, tools: int, seed: int = 0) -> int:
+    """Stream a synthetic feed to ``path`` as a JSON array; return bytes written."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    size = 0
+    with path.open("w", encoding="utf-8") as handle:
+        handle.write("[")
+        for index, tool in enumerate(iter_feed(tools, seed=seed)):
+            chunk = ("," if index else "") + json.dumps(tool)
+            handle.write(chunk)
+            size += len(chunk)
+        handle.write("]")
+    return size + 2
@@ -0,0 +1,344 @@
+"""Timed benchmark scenarios over synthetic feeds and a fake Falcon tenant.
+
+Run from ``crowdstrike_ioc/``::
+
+    python -m benchmarks.run --tools 10000 --out bench-main.json
+    python -m benchmarks.run --tools 10000 --compare bench-main.json
+"""
+
+import argparse
+import functools
+import io
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from benchmarks.fake_falcon import BenchIOCClient
+from benchmarks.feed import iter_feed
+from crowdstrike_api import iter_managed_iocs
+from reconcile import DEFAULT_MAX_INFLIGHT, build_desired, sync
+from reporting import DEFAULT_PREVALENCE_WORKERS, run_prevalence_report
+from source import classify_domain, collect_domains, iter_json_array
+from throttle import RetryingClient
+
+BASELINE_SCHEMA_VERSION = 1
+DEFAULT_MAX_REGRESSION = 0.2
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BenchParams:
+    tools: int = 1000
+    seed: int = 0
+    repeat: int = 3
+    latency: float = 0.0
+    page_size: int = 500
+    error_rate: float = 0.0
+    max_inflight: int = DEFAULT_MAX_INFLIGHT
+    workers: int = DEFAULT_PREVALENCE_WORKERS
+    prevalence_max: int = 2000
+
+
+SCENARIOS = {}
+
+
+def scenario(name: str):
+    """Register ``factory(params) -> run``; ``run()`` is timed and returns an item count."""
+
+    def register(factory):
+        SCENARIOS[name] = factory
+        return factory
+
+    return register
+
+
+@functools.lru_cache(maxsize=4)
+def _feed(tools: int, seed: int) -> tuple:
+    return tuple(iter_feed(tools, seed=seed))
+
+
+@functools.lru_cache(maxsize=4)
+def _feed_bytes(tools: int, seed: int) -> bytes:
+    return json.dumps(list(_feed(tools, seed))).encode("utf-8")
+
+
+@functools.lru_cache(maxsize=4)
+def _desired(tools: int, seed: int) -> tuple:
+    desired, _ = collect_domains(_feed(tools, seed), config={})
+    return tuple(desired)
+
+
+def _client(params: BenchParams, **kwargs) -> BenchIOCClient:
+    return BenchIOCClient(
+        latency=params.latency,
+        page_size=params.page_size,
+        error_rate=params.error_rate,
+        seed=params.seed,
+        **kwargs,
+    )
+
+
+def _retrying(client) -> RetryingClient:
+    return RetryingClient(client, max_retries=10, base_delay=0.0, max_delay=0.0)
+
+
+def _sync_kwargs(params: BenchParams) -> dict:
+    return {
+        "retrodetects": False,
+        "prune": True,
+        "action": "detect",
+        "platforms": ["windows", "mac", "linux"],
+        "max_inflight": params.max_inflight,
+    }
+
+
+def _seeded_tenant(params: BenchParams, desired: tuple) -> BenchIOCClient:
+    """A tenant holding half the desired set, a tenth of it stale, plus strays."""
+    client = _client(params)
+    payloads = build_desired(list(desired[::2]), "detect", ["windows", "mac", "linux"])
+    items = []
+    for index, payload in enumerate(payloads.values()):
+        item = payload.to_api()
+        if index % 10 == 0:
+            item["description"] = "stale description"
+        items.append(item)
+    if items:
+        strays = len(items) // 20
+        items += [dict(items[0], value=f"stray{i}.example.com") for i in range(strays)]
+    client.seed_indicators(items)
+    return client
+
+
+@scenario("parse_feed")
+def bench_parse_feed(params: BenchParams):
+    raw = _feed_bytes(params.tools, params.seed)
+    return lambda: sum(1 for _ in iter_json_array(io.BytesIO(raw)))
+
+
+@scenario("collect_domains")
+def bench_collect_domains(params: BenchParams):
+    feed = _feed(params.tools, params.seed)
+    classify_domain.cache_clear()
+    return lambda: len(collect_domains(feed, config={})[0])
+
+
+def _sync_run(params: BenchParams, dry_run: bool):
+    desired = list(_desired(params.tools, params.seed))
+    client = _retrying(_seeded_tenant(params, desired))
+
+    def run() -> int:
+        counts = sync(
+            client=client, desired=desired, dry_run=dry_run, **_sync_kwargs(params)
+        )
+        return counts["create"] + counts["update"] + counts["delete"]
+
+    return run
+
+
+@scenario("sync_plan")
+def bench_sync_plan(params: BenchParams):
+    return _sync_run(params, dry_run=True)
+
+
+@scenario("sync_apply")
+def bench_sync_apply(params: BenchParams):
+    return _sync_run(params, dry_run=False)
+
+
+@scenario("list_managed")
+def bench_list_managed(params: BenchParams):
+    desired = _desired(params.tools, params.seed)
+    client = _retrying(_seeded_tenant(params, desired))
+    return lambda: len(iter_managed_iocs(client))
+
+
+@scenario("prevalence")
+def bench_prevalence(params: BenchParams):
+    desired = list(_desired(params.tools, params.seed))
+    counts = {x.domain: i % 50 for i, x in enumerate(desired)}
+    client = _retrying(_client(params, device_counts=counts))
+    return lambda: run_prevalence_report(
+        client,
+        desired,
+        threshold=25,
+        max_items=params.prevalence_max,
+        workers=params.workers,
+        rate=0,
+    )["evaluated"]
+
+
+def _peak_bytes(factory, params: BenchParams) -> int:
+    """Peak Python heap allocated by one extra, untimed run (setup excluded)."""
+    run = factory(params)
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_scenarios(
+    params: BenchParams, names: list[str] | None = None, memory: bool = False
+) -> dict:
+    results = {}
+    for name in names or list(SCENARIOS):
+        timings = []
+        items = 0
+        for _ in range(max(1, params.repeat)):
+            run = SCENARIOS[name](params)
+            started = time.perf_counter()
+            items = run()
+            timings.append(time.perf_counter() - started)
+        best = min(timings)
+        results[name] = {
+            "seconds": round(statistics.median(timings), 6),
+            "min_seconds": round(best, 6),
+            "runs": [round(x, 6) for x in timings],
+            "items": items,
+            "items_per_second": round(items / best, 1) if best > 0 else None,
+        }
+        if memory:
+            results[name]["peak_bytes"] = _peak_bytes(SCENARIOS[name], params)
+        LOGGER.info("%s: %.4fs (%d items)", name, best, items)
+    return {
+        "schema": BASELINE_SCHEMA_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": asdict(params),
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, max_regression: float) -> list[dict]:
+    """Per-scenario median ratio against ``baseline``; ``regressed`` past the limit."""
+    rows = []
+    for name, result in current["results"].items():
+        before = (baseline.get("results") or {}).get(name)
+        if not before or not before.get("seconds"):
+            rows.append({"scenario": name, "ratio": None, "regressed": False})
+            continue
+        ratio = result["seconds"] / before["seconds"]
+        rows.append(
+            {
+                "scenario": name,
+                "baseline": before["seconds"],
+                "current": result["seconds"],
+                "ratio": round(ratio, 3),
+                "regressed": ratio > 1 + max_regression,
+            }
+        )
+    return rows
+
+
+def _print_results(report: dict, rows: list[dict] | None):
+    by_name = {row["scenario"]: row for row in rows or []}
+    memory = any("peak_bytes" in x for x in report["results"].values())
+    print(
+        f"{'scenario':<18}{'median s':>12}{'items':>10}{'items/s':>14}{'vs base':>10}"
+        + (f"{'peak MiB':>10}" if memory else "")
+    )
+    for name, result in report["results"].items():
+        row = by_name.get(name) or {}
+        ratio = row.get("ratio")
+        delta = "" if ratio is None else f"{ratio:.2f}x"
+        if row.get("regressed"):
+            delta += " !"
+        peak = ""
+        if memory:
+            peak = f"{result.get('peak_bytes', 0) / (1 << 20):>10.1f}"
+        print(
+            f"{name:<18}{result['seconds']:>12.4f}{result['items']:>10}"
+            f"{result['items_per_second'] or 0:>14.0f}{delta:>10}{peak}"
+        )
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    defaults = BenchParams()
+    parser = argparse.ArgumentParser(description="Benchmark the IOC sync pipeline")
+    parser.add_argument(
+        "--scenarios",
+        help=f"Comma-separated subset of: {', '.join(SCENARIOS)} (default: all)",
+    )
+    parser.add_argument("--tools", type=int, default=defaults.tools)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--repeat", type=int, default=defaults.repeat)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=defaults.latency,
+        help="Seconds of simulated latency per fake API call",
+    )
+    parser.add_argument("--page-size", type=int, default=defaults.page_size)
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=defaults.error_rate,
+        help="Fraction of fake API calls answering 429/503",
+    )
+    parser.add_argument("--max-inflight", type=int, default=defaults.max_inflight)
+    parser.add_argument("--workers", type=int, default=defaults.workers)
+    parser.add_argument("--prevalence-max", type=int, default=defaults.prevalence_max)
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="Also record each scenario's peak traced heap (one extra, slower run)",
+    )
+    parser.add_argument("--out", help="Write results as a JSON baseline")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=DEFAULT_MAX_REGRESSION,
+        help=f"Fail when a median is this much slower than baseline (default: {DEFAULT_MAX_REGRESSION})",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    # Injected 429/5xx responses would otherwise log a retry warning each.
+    logging.basicConfig(level=logging.ERROR)
+    names = [x.strip() for x in (args.scenarios or "").split(",") if x.strip()]
+    unknown = [x for x in names if x not in SCENARIOS]
+    if unknown:
+        print(f"Unknown scenarios: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    params = BenchParams(
+        tools=args.tools,
+        seed=args.seed,
+        repeat=args.repeat,
+        latency=args.latency,
+        page_size=args.page_size,
+        error_rate=args.error_rate,
+        max_inflight=args.max_inflight,
+        workers=args.workers,
+        prevalence_max=args.prevalence_max,
+    )
+    report = run_scenarios(params, names or None, memory=args.memory)
+
+    rows = None
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if baseline.get("params") != report["params"]:
+            print("Warning: baseline was recorded with different parameters.")
+        rows = compare(report, baseline, args.max_regression)
+    _print_results(report, rows)
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if rows and any(row["regressed"] for row in rows):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,6 +11,7 @@ _DEFAULT_CONFIG = {
         "deploy_action": "detect",
         "report_action_candidates": ["no_action", "none", "monitor"],
         "prevalence_threshold": 25,
+        "minimize_subdomains": False,
     },
     "rollout": {
         "host_groups": [],
@@ -20,6 +21,10 @@ _DEFAULT_CONFIG = {
         "excluded_platforms": [],
         "excluded_domains": [],
     },
+    "sources": {
+        "lolrmm": True,
+        "extra": [],
+    },
 }
 
 # Still track valid top-level keys
@@ -1,7 +1,10 @@
 import logging
-from dataclasses import dataclass, field
+import sys
+from collections.abc import Iterable
+from dataclasses import dataclass
 
 from source import NormalizedEntry
+from throttle import ClientStats, RetryingClient
 
 PROJECT_SOURCE = "tisu_rmm_detection_ioc"
 PROJECT_TAGS = ["tisu", "rmm_detection", "feed_lolrmm"]
@@ -9,11 +12,24 @@ DEFAULT_PLATFORMS = ["windows", "mac", "linux"]
 DEFAULT_ACTION = "detect"
 DEFAULT_SEVERITY = "informational"
 
+_SHARED_TUPLES: dict[tuple, tuple] = {}
+
 LOGGER = logging.getLogger(__name__)
 
 
-@dataclass
+def shared_tuple(values: Iterable[str] | None) -> tuple:
+    """One shared tuple per distinct value list, e.g. the tags every payload carries."""
+    key = tuple(values or ())
+    return _SHARED_TUPLES.setdefault(key, key)
+
+
+@dataclass(slots=True)
 class IndicatorPayload:
+    """One desired indicator; list fields are shared tuples, see ``make_indicator``.
+
+    Request dicts are only built by ``to_api`` when a batch is submitted.
+    """
+
     type: str
     value: str
     action: str
@@ -21,9 +37,9 @@ class IndicatorPayload:
     source: str
     description: str
     applied_globally: bool = True
-    tags: list[str] = field(default_factory=list)
-    platforms: list[str] = field(default_factory=list)
-    host_groups: list[str] = field(default_factory=list)
+    tags: tuple[str, ...] = ()
+    platforms: tuple[str, ...] = ()
+    host_groups: tuple[str, ...] = ()
     id: str | None = None
 
     def to_api(self) -> dict:
@@ -34,12 +50,12 @@ class IndicatorPayload:
             "severity": self.severity,
             "source": self.source,
             "description": self.description,
-            "tags": self.tags,
+            "tags": list(self.tags),
         }
         if self.platforms:
-            payload["platforms"] = self.platforms
+            payload["platforms"] = list(self.platforms)
         if self.host_groups:
-            payload["host_groups"] = self.host_groups
+            payload["host_groups"] = list(self.host_groups)
             payload["applied_globally"] = False
         else:
             payload["applied_globally"] = self.applied_globally
@@ -53,29 +69,89 @@ def fql_escape(value: str) -> str:
     return value.replace("'", "\\'")
 
 
-def iter_managed_iocs(client) -> list:
-    items = []
+def managed_filter() -> str:
+    return f"source:'{fql_escape(PROJECT_SOURCE)}'+type:'domain'"
+
+
+def _managed_query(modified_since: str | None) -> dict:
+    fql_filter = managed_filter()
+    if modified_since:
+        fql_filter += f"+modified_on:>='{fql_escape(modified_since)}'"
+    return {"filter": fql_filter, "limit": 500}
+
+
+def _next_after(body: dict):
+    return ((body.get("meta") or {}).get("pagination") or {}).get("after")
+
+
+def _dedupe_by_id(items: list) -> list:
+    deduped = {}
+    for item in items:
+        deduped[item.get("id")] = item
+    items = list(deduped.values())
+    LOGGER.debug("Fetched %d managed indicators", len(items))
+    return items
+
+
+def iter_managed_pages(client, modified_since: str | None = None):
+    """Yield the managed indicators one API page at a time."""
     after = None
     while True:
-        kwargs = {
-            "filter": f"source:'{fql_escape(PROJECT_SOURCE)}'+type:'domain'",
-            "limit": 500,
-        }
+        kwargs = _managed_query(modified_since)
         if after:
             kwargs["after"] = after
         response = client.indicator_combined(**kwargs)
         body = response.get("body") or {}
-        resources = body.get("resources") or []
-        items.extend(resources)
-        after = ((body.get("meta") or {}).get("pagination") or {}).get("after")
+        yield body.get("resources") or []
+        after = _next_after(body)
         if not after:
             break
-    deduped = {}
-    for item in items:
-        deduped[item.get("id")] = item
-    items = list(deduped.values())
-    LOGGER.debug("Fetched %d managed indicators", len(items))
-    return items
+
+
+def iter_managed_iocs(client, modified_since: str | None = None) -> list:
+    items = []
+    for page in iter_managed_pages(client, modified_since):
+        items.extend(page)
+    return _dedupe_by_id(items)
+
+
+async def iter_managed_pages_async(client, modified_since: str | None = None):
+    """Async counterpart of ``iter_managed_pages`` for an ``AsyncFalconClient``."""
+    after = None
+    while True:
+        kwargs = _managed_query(modified_since)
+        if after:
+            kwargs["after"] = after
+        response = await client.indicator_combined(**kwargs)
+        body = response.get("body") or {}
+        yield body.get("resources") or []
+        after = _next_after(body)
+        if not after:
+            break
+
+
+async def iter_managed_iocs_async(client, modified_since: str | None = None) -> list:
+    """Async counterpart of ``iter_managed_iocs`` for an ``AsyncFalconClient``."""
+    items = []
+    async for page in iter_managed_pages_async(client, modified_since):
+        items.extend(page)
+    return _dedupe_by_id(items)
+
+
+def tenant_fingerprint(client) -> dict:
+    """Cheap one-call probe of the managed IOC set: total count and newest change."""
+    response = client.indicator_combined(
+        filter=managed_filter(), limit=1, sort="modified_on.desc"
+    )
+    body = response.get("body") or {}
+    resources = body.get("resources") or []
+    pagination = (body.get("meta") or {}).get("pagination") or {}
+    latest = resources[0] if resources and isinstance(resources[0], dict) else {}
+    return {
+        "total": pagination.get("total", len(resources)),
+        "latest_id": latest.get("id"),
+        "latest_modified_on": latest.get("modified_on"),
+    }
 
 
 def list_available_actions(client) -> list:
@@ -143,7 +219,12 @@ def resolve_platforms(client) -> list:
 
 
 def resolve_host_group_ids(
-    client_id: str, client_secret: str, base_url: str | None, group_names: list[str]
+    client_id: str,
+    client_secret: str,
+    base_url: str | None,
+    group_names: list[str],
+    stats: ClientStats | None = None,
+    member_cid: str | None = None,
 ) -> list[str]:
     """Resolve Host Group names to IDs using the HostGroups service."""
     if not group_names:
@@ -158,7 +239,9 @@ def resolve_host_group_ids(
     kwargs = {"client_id": client_id, "client_secret": client_secret}
     if base_url:
         kwargs["base_url"] = base_url
-    hg_client = HostGroup(**kwargs)
+    if member_cid:
+        kwargs["member_cid"] = member_cid
+    hg_client = RetryingClient(HostGroup(**kwargs), stats=stats)
 
     found_ids: list[str] = []
     found_names: set[str] = set()
@@ -229,7 +312,8 @@ def make_indicator(
     tool_text = ", ".join(tools[:6])
     if len(tools) > 6:
         tool_text = f"{tool_text}, +{len(tools) - 6} more"
-    description = f"[tisu_rmm] tools={tool_text}; note={base_text}"[:4096]
+    # Domains of the same tool share one description string.
+    description = sys.intern(f"[tisu_rmm] tools={tool_text}; note={base_text}"[:4096])
     return IndicatorPayload(
         type="domain",
         value=domain,
@@ -238,9 +322,9 @@ def make_indicator(
         source=PROJECT_SOURCE,
         description=description,
         applied_globally=(not host_groups),
-        tags=PROJECT_TAGS,
-        platforms=platforms,
-        host_groups=host_groups or [],
+        tags=shared_tuple(PROJECT_TAGS),
+        platforms=shared_tuple(platforms),
+        host_groups=shared_tuple(host_groups),
     )
 
 
@@ -0,0 +1,78 @@
+from collections.abc import Iterable
+
+# Node flags: the rule matches this exact name, everything strictly below it
+# ("*.vendor.com"), or the name and everything below it (".vendor.com").
+EXACT = 1
+BELOW = 2
+SUBTREE = EXACT | BELOW
+
+
+def parse_rule(rule: str) -> tuple[str, int]:
+    """Split a rule into its domain and match flags.
+
+    ``vendor.com`` matches only that name, ``*.vendor.com`` only its subdomains,
+    and ``.vendor.com`` the name plus every subdomain.
+    """
+    text = str(rule).strip().lower().rstrip(".")
+    if text.startswith("*."):
+        return text[2:], BELOW
+    if text.startswith("."):
+        return text[1:], SUBTREE
+    return text, EXACT
+
+
+class DomainTrie:
+    """Reversed-label trie of domain rules.
+
+    A lookup walks at most one node per label of the queried domain, so its cost
+    does not grow with the number of rules.
+    """
+
+    __slots__ = ("_root", "_size")
+
+    def __init__(self, rules: Iterable[str] = ()):
+        # node = [flags, children, exact rule, below rule]
+        self._root = [0, {}, None, None]
+        self._size = 0
+        for rule in rules:
+            self.add(rule)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def add(self, rule: str):
+        domain, flags = parse_rule(rule)
+        if not domain:
+            return
+        node = self._root
+        for label in reversed(domain.split(".")):
+            node = node[1].setdefault(label, [0, {}, None, None])
+        if node[0] & flags == flags:
+            return
+        self._size += 1
+        rule = str(rule).strip()
+        if flags & EXACT and node[2] is None:
+            node[2] = rule
+        if flags & BELOW and node[3] is None:
+            node[3] = rule
+        node[0] |= flags
+
+    def match(self, domain: str) -> str | None:
+        """Return the first rule (closest to the root) matching ``domain``."""
+        if not self._size or not domain:
+            return None
+        labels = domain.lower().rstrip(".").split(".")
+        node = self._root
+        for depth in range(len(labels) - 1, -1, -1):
+            node = node[1].get(labels[depth])
+            if node is None:
+                return None
+            if depth and node[0] & BELOW:
+                return node[3]
+        return node[2] if node[0] & EXACT else None
+
+    def __contains__(self, domain: str) -> bool:
+        return self.match(domain) is not None
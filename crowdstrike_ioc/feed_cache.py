@@ -0,0 +1,221 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+
+SNAPSHOT_RETENTION = 3
+CHUNK_SIZE = 1 << 16
+
+LOGGER = logging.getLogger(__name__)
+
+
+class AtomicWriter:
+    """Binary writes to a private temporary file that replaces ``path`` at the end.
+
+    Each writer gets its own temporary name, so concurrent runs never share one.
+    Used as a context manager it commits on success and removes the temporary
+    file if anything raises; ``discard`` drops it explicitly. With ``fsync`` the
+    data reaches the disk before the rename.
+    """
+
+    def __init__(self, path: Path, fsync: bool = False):
+        self.path = Path(path)
+        self.fsync = fsync
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = tempfile.NamedTemporaryFile(
+            dir=self.path.parent,
+            prefix=f".{self.path.name}.",
+            suffix=".tmp",
+            delete=False,
+        )
+        self.tmp_path = Path(self._handle.name)
+
+    def write(self, data: bytes):
+        self._handle.write(data)
+
+    def commit(self):
+        try:
+            if self.fsync:
+                self._handle.flush()
+                os.fsync(self._handle.fileno())
+            self._handle.close()
+            os.replace(self.tmp_path, self.path)
+        except BaseException:
+            self.discard()
+            raise
+
+    def discard(self):
+        self._handle.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.discard()
+        elif self.tmp_path.exists():
+            self.commit()
+        return False
+
+
+def atomic_write(path: Path, data: bytes):
+    with AtomicWriter(path) as out:
+        out.write(data)
+
+
+class FeedCache:
+    """Content-addressed feed snapshots plus the HTTP validators that produced them.
+
+    Layout under ``root``::
+
+        <name>.meta.json                 digest, etag, last_modified, fetched_at, checked_at
+        snapshots/<name>-<digest>.json   raw (decompressed) feed bytes
+        derived/<name>-<digest>-<key>.json  results computed from a snapshot
+    """
+
+    def __init__(self, root: Path, name: str = "lolrmm"):
+        self.root = Path(root)
+        self.name = name
+
+    @property
+    def meta_path(self) -> Path:
+        return self.root / f"{self.name}.meta.json"
+
+    def snapshot_path(self, digest: str) -> Path:
+        return self.root / "snapshots" / f"{self.name}-{digest}.json"
+
+    def derived_path(self, digest: str, key: str) -> Path:
+        return self.root / "derived" / f"{self.name}-{digest[:16]}-{key}.json"
+
+    def load_meta(self) -> dict:
+        if not self.meta_path.exists():
+            return {}
+        try:
+            meta = json.loads(self.meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            LOGGER.warning("Ignoring unreadable feed cache metadata: %s", exc)
+            return {}
+        if not isinstance(meta, dict) or not meta.get("digest"):
+            return {}
+        if not self.snapshot_path(meta["digest"]).exists():
+            return {}
+        return meta
+
+    def save_meta(self, meta: dict):
+        atomic_write(self.meta_path, json.dumps(meta, indent=2).encode("utf-8"))
+
+    def is_fresh(self, meta: dict, max_age: int) -> bool:
+        if not meta or not max_age or max_age <= 0:
+            return False
+        checked_at = float(meta.get("checked_at") or 0)
+        return (time.time() - checked_at) < max_age
+
+    def validator_headers(self, meta: dict) -> dict:
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def mark_checked(self, meta: dict) -> dict:
+        meta = dict(meta, checked_at=time.time())
+        self.save_meta(meta)
+        return meta
+
+    def store_snapshot(
+        self, stream, url: str, etag: str | None, last_modified: str | None
+    ) -> dict:
+        """Copy ``stream`` to disk in chunks, hashing as it goes."""
+        snapshots = self.root / "snapshots"
+        snapshots.mkdir(parents=True, exist_ok=True)
+        hasher = hashlib.sha256()
+        size = 0
+        # A private staging file per download, so concurrent runs never share one.
+        handle = tempfile.NamedTemporaryFile(
+            dir=snapshots, prefix=f".{self.name}.", suffix=".download", delete=False
+        )
+        staging = Path(handle.name)
+        try:
+            with handle:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    handle.write(chunk)
+                    size += len(chunk)
+            digest = hasher.hexdigest()
+            os.replace(staging, self.snapshot_path(digest))
+        except BaseException:
+            staging.unlink(missing_ok=True)
+            raise
+        now = time.time()
+        meta = {
+            "url": url,
+            "digest": digest,
+            "size": size,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": now,
+            "checked_at": now,
+        }
+        self.save_meta(meta)
+        self._prune(keep=digest)
+        return meta
+
+    def read_snapshot(self, digest: str) -> bytes:
+        return self.snapshot_path(digest).read_bytes()
+
+    def open_snapshot(self, digest: str):
+        return self.snapshot_path(digest).open("rb")
+
+    def load_derived(self, digest: str, key: str):
+        path = self.derived_path(digest, key)
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            LOGGER.warning("Ignoring unreadable derived cache entry %s: %s", path, exc)
+            return None
+
+    def store_derived(self, digest: str, key: str, payload):
+        atomic_write(
+            self.derived_path(digest, key), json.dumps(payload).encode("utf-8")
+        )
+
+    def _own_files(self, folder: str, pattern: str):
+        """``(path, match)`` for this cache's files only, never another name's.
+
+        ``<name>-*`` alone would also match ``<name>-2`` or ``<name>-mirror``.
+        """
+        own = re.compile(re.escape(self.name) + pattern)
+        for path in (self.root / folder).glob(f"{self.name}-*.json"):
+            match = own.fullmatch(path.stem)
+            if match:
+                yield path, match
+
+    def _prune(self, keep: str):
+        snapshots = sorted(
+            self._own_files("snapshots", r"-([0-9a-f]{64})"),
+            key=lambda x: x[0].stat().st_mtime,
+            reverse=True,
+        )
+        kept = {keep}
+        for path, match in snapshots:
+            digest = match.group(1)
+            if digest in kept:
+                continue
+            if len(kept) < SNAPSHOT_RETENTION:
+                kept.add(digest)
+                continue
+            path.unlink(missing_ok=True)
+        for path, match in list(self._own_files("derived", r"-([0-9a-f]{16})-.+")):
+            if not any(d.startswith(match.group(1)) for d in kept):
+                path.unlink(missing_ok=True)
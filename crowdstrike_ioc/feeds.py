@@ -0,0 +1,391 @@
+import abc
+import csv
+import hashlib
+import json
+import logging
+import queue
+import re
+import threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+
+from feed_cache import FeedCache
+from source import (
+    DEFAULT_SOURCE,
+    LOLRMM_URL,
+    SOURCE_FIELD,
+    _collect_cache_key,
+    collect_domains,
+    entries_from_cache,
+    iter_json_array,
+    iter_lolrmm,
+    iter_snapshot,
+    load_desired as load_lolrmm_desired,
+    refresh_feed,
+)
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover
+    yaml = None
+
+# Records handed from fetch threads to the merging consumer per queue item.
+MERGE_CHUNK_SIZE = 256
+MERGE_QUEUE_CHUNKS = 64
+SOURCE_NAME_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _tool_record(domain: str, tool: str, description: str = "") -> dict:
+    return {
+        "Name": tool,
+        "Description": description,
+        "Artifacts": {"Network": [{"Domains": [domain]}]},
+    }
+
+
+def as_tool_records(items, tool: str, description: str = ""):
+    """Turn the simple list shapes into LOLRMM-style tool records.
+
+    Accepts LOLRMM tool records (passed through), bare domain strings, and
+    ``{"domain", "tool", "description"}`` rows; ``tool`` and ``description``
+    fill in whatever a row leaves out.
+    """
+    for item in items:
+        if isinstance(item, str):
+            yield _tool_record(item, tool, description)
+        elif isinstance(item, dict) and ("Name" in item or "Artifacts" in item):
+            yield item
+        elif isinstance(item, dict) and item.get("domain"):
+            yield _tool_record(
+                str(item["domain"]),
+                str(item.get("tool") or tool),
+                str(item.get("description") or description),
+            )
+
+
+def _mapping_records(data: dict, description: str):
+    """``{tool: [domain, ...]}`` mappings, the natural YAML shape for local lists."""
+    for tool, domains in data.items():
+        if isinstance(domains, str):
+            domains = [domains]
+        yield {
+            "Name": str(tool),
+            "Description": description,
+            "Artifacts": {"Network": [{"Domains": list(domains or [])}]},
+        }
+
+
+class FeedSource(abc.ABC):
+    """One feed of RMM tool records; subclasses implement ``iter_records``.
+
+    ``fingerprint`` returns a content digest when one is cheap to get (it may
+    revalidate a cached download), or ``None`` when the content is unknown
+    until fetched. ``optional`` feeds that fail are skipped with a warning.
+    """
+
+    def __init__(
+        self, name: str, tool: str = "", description: str = "", optional: bool = False
+    ):
+        self.name = name
+        self.tool = tool or name
+        self.description = (
+            description or f"Remote monitoring and management domain from {name}"
+        )
+        self.optional = optional
+
+    def fingerprint(self) -> str | None:
+        return None
+
+    @abc.abstractmethod
+    def iter_records(self):
+        """Yield LOLRMM-style tool records."""
+
+
+class UrlSource(FeedSource):
+    """A JSON array over HTTP(S): the LOLRMM feed or any ``as_tool_records`` list.
+
+    With a cache, the download is revalidated with a conditional GET like the
+    LOLRMM feed. The built-in LOLRMM feed shares the cache root with the
+    single-feed path; every other URL gets its own ``sources/<name>`` directory.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        url: str,
+        cache: FeedCache | None = None,
+        max_age: int = 0,
+        **kwargs,
+    ):
+        super().__init__(name, **kwargs)
+        self.url = url
+        self.cache = None
+        if cache is not None:
+            root = cache.root
+            if (name, url) != (DEFAULT_SOURCE, LOLRMM_URL):
+                root = root / "sources" / name
+            self.cache = FeedCache(root, name=name)
+        self.max_age = max_age
+        self._digest = None
+
+    def fingerprint(self) -> str | None:
+        if self.cache is None:
+            return None
+        if self._digest is None:
+            self._digest = refresh_feed(self.cache, max_age=self.max_age, url=self.url)
+        return self._digest
+
+    def iter_records(self):
+        if self.cache is not None:
+            # Revalidated at most once per run; fingerprint() may have done it.
+            records = iter_snapshot(self.cache, self.fingerprint())
+        else:
+            records = iter_lolrmm(url=self.url)
+        yield from as_tool_records(records, self.tool, self.description)
+
+
+class FileSource(FeedSource):
+    """A local JSON, CSV or YAML list of RMM domains, chosen by file extension.
+
+    JSON and YAML may hold a list (LOLRMM records, domains or rows) or a
+    ``{tool: [domains]}`` mapping. CSV needs a ``domain`` column and may add
+    ``tool`` and ``description``.
+    """
+
+    def __init__(self, name: str, path: Path, **kwargs):
+        super().__init__(name, **kwargs)
+        self.path = Path(path)
+
+    def fingerprint(self) -> str | None:
+        hasher = hashlib.sha256()
+        with self.path.open("rb") as handle:
+            for chunk in iter(lambda: handle.read(1 << 16), b""):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def iter_records(self):
+        suffix = self.path.suffix.lower()
+        if suffix == ".csv":
+            with self.path.open(encoding="utf-8-sig", newline="") as handle:
+                rows = (
+                    {k.strip().lower(): v for k, v in row.items() if k}
+                    for row in csv.DictReader(handle)
+                )
+                yield from as_tool_records(rows, self.tool, self.description)
+            return
+        if suffix in (".yaml", ".yml"):
+            if yaml is None:
+                raise RuntimeError(
+                    "PyYAML is required for YAML feed files. Install with: uv pip install pyyaml"
+                )
+            data = yaml.safe_load(self.path.read_text(encoding="utf-8")) or []
+        elif suffix == ".json":
+            with self.path.open("rb") as handle:
+                first = handle.read(64).lstrip(b"\xef\xbb\xbf \t\r\n")[:1]
+                handle.seek(0)
+                if first == b"[":
+                    yield from as_tool_records(
+                        iter_json_array(handle), self.tool, self.description
+                    )
+                    return
+                data = json.load(handle)
+        else:
+            raise ValueError(f"Unsupported feed file type: {self.path}")
+        if isinstance(data, dict):
+            yield from _mapping_records(data, self.description)
+        else:
+            yield from as_tool_records(data, self.tool, self.description)
+
+
+def _source_name(raw: str, taken: set) -> str:
+    name = SOURCE_NAME_RE.sub("-", raw).strip("-.") or "feed"
+    candidate = name
+    index = 2
+    while candidate in taken:
+        candidate = f"{name}-{index}"
+        index += 1
+    taken.add(candidate)
+    return candidate
+
+
+def build_sources(
+    config: dict,
+    extra: list | None = None,
+    cache: FeedCache | None = None,
+    max_age: int = 0,
+) -> list[FeedSource]:
+    """Sources from ``sources`` in the config plus ``extra`` (e.g. ``--source``).
+
+    Each extra entry is a path or URL string, or a mapping with ``path`` or
+    ``url`` and optional ``name``, ``tool``, ``description`` and ``optional``.
+    """
+    section = config.get("sources", {})
+    sources = []
+    taken = set()
+    if section.get("lolrmm", True):
+        taken.add(DEFAULT_SOURCE)
+        sources.append(
+            UrlSource(DEFAULT_SOURCE, LOLRMM_URL, cache=cache, max_age=max_age)
+        )
+    for entry in list(section.get("extra") or []) + list(extra or []):
+        if isinstance(entry, str):
+            scheme = urllib.parse.urlsplit(entry).scheme
+            entry = {"url" if scheme in ("http", "https") else "path": entry}
+        location = entry.get("url") or entry.get("path")
+        if not location:
+            raise RuntimeError(f"Feed source needs a 'path' or 'url': {entry}")
+        default_name = (
+            urllib.parse.urlsplit(location).hostname
+            if entry.get("url")
+            else Path(location).stem
+        )
+        options = {
+            "tool": str(entry.get("tool") or ""),
+            "description": str(entry.get("description") or ""),
+            "optional": bool(entry.get("optional", False)),
+        }
+        name = _source_name(str(entry.get("name") or default_name), taken)
+        if entry.get("url"):
+            sources.append(
+                UrlSource(name, location, cache=cache, max_age=max_age, **options)
+            )
+        else:
+            sources.append(FileSource(name, Path(location), **options))
+    if not sources:
+        raise RuntimeError("No feed sources configured")
+    return sources
+
+
+def iter_merged(sources: list[FeedSource], chunk_size: int = MERGE_CHUNK_SIZE):
+    """Fetch every source on its own thread and yield records as they arrive.
+
+    Each record is tagged with ``SOURCE_FIELD`` so ``collect_domains`` can keep
+    provenance. A bounded queue keeps memory flat when one feed parses faster
+    than the consumer. A failing source stops the merge unless it is optional;
+    records an optional source yielded before failing are kept.
+    """
+    chunks = queue.Queue(maxsize=MERGE_QUEUE_CHUNKS)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce(source: FeedSource):
+        error = None
+        batch = []
+        try:
+            for record in source.iter_records():
+                if not isinstance(record, dict):
+                    continue
+                record[SOURCE_FIELD] = source.name
+                batch.append(record)
+                if len(batch) >= chunk_size:
+                    if not put((source, batch, None)):
+                        return
+                    batch = []
+        except Exception as exc:
+            error = exc
+        if batch and not put((source, batch, None)):
+            return
+        put((source, None, error))
+
+    threads = [
+        threading.Thread(
+            target=produce, args=(x,), name=f"feed-{x.name}", daemon=True
+        )
+        for x in sources
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        remaining = len(threads)
+        while remaining:
+            source, batch, error = chunks.get()
+            if batch is not None:
+                yield from batch
+                continue
+            remaining -= 1
+            if error is None:
+                continue
+            if not source.optional:
+                raise RuntimeError(
+                    f"Feed source '{source.name}' failed: {error}"
+                ) from error
+            LOGGER.warning("Skipping optional feed source '%s': %s", source.name, error)
+    finally:
+        stop.set()
+
+
+def _fingerprint(source: FeedSource) -> str | None:
+    """``source.fingerprint()``; an optional source that fails yields ``None``.
+
+    ``iter_merged`` then fetches it again and skips it, as without a cache.
+    """
+    try:
+        return source.fingerprint()
+    except Exception as exc:
+        if not source.optional:
+            raise RuntimeError(f"Feed source '{source.name}' failed: {exc}") from exc
+        LOGGER.warning(
+            "Optional feed source '%s' could not be checked: %s", source.name, exc
+        )
+        return None
+
+
+def load_desired(
+    config: dict,
+    limit: int = 0,
+    cache: FeedCache | None = None,
+    max_age: int = 0,
+    extra: list | None = None,
+    observe=None,
+):
+    """``source.load_desired`` over every configured feed, merged in one pass.
+
+    With only the LOLRMM feed this is ``source.load_desired`` unchanged. With
+    several, all feeds are revalidated and fetched concurrently; the normalized
+    result is reused when a cache is set and every feed's fingerprint matches.
+    """
+    sources = build_sources(config, extra=extra, cache=cache, max_age=max_age)
+    if len(sources) == 1 and sources[0].name == DEFAULT_SOURCE:
+        return load_lolrmm_desired(
+            config, limit=limit, cache=cache, max_age=max_age, observe=observe
+        )
+
+    key = None
+    if cache is not None:
+        with ThreadPoolExecutor(max_workers=len(sources)) as pool:
+            fingerprints = list(pool.map(_fingerprint, sources))
+        if all(fingerprints):
+            material = [_collect_cache_key(config, limit)] + [
+                f"{x.name}={fp}" for x, fp in zip(sources, fingerprints)
+            ]
+            key = hashlib.sha256("|".join(material).encode("utf-8")).hexdigest()[:16]
+            cached = None
+            if observe is None:
+                cached = cache.load_derived(fingerprints[0], key)
+            if cached:
+                LOGGER.debug("Reusing normalized domains for unchanged feeds")
+                return entries_from_cache(cached["entries"]), cached["stats"]
+
+    records = iter_merged(sources)
+    if observe is not None:
+        records = observe(records)
+    desired, stats = collect_domains(records, config=config, limit=limit)
+    if key is not None:
+        cache.store_derived(
+            fingerprints[0],
+            key,
+            {"entries": [asdict(x) for x in desired], "stats": stats},
+        )
+    return desired, stats
@@ -0,0 +1,305 @@
+import argparse
+import gzip
+import itertools
+import json
+import logging
+import mmap
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from config import DEFAULT_CONFIG_PATH, load_simple_yaml
+from feed_cache import FeedCache
+from feeds import load_desired
+from source import NormalizedEntry
+
+LOGGER = logging.getLogger(__name__)
+
+# Zeek JSON uses "query"/"id.orig_h", Falcon exports "DomainName"/"ComputerName".
+_QUERY_RE = re.compile(rb'"(?:query|DomainName)"\s*:\s*"([^"]*)"')
+_HOST_RES = tuple(
+    re.compile(rb'"%s"\s*:\s*"([^"]*)"' % re.escape(name))
+    for name in (b"ComputerName", b"aid", b"id.orig_h", b"src_ip")
+)
+_ZEEK_QUERY = b"query"
+_ZEEK_HOSTS = (b"id.orig_h", b"src_ip")
+
+# Set by the worker initializer so the table is pickled once per process.
+_MATCHER = None
+
+
+def _tool_names(tools) -> tuple[str, ...]:
+    return (tools,) if isinstance(tools, str) else tuple(tools)
+
+
+def hunt_table(entries: list[NormalizedEntry]) -> dict[str, tuple[str, ...]]:
+    """``{domain: tools}`` with every tool of an entry, not just its first.
+
+    Shared domains and ancestors that absorbed minimized subdomains list several
+    tools; each of them is credited with a match, as the dashboard groups by tool.
+    """
+    return {entry.domain: tuple(entry.tools or [entry.tool]) for entry in entries}
+
+
+class SuffixMatcher:
+    """Match a queried name, or any of its parent domains, against the domain set.
+
+    Names stay as bytes: a lookup is one set test on the last label, then at
+    most one dict probe per label. ``table`` maps a domain to a tool name or a
+    sequence of tool names.
+    """
+
+    __slots__ = ("tools", "_table", "_tlds")
+
+    def __init__(self, table: dict):
+        table = {domain: _tool_names(tools) for domain, tools in table.items()}
+        self.tools = sorted({tool for tools in table.values() for tool in tools})
+        index = {tool: i for i, tool in enumerate(self.tools)}
+        self._table = {
+            domain.encode("ascii", "ignore"): tuple(index[x] for x in tools)
+            for domain, tools in table.items()
+        }
+        self._tlds = {domain.rsplit(b".", 1)[-1] for domain in self._table}
+
+    @classmethod
+    def from_entries(cls, entries: list[NormalizedEntry]) -> "SuffixMatcher":
+        return cls(hunt_table(entries))
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def match(self, name: bytes) -> tuple[int, ...] | None:
+        """Indices into ``tools`` for the closest listed domain at or above ``name``."""
+        name = name.rstrip(b".").lower()
+        if name[name.rfind(b".") + 1 :] not in self._tlds:
+            return None
+        table = self._table
+        while True:
+            hit = table.get(name)
+            if hit is not None:
+                return hit
+            dot = name.find(b".")
+            if dot < 0:
+                return None
+            name = name[dot + 1 :]
+
+
+def iter_lines(path: Path):
+    """Raw lines of a gzip file (streamed) or a plain file (memory-mapped)."""
+    if path.suffix == ".gz":
+        with gzip.open(path, "rb") as handle:
+            yield from handle
+        return
+    with path.open("rb") as handle:
+        if path.stat().st_size == 0:
+            return
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield from iter(data.readline, b"")
+
+
+def _add(groups: dict, tools: tuple, domain: bytes, host: bytes | None):
+    domain = domain.rstrip(b".").lower()
+    keep_host = bool(host) and host != b"-"
+    for tool in tools:
+        group = groups.get(tool)
+        if group is None:
+            group = groups[tool] = [0, set(), set()]
+        group[0] += 1
+        group[1].add(domain)
+        if keep_host:
+            group[2].add(host)
+
+
+def _scan_zeek(lines, matcher: SuffixMatcher, groups: dict) -> tuple[int, int]:
+    records = matched = 0
+    query = host = splits = -1
+    for line in lines:
+        if line[:1] == b"#":
+            if line.startswith(b"#fields"):
+                fields = line.rstrip(b"\r\n").split(b"\t")[1:]
+                query = fields.index(_ZEEK_QUERY) if _ZEEK_QUERY in fields else -1
+                host = next(
+                    (fields.index(x) for x in _ZEEK_HOSTS if x in fields), -1
+                )
+                # Columns past the last one we read are never split out.
+                splits = max(query, host) + 1
+            continue
+        if query < 0:
+            continue
+        records += 1
+        parts = line.split(b"\t", splits)
+        if len(parts) <= query:
+            continue
+        name = parts[query].rstrip(b"\r\n")
+        tools = matcher.match(name)
+        if tools is not None:
+            matched += 1
+            peer = parts[host].rstrip(b"\r\n") if 0 <= host < len(parts) else None
+            _add(groups, tools, name, peer)
+    return records, matched
+
+
+def _scan_ndjson(lines, matcher: SuffixMatcher, groups: dict) -> tuple[int, int]:
+    records = matched = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        records += 1
+        found = _QUERY_RE.search(line)
+        if found is None:
+            continue
+        tools = matcher.match(found.group(1))
+        if tools is None:
+            continue
+        matched += 1
+        host = None
+        for pattern in _HOST_RES:
+            hit = pattern.search(line)
+            if hit is not None:
+                host = hit.group(1)
+                break
+        _add(groups, tools, found.group(1), host)
+    return records, matched
+
+
+def scan_file(path: Path, matcher: SuffixMatcher) -> tuple[int, int, dict]:
+    """``(records, matched, {tool index: [events, domains, hosts]})`` for one file.
+
+    A record whose domain belongs to several tools counts once in ``matched``
+    and once in each of those tools' groups.
+    """
+    lines = iter_lines(Path(path))
+    first = next(lines, b"")
+    groups = {}
+    if first.startswith(b"#"):
+        counts = _scan_zeek(itertools.chain([first], lines), matcher, groups)
+    else:
+        counts = _scan_ndjson(itertools.chain([first], lines), matcher, groups)
+    return *counts, groups
+
+
+def _init_worker(table: dict):
+    global _MATCHER
+    _MATCHER = SuffixMatcher(table)
+
+
+def _scan_worker(path: str):
+    return path, *scan_file(Path(path), _MATCHER)
+
+
+def hunt(paths: list, table: dict, workers: int = 1) -> dict:
+    """Scan ``paths`` against ``{domain: tools}`` and aggregate matches per tool."""
+    started = time.perf_counter()
+    matcher = SuffixMatcher(table)
+    merged = {}
+    stats = {"files": 0, "bytes": 0, "records": 0, "matched": 0}
+    paths = [str(p) for p in paths]
+
+    def merge(path, records, matched, groups):
+        stats["files"] += 1
+        stats["bytes"] += Path(path).stat().st_size
+        stats["records"] += records
+        stats["matched"] += matched
+        for index, (events, domains, hosts) in groups.items():
+            tool = matcher.tools[index]
+            group = merged.setdefault(tool, [0, set(), set()])
+            group[0] += events
+            group[1] |= domains
+            group[2] |= hosts
+
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            merge(path, *scan_file(Path(path), matcher))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(paths)),
+            initializer=_init_worker,
+            initargs=(table,),
+        ) as pool:
+            for result in pool.map(_scan_worker, paths):
+                merge(*result)
+
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = round(elapsed, 3)
+    stats["records_per_sec"] = int(stats["records"] / elapsed) if elapsed else 0
+    tools = {
+        tool: {
+            "events": events,
+            "hosts": len(hosts),
+            "domains": sorted(x.decode("ascii", "replace") for x in domains),
+            "host_names": sorted(x.decode("utf-8", "replace") for x in hosts),
+        }
+        for tool, (events, domains, hosts) in sorted(merged.items())
+    }
+    return {"stats": stats, "tools": tools}
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Match archived DNS logs against the LOLRMM domain set"
+    )
+    parser.add_argument(
+        "paths", nargs="+", help="Zeek dns.log (TSV/JSON) or NDJSON files, .gz ok"
+    )
+    parser.add_argument(
+        "--config", default=str(DEFAULT_CONFIG_PATH), help="Path to YAML config"
+    )
+    parser.add_argument(
+        "--source",
+        action="append",
+        default=[],
+        help="Extra feed to merge: a JSON/CSV/YAML file or a URL (repeatable)",
+    )
+    parser.add_argument(
+        "--feed-cache-dir",
+        help="Directory for cached LOLRMM feed snapshots (enables conditional GET)",
+    )
+    parser.add_argument(
+        "--max-feed-age",
+        type=int,
+        default=0,
+        help="Reuse a cached feed younger than this many seconds without revalidating",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=4, help="Files scanned in parallel (default 4)"
+    )
+    parser.add_argument("--json-out", help="Write the full per-tool result as JSON")
+    return parser.parse_args(argv)
+
+
+def print_hunt_summary(result: dict):
+    stats = result["stats"]
+    print(
+        f"{stats['records']} records in {stats['files']} files, "
+        f"{stats['matched']} matched ({stats['records_per_sec']}/s)"
+    )
+    for tool, group in result["tools"].items():
+        domains = ", ".join(group["domains"][:5])
+        more = len(group["domains"]) - 5
+        if more > 0:
+            domains += f" (+{more})"
+        print(f"{tool}: {group['hosts']} hosts, {group['events']} queries: {domains}")
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    config = load_simple_yaml(Path(args.config))
+    cache = FeedCache(Path(args.feed_cache_dir)) if args.feed_cache_dir else None
+    desired, _ = load_desired(
+        config, cache=cache, max_age=args.max_feed_age, extra=args.source
+    )
+    if not desired:
+        LOGGER.error("No domains to hunt for")
+        return 1
+    result = hunt(args.paths, hunt_table(desired), workers=args.workers)
+    print_hunt_summary(result)
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(result, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+import json
+import logging
+import sqlite3
+from pathlib import Path
+
+from crowdstrike_api import iter_managed_iocs, managed_filter, tenant_fingerprint
+
+INDEX_SCHEMA_VERSION = "1"
+INDEX_COLUMNS = (
+    "type",
+    "value",
+    "id",
+    "action",
+    "severity",
+    "source",
+    "description",
+    "applied_globally",
+    "tags",
+    "platforms",
+    "host_groups",
+    "modified_on",
+)
+JSON_COLUMNS = {"tags", "platforms", "host_groups"}
+
+LOGGER = logging.getLogger(__name__)
+
+
+class IOCIndex:
+    """Local SQLite mirror of the managed tenant IOCs, keyed by (type, value).
+
+    ``refresh`` pulls only indicators modified since the last watermark and
+    falls back to a full relisting when the tenant count no longer matches
+    (e.g. indicators deleted outside this tool).
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS iocs ("
+            "type TEXT NOT NULL, value TEXT NOT NULL, id TEXT, action TEXT, "
+            "severity TEXT, source TEXT, description TEXT, applied_globally INTEGER, "
+            "tags TEXT, platforms TEXT, host_groups TEXT, modified_on TEXT, "
+            "PRIMARY KEY (type, value))"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self.conn.commit()
+        if (
+            self._meta("schema") != INDEX_SCHEMA_VERSION
+            or self._meta("filter") != managed_filter()
+        ):
+            self._reset()
+
+    def close(self):
+        self.conn.close()
+
+    def _meta(self, key: str):
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+        )
+
+    def _reset(self):
+        self.conn.execute("DELETE FROM iocs")
+        self.conn.execute("DELETE FROM meta")
+        self._set_meta("schema", INDEX_SCHEMA_VERSION)
+        self._set_meta("filter", managed_filter())
+        self.conn.commit()
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM iocs").fetchone()[0]
+
+    def _upsert(self, items: list):
+        rows = []
+        for item in items:
+            if not item.get("id"):
+                continue
+            row = []
+            for column in INDEX_COLUMNS:
+                value = item.get(column)
+                if column in ("type", "value"):
+                    value = str(value or "").lower()
+                elif column in JSON_COLUMNS:
+                    value = json.dumps(value or [])
+                elif column == "applied_globally" and value is not None:
+                    value = int(bool(value))
+                row.append(value)
+            rows.append(row)
+        placeholders = ", ".join("?" for _ in INDEX_COLUMNS)
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO iocs ({', '.join(INDEX_COLUMNS)}) "
+            f"VALUES ({placeholders})",
+            rows,
+        )
+        watermark = max(
+            (str(x["modified_on"]) for x in items if x.get("modified_on")),
+            default=None,
+        )
+        current = self._meta("watermark")
+        if watermark and (current is None or watermark > current):
+            self._set_meta("watermark", watermark)
+
+    def refresh(self, client) -> list:
+        watermark = self._meta("watermark")
+        if watermark:
+            changed = iter_managed_iocs(client, modified_since=watermark)
+            self._upsert(changed)
+            self.conn.commit()
+            expected = tenant_fingerprint(client)["total"]
+            if expected == self.count():
+                LOGGER.info(
+                    "IOC index refreshed: %d changed since %s", len(changed), watermark
+                )
+                return self.items()
+            LOGGER.info(
+                "IOC index out of step (index=%d, tenant=%s); relisting",
+                self.count(),
+                expected,
+            )
+
+        self._reset()
+        self._upsert(iter_managed_iocs(client))
+        self.conn.commit()
+        LOGGER.info("IOC index rebuilt with %d indicators", self.count())
+        return self.items()
+
+    def items(self) -> list:
+        cursor = self.conn.execute(f"SELECT {', '.join(INDEX_COLUMNS)} FROM iocs")
+        items = []
+        for row in cursor:
+            item = dict(zip(INDEX_COLUMNS, row))
+            for column in JSON_COLUMNS:
+                item[column] = json.loads(item[column] or "[]")
+            if item["applied_globally"] is not None:
+                item["applied_globally"] = bool(item["applied_globally"])
+            items.append(item)
+        return items
+
+    def forget(self, keys):
+        self.conn.executemany(
+            "DELETE FROM iocs WHERE type = ? AND value = ?", [tuple(k) for k in keys]
+        )
+        self.conn.commit()
@@ -11,6 +11,7 @@ try:
 except ImportError:  # pragma: no cover
     IOC = None
 
+from async_falcon import run_with_client
 from config import (
     DEFAULT_CONFIG_PATH,
     load_dotenv,
@@ -27,15 +28,33 @@ from crowdstrike_api import (
     resolve_platforms,
     resolve_host_group_ids,
 )
-from reconcile import sync
+from reconcile import (
+    DEFAULT_MAX_INFLIGHT,
+    resume_journal,
+    sync,
+    sync_async,
+    sync_incremental,
+)
 from reporting import (
+    DEFAULT_PREVALENCE_RATE,
     DEFAULT_PREVALENCE_STATS,
+    DEFAULT_PREVALENCE_WORKERS,
     DEFAULT_SYNC_PLAN,
     build_summary_payload,
     run_prevalence_report,
+    run_prevalence_report_async,
     write_json_summary,
 )
-from source import SOURCE_STATS_KEYS, collect_domains, fetch_lolrmm
+from artifacts import ArtifactCollector
+from feed_cache import FeedCache
+from feeds import load_desired
+from ioc_index import IOCIndex
+from plan_file import apply_saved_plan, load_plan, plan_context_errors, plan_to_file
+from prevalence_cache import DEFAULT_MAX_ENTRIES, DEFAULT_TTL_HOURS, PrevalenceCache
+from source import SOURCE_STATS_KEYS
+from sync_journal import SyncJournal
+from tenants import DEFAULT_TENANT_WORKERS, load_tenant_manifest, run_tenants
+from throttle import DEFAULT_MAX_RETRIES, ClientStats, RetryingClient
 
 LOGGER = logging.getLogger("cs_sync")
 
@@ -56,6 +75,26 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--limit", type=int, default=0, help="Limit processed indicators (0=all)"
     )
+    parser.add_argument(
+        "--feed-cache-dir",
+        help="Directory for cached LOLRMM feed snapshots (enables conditional GET)",
+    )
+    parser.add_argument(
+        "--source",
+        action="append",
+        default=[],
+        help="Extra feed to merge: a JSON/CSV/YAML file or a URL (repeatable)",
+    )
+    parser.add_argument(
+        "--artifacts-dir",
+        help="Also write the LogScale lookup CSVs here, from the same feed parse",
+    )
+    parser.add_argument(
+        "--max-feed-age",
+        type=int,
+        default=0,
+        help="Reuse a cached feed younger than this many seconds without revalidating",
+    )
     parser.add_argument(
         "--dry-run", action="store_true", help="Show planned changes without writes"
     )
@@ -70,6 +109,88 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--prune", action="store_true", help="Delete stale managed IOCs not in source"
     )
+    parser.add_argument(
+        "--minimize-subdomains",
+        action="store_true",
+        help="Drop subdomains already covered by a parent-domain indicator",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Apply only changes since the last saved sync state",
+    )
+    parser.add_argument(
+        "--state-file",
+        default="sync_state.json",
+        help="Sync state file for --incremental (default: sync_state.json)",
+    )
+    parser.add_argument(
+        "--full-sync-hours",
+        type=float,
+        default=24,
+        help="With --incremental, relist the tenant at least this often (0=never)",
+    )
+    parser.add_argument(
+        "--full-sync",
+        action="store_true",
+        help="With --incremental, force a full relist and diff (suspected drift)",
+    )
+    parser.add_argument(
+        "--journal",
+        help="Write-ahead journal of planned batches and their outcomes (JSONL)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Replay only the unfinished batches recorded in --journal",
+    )
+    parser.add_argument(
+        "--plan-out",
+        help="Write the full create/update/delete plan to this JSONL file without writing to the tenant",
+    )
+    parser.add_argument(
+        "--apply",
+        dest="apply_plan",
+        help="Execute a plan saved with --plan-out (skips the feed and the tenant relist)",
+    )
+    parser.add_argument(
+        "--tenants",
+        help="Tenant manifest (YAML): parse the feed once and sync every listed CID",
+    )
+    parser.add_argument(
+        "--tenant-workers",
+        type=int,
+        default=DEFAULT_TENANT_WORKERS,
+        help=f"Tenants synced in parallel with --tenants (default: {DEFAULT_TENANT_WORKERS})",
+    )
+    parser.add_argument(
+        "--max-inflight",
+        type=int,
+        default=DEFAULT_MAX_INFLIGHT,
+        help=f"Concurrent create/update/delete batches (default: {DEFAULT_MAX_INFLIGHT})",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["sync", "async"],
+        default="sync",
+        help="API backend for listing, batch writes and prevalence (default: sync)",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help=f"Retries for throttled (429) or failed (5xx) API calls (default: {DEFAULT_MAX_RETRIES})",
+    )
+    parser.add_argument(
+        "--api-rate",
+        type=float,
+        default=0,
+        help="Cap API calls per second per tenant (0=pace from rate-limit headers only)",
+    )
+    parser.add_argument(
+        "--ioc-index",
+        help="SQLite mirror of managed IOCs; refreshes only indicators modified since the last run",
+    )
     parser.add_argument(
         "--log-level",
         default="WARNING",
@@ -90,7 +211,35 @@ def parse_args() -> argparse.Namespace:
         "--prevalence-max",
         type=int,
         default=50,
-        help="Max indicators for prevalence report",
+        help="Max indicators for prevalence report (0=all)",
+    )
+    parser.add_argument(
+        "--prevalence-workers",
+        type=int,
+        default=DEFAULT_PREVALENCE_WORKERS,
+        help=f"Concurrent device-count lookups (default: {DEFAULT_PREVALENCE_WORKERS})",
+    )
+    parser.add_argument(
+        "--prevalence-rate",
+        type=float,
+        default=DEFAULT_PREVALENCE_RATE,
+        help=f"Max device-count lookups per second, 0=unlimited (default: {DEFAULT_PREVALENCE_RATE})",
+    )
+    parser.add_argument(
+        "--prevalence-cache",
+        help="SQLite cache of device counts reused across assess runs",
+    )
+    parser.add_argument(
+        "--prevalence-ttl-hours",
+        type=float,
+        default=DEFAULT_TTL_HOURS,
+        help=f"Age after which cached device counts are re-queried (default: {DEFAULT_TTL_HOURS})",
+    )
+    parser.add_argument(
+        "--prevalence-cache-size",
+        type=int,
+        default=DEFAULT_MAX_ENTRIES,
+        help=f"Max cached device counts, least recently used evicted first (default: {DEFAULT_MAX_ENTRIES})",
     )
     parser.add_argument(
         "--skip-prevalence-report", action="store_true", help="Skip prevalence report"
@@ -133,6 +282,7 @@ def print_run_summary(summary: dict, host_groups: list[str], host_group_ids: lis
     source_stats = summary.get("source_stats", {})
     sync_plan = summary.get("sync_plan", {})
     prevalence_stats = summary.get("prevalence_stats", {})
+    api_stats = summary.get("api_stats", {})
 
     scope = "global"
     if host_groups:
@@ -167,11 +317,12 @@ def print_run_summary(summary: dict, host_groups: list[str], host_group_ids: lis
 
     if all(k in sync_plan for k in ("create", "update", "delete", "unchanged")):
         print(
-            "- Sync plan: create={create}, update={update}, unchanged={unchanged}, delete={delete}".format(
+            "- Sync plan: create={create}, update={update}, unchanged={unchanged}, delete={delete}, failed={failed}".format(
                 create=sync_plan.get("create", 0),
                 update=sync_plan.get("update", 0),
                 unchanged=sync_plan.get("unchanged", 0),
                 delete=sync_plan.get("delete", 0),
+                failed=sync_plan.get("failed", 0),
             )
         )
     elif sync_plan.get("status"):
@@ -188,6 +339,44 @@ def print_run_summary(summary: dict, host_groups: list[str], host_group_ids: lis
             )
         )
 
+    if api_stats:
+        print(
+            "- API calls: calls={calls}, retries={retries}, throttled={throttled} ({seconds}s)".format(
+                calls=api_stats.get("calls", 0),
+                retries=api_stats.get("retries", 0),
+                throttled=api_stats.get("throttled", 0),
+                seconds=api_stats.get("throttled_seconds", 0),
+            )
+        )
+
+
+def print_tenant_summary(summary: dict):
+    tenants = summary.get("tenants", {})
+    print("\nTenant Summary")
+    print(
+        "- Stage: {stage} | Dry run: {dry_run} | Tenants: {total} ({failed} failed)".format(
+            stage=summary.get("stage", "unknown"),
+            dry_run=summary.get("dry_run", False),
+            total=len(tenants),
+            failed=summary.get("tenants_failed", 0),
+        )
+    )
+    for name, result in tenants.items():
+        plan = result.get("sync_plan", {})
+        if result.get("status") != "ok":
+            print(f"- {name}: FAILED ({result.get('error')})")
+            continue
+        print(
+            "- {name}: create={create}, update={update}, unchanged={unchanged}, delete={delete}, failed={failed}".format(
+                name=name,
+                create=plan.get("create", 0),
+                update=plan.get("update", 0),
+                unchanged=plan.get("unchanged", 0),
+                delete=plan.get("delete", 0),
+                failed=plan.get("failed", 0),
+            )
+        )
+
 
 def main() -> int:
     args = parse_args()
@@ -260,7 +449,58 @@ def main() -> int:
     is_write_stage = stage in ("report", "deploy")
     is_global = not host_groups_config
 
-    if is_write_stage and not args.dry_run:
+    if args.plan_out or args.apply_plan:
+        if not is_write_stage:
+            LOGGER.error("--plan-out and --apply need the report or deploy stage.")
+            return 2
+        if args.plan_out and args.apply_plan:
+            LOGGER.error("--plan-out and --apply cannot be combined.")
+            return 2
+        if args.dry_run or args.incremental or args.resume or args.engine == "async":
+            LOGGER.error(
+                "--plan-out/--apply do not support --dry-run, --incremental, "
+                "--resume or --engine async."
+            )
+            return 2
+
+    saved_plan = None
+    scope_groups = host_groups_config
+    if args.apply_plan:
+        try:
+            saved_plan = load_plan(Path(args.apply_plan))
+        except (OSError, ValueError) as e:
+            LOGGER.error("Cannot read sync plan: %s", e)
+            return 2
+        errors = plan_context_errors(saved_plan, stage, host_groups_config)
+        if errors:
+            LOGGER.error("Refusing to apply %s: %s", args.apply_plan, "; ".join(errors))
+            return 2
+        # Confirm the scope of the indicators about to be written, not the config.
+        is_global = saved_plan.is_global
+        scope_groups = saved_plan.host_groups
+
+    if args.tenants:
+        if not is_write_stage:
+            LOGGER.error("--tenants needs the report or deploy stage.")
+            return 2
+        if (
+            args.plan_out
+            or args.apply_plan
+            or args.resume
+            or args.remove_all
+            or args.project_status
+            or args.engine == "async"
+        ):
+            LOGGER.error(
+                "--tenants does not support --plan-out, --apply, --resume, "
+                "--remove-all, --project-status or --engine async."
+            )
+            return 2
+        if not args.dry_run and not args.confirm_write:
+            LOGGER.error("--tenants writes without prompting; pass --confirm-write.")
+            return 1
+
+    if is_write_stage and not args.dry_run and not args.plan_out and not args.tenants:
         print(
             f"\n!!! SAFETY WARNING: You are about to run in '{stage.upper()}' mode. !!!"
         )
@@ -272,7 +512,7 @@ def main() -> int:
                     LOGGER.error("Global deployment not confirmed. Aborting.")
                     return 1
         else:
-            print(f"Scope: {len(host_groups_config)} Host Groups.")
+            print(f"Scope: {len(scope_groups)} Host Groups.")
             if not args.confirm_write:
                 user_input = input("Type 'yes' to confirm deployment: ")
                 if user_input.lower().strip() != "yes":
@@ -285,17 +525,93 @@ def main() -> int:
     if args.dry_run:
         LOGGER.info("  - Mode: DRY-RUN")
 
-    data = fetch_lolrmm()
-    desired, stats = collect_domains(data, config=config, limit=args.limit)
+    if args.minimize_subdomains:
+        config["policy"] = dict(config.get("policy", {}), minimize_subdomains=True)
 
-    LOGGER.info("Source stats:")
-    for key in SOURCE_STATS_KEYS:
-        LOGGER.info("- %s: %s", key, stats[key])
+    if args.apply_plan:
+        # The saved plan already holds every payload; the feed is not needed.
+        desired, stats = [], {}
+    else:
+        feed_cache = (
+            FeedCache(Path(args.feed_cache_dir)) if args.feed_cache_dir else None
+        )
+        collector = (
+            ArtifactCollector(Path(args.artifacts_dir)) if args.artifacts_dir else None
+        )
+        try:
+            desired, stats = load_desired(
+                config=config,
+                limit=args.limit,
+                cache=feed_cache,
+                max_age=args.max_feed_age,
+                extra=args.source,
+                observe=collector.observe if collector else None,
+            )
+        except BaseException:
+            if collector is not None:
+                collector.discard()
+            raise
+        if collector is not None:
+            collector.finish()
+
+        LOGGER.info("Source stats:")
+        for key in SOURCE_STATS_KEYS:
+            LOGGER.info("- %s: %s", key, stats[key])
+        for name, source_stats in (stats.get("sources") or {}).items():
+            LOGGER.info("- source %s: %s", name, source_stats)
 
     client_id = args.client_id or env.get("CLIENT_ID")
     client_secret = args.client_secret or env.get("CLIENT_SECRET")
     base_url = args.base_url or env.get("BASE_URL")
 
+    if args.tenants:
+        if IOC is None:
+            LOGGER.error(
+                "falconpy is not installed. Install it with: uv pip install crowdstrike-falconpy"
+            )
+            return 2
+        specs = load_tenant_manifest(
+            Path(args.tenants),
+            env,
+            defaults={
+                "client_id": client_id,
+                "client_secret": client_secret,
+                "base_url": base_url,
+                "max_inflight": args.max_inflight,
+                "api_rate": args.api_rate,
+                "max_retries": args.max_retries,
+            },
+        )
+        LOGGER.info("Syncing %d tenants, %d at a time", len(specs), args.tenant_workers)
+        summary_payload = run_tenants(
+            specs,
+            lambda spec: IOC(**spec.falcon_kwargs()),
+            desired=desired,
+            stats=stats,
+            stage=stage,
+            # Tenants without their own host_groups follow --host-groups/--global.
+            config=dict(
+                config,
+                rollout=dict(config.get("rollout", {}), host_groups=host_groups_config),
+            ),
+            options={
+                "dry_run": args.dry_run,
+                "retrodetects": args.retrodetects,
+                "prune": args.prune,
+                "incremental": args.incremental,
+                "state_file": args.state_file,
+                "full_sync_hours": args.full_sync_hours,
+                "force_full": args.full_sync,
+                "journal": args.journal,
+                "ioc_index": args.ioc_index,
+            },
+            workers=args.tenant_workers,
+        )
+        if args.summary_json:
+            write_json_summary(Path(args.summary_json), summary_payload)
+        print_tenant_summary(summary_payload)
+        return 1 if summary_payload["tenants_failed"] else 0
+
     if not client_id or not client_secret:
         if args.project_status:
             LOGGER.info("No API credentials provided, source-only status shown.")
@@ -323,7 +639,13 @@ def main() -> int:
     kwargs = {"client_id": client_id, "client_secret": client_secret}
     if base_url:
         kwargs["base_url"] = base_url
-    client = IOC(**kwargs)
+    api_stats = ClientStats()
+    client = RetryingClient(
+        IOC(**kwargs),
+        max_retries=args.max_retries,
+        rate=args.api_rate,
+        stats=api_stats,
+    )
 
     if args.remove_all:
         LOGGER.info("Remove All mode enabled.")
@@ -387,6 +709,46 @@ def main() -> int:
         LOGGER.info("Removal complete.")
         return 0
 
+    if args.apply_plan:
+        action = resolve_action(client, stage=stage, config=config)
+        errors = plan_context_errors(saved_plan, stage, host_groups_config, action)
+        if errors:
+            LOGGER.error("Refusing to apply %s: %s", args.apply_plan, "; ".join(errors))
+            return 2
+        ioc_index = IOCIndex(Path(args.ioc_index)) if args.ioc_index else None
+        journal = SyncJournal(Path(args.journal)) if args.journal else None
+        try:
+            sync_plan = apply_saved_plan(
+                client,
+                Path(args.apply_plan),
+                retrodetects=args.retrodetects,
+                max_inflight=args.max_inflight,
+                journal=journal,
+                ioc_index=ioc_index,
+                saved=saved_plan,
+            )
+        finally:
+            if ioc_index is not None:
+                ioc_index.close()
+        if sync_plan is None:
+            return 1
+        summary_payload = build_summary_payload(
+            desired=desired,
+            stats=stats,
+            stage=stage,
+            action=saved_plan.action,
+            dry_run=False,
+            sync_plan=sync_plan,
+            prevalence_stats=dict(DEFAULT_PREVALENCE_STATS),
+            api_stats=api_stats.as_dict(),
+        )
+        if args.summary_json:
+            write_json_summary(Path(args.summary_json), summary_payload)
+        print_run_summary(
+            summary_payload, saved_plan.host_groups, saved_plan.host_group_ids
+        )
+        return 0
+
     # Resolve Host Groups if configured
     host_group_ids = []
     if host_groups_config:
@@ -396,6 +758,7 @@ def main() -> int:
             client_secret=client_secret,
             base_url=base_url,
             group_names=host_groups_config,
+            stats=api_stats,
         )
         if not host_group_ids:
             LOGGER.error(
@@ -432,31 +795,128 @@ def main() -> int:
     prevalence_stats = dict(DEFAULT_PREVALENCE_STATS)
     sync_plan = dict(DEFAULT_SYNC_PLAN)
 
+    async_client_kwargs = {
+        "client_id": client_id,
+        "client_secret": client_secret,
+        "base_url": base_url,
+        "max_connections": max(args.max_inflight, args.prevalence_workers, 1),
+        "max_retries": args.max_retries,
+        "rate": args.api_rate,
+        "stats": api_stats,
+    }
+
     if stage == "assess":
         if should_run_prevalence:
-            prevalence_stats = run_prevalence_report(
-                client=client,
-                desired=desired,
-                threshold=prevalence_threshold,
-                max_items=args.prevalence_max,
+            cache = (
+                PrevalenceCache(
+                    Path(args.prevalence_cache),
+                    ttl_hours=args.prevalence_ttl_hours,
+                    max_entries=args.prevalence_cache_size,
+                )
+                if args.prevalence_cache
+                else None
             )
+            prevalence_kwargs = {
+                "desired": desired,
+                "threshold": prevalence_threshold,
+                "max_items": args.prevalence_max,
+                "workers": args.prevalence_workers,
+                "rate": args.prevalence_rate,
+                "cache": cache,
+                "tenant": f"{base_url or 'default'}|{client_id}",
+            }
+            try:
+                if args.engine == "async":
+                    prevalence_stats = run_with_client(
+                        async_client_kwargs,
+                        run_prevalence_report_async,
+                        **prevalence_kwargs,
+                    )
+                else:
+                    prevalence_stats = run_prevalence_report(
+                        client=client, **prevalence_kwargs
+                    )
+            finally:
+                if cache is not None:
+                    cache.close()
         else:
             LOGGER.info("Assess stage selected and prevalence report skipped.")
     else:
-        if not args.dry_run and not args.confirm_write:
+        if not args.dry_run and not args.plan_out and not args.confirm_write:
             raise RuntimeError(
                 "Write stage requires --confirm-write (or run with --dry-run)."
             )
-        sync_plan = sync(
-            client=client,
-            desired=desired,
-            dry_run=args.dry_run,
-            retrodetects=args.retrodetects,
-            prune=args.prune,
-            action=action,
-            platforms=platforms,
-            host_groups=host_group_ids,
-        )
+        sync_kwargs = {
+            "desired": desired,
+            "dry_run": args.dry_run,
+            "retrodetects": args.retrodetects,
+            "prune": args.prune,
+            "action": action,
+            "platforms": platforms,
+            "host_groups": host_group_ids,
+            "max_inflight": args.max_inflight,
+        }
+        journal = None
+        if args.journal and not args.dry_run:
+            journal = SyncJournal(Path(args.journal))
+            sync_kwargs["journal"] = journal
+        if args.resume:
+            if journal is None:
+                LOGGER.error("--resume requires --journal and a non-dry-run stage.")
+                return 2
+            if args.engine == "async":
+                LOGGER.error("--resume is only supported with --engine sync.")
+                return 2
+        elif args.engine == "async" and not args.plan_out:
+            if args.incremental or args.ioc_index:
+                LOGGER.error(
+                    "--engine async does not support --incremental or --ioc-index."
+                )
+                return 2
+        ioc_index = IOCIndex(Path(args.ioc_index)) if args.ioc_index else None
+        try:
+            resumed = None
+            if args.resume:
+                resumed = resume_journal(
+                    client, journal, max_inflight=args.max_inflight
+                )
+            if resumed is not None:
+                sync_plan = resumed
+            elif args.plan_out:
+                sync_plan = plan_to_file(
+                    client,
+                    desired,
+                    Path(args.plan_out),
+                    prune=args.prune,
+                    action=action,
+                    platforms=platforms,
+                    host_groups=host_group_ids,
+                    ioc_index=ioc_index,
+                    stage=stage,
+                    host_group_names=host_groups_config,
+                )
+            elif args.engine == "async":
+                sync_plan = run_with_client(
+                    async_client_kwargs, sync_async, **sync_kwargs
+                )
+            elif args.incremental:
+                sync_plan = sync_incremental(
+                    client=client,
+                    ioc_index=ioc_index,
+                    **sync_kwargs,
+                    state_path=Path(args.state_file),
+                    full_sync_hours=args.full_sync_hours,
+                    force_full=args.full_sync,
+                )
+            else:
+                sync_plan = sync(
+                    client=client,
+                    ioc_index=ioc_index,
+                    **sync_kwargs,
+                )
+        finally:
+            if ioc_index is not None:
+                ioc_index.close()
 
     summary_payload = build_summary_payload(
         desired=desired,
@@ -466,6 +926,7 @@ def main() -> int:
         dry_run=args.dry_run,
         sync_plan=sync_plan,
         prevalence_stats=prevalence_stats,
+        api_stats=api_stats.as_dict(),
     )
 
     if args.summary_json:
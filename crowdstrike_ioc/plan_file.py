@@ -0,0 +1,246 @@
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from crowdstrike_api import IndicatorPayload, shared_tuple, tenant_fingerprint
+from feed_cache import AtomicWriter
+from reconcile import (
+    DEFAULT_MAX_INFLIGHT,
+    SyncPlan,
+    applied_counts,
+    apply_plan,
+    build_desired,
+    list_and_plan,
+)
+from source import NormalizedEntry
+
+PLAN_SCHEMA_VERSION = 2
+LIST_FIELDS = ("tags", "platforms", "host_groups")
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class SavedPlan:
+    """A sync plan read back from ``--plan-out``, ready for ``apply_saved_plan``."""
+
+    # ``tenant_fingerprint`` taken before the tenant was listed for planning
+    tenant: dict = field(default_factory=dict)
+    created_at: float = 0.0
+    prune: bool = False
+    # Rollout context the plan was made for; ``--apply`` must run under the same.
+    stage: str = ""
+    action: str = ""
+    host_groups: list[str] = field(default_factory=list)
+    plan: SyncPlan = field(default_factory=SyncPlan)
+
+    @property
+    def is_global(self) -> bool:
+        """Whether applying writes any indicator without a host-group scope.
+
+        Judged from the payloads themselves, not the header or current config.
+        """
+        payloads = self.plan.to_create + self.plan.to_update
+        if not payloads:
+            return not self.host_groups
+        return any(not payload.host_groups for payload in payloads)
+
+    @property
+    def host_group_ids(self) -> list[str]:
+        ids = set()
+        for payload in self.plan.to_create + self.plan.to_update:
+            ids.update(payload.host_groups)
+        return sorted(ids)
+
+
+def _encode_payload(payload: IndicatorPayload) -> dict:
+    return {k: v for k, v in asdict(payload).items() if v is not None}
+
+
+def _decode_payload(item: dict) -> IndicatorPayload:
+    for name in LIST_FIELDS:
+        item[name] = shared_tuple(item.get(name))
+    return IndicatorPayload(**item)
+
+
+def write_plan(
+    path: Path,
+    plan: SyncPlan,
+    tenant: dict,
+    prune: bool,
+    stage: str = "",
+    action: str = "",
+    host_groups: list[str] | None = None,
+):
+    """Write ``plan`` as JSONL: one header line, then one line per operation.
+
+    The header records the stage, action and host-group names the plan was
+    made for, so ``--apply`` can refuse to run it under a different rollout.
+
+    Lines are streamed to a temporary file and renamed into place, so a reader
+    never sees a half-written plan.
+    """
+    path = Path(path)
+    header = {
+        "event": "plan",
+        "version": PLAN_SCHEMA_VERSION,
+        "created_at": time.time(),
+        "tenant": tenant,
+        "prune": prune,
+        "stage": stage,
+        "action": action,
+        "host_groups": list(host_groups or []),
+        "unchanged": plan.unchanged,
+        "counts": plan.counts(),
+    }
+    with AtomicWriter(path, fsync=True) as out:
+
+        def put(record: dict):
+            out.write((json.dumps(record, separators=(",", ":")) + "\n").encode())
+
+        put(header)
+        for payload in plan.to_create:
+            put({"op": "create", "indicator": _encode_payload(payload)})
+        for payload in plan.to_update:
+            put(
+                {
+                    "op": "update",
+                    "indicator": _encode_payload(payload),
+                    "fields": plan.update_fields.get(payload.value) or [],
+                }
+            )
+        for key, ioc_id in plan.to_delete.items():
+            put({"op": "delete", "type": key[0], "value": key[1], "id": ioc_id})
+    LOGGER.info("Wrote sync plan (%s): %s", header["counts"], path)
+
+
+def load_plan(path: Path) -> SavedPlan:
+    """Read a plan written by ``write_plan``.
+
+    Raises ``ValueError`` for a missing header, an unsupported schema or an
+    unknown operation, since applying part of a plan is never what was approved.
+    """
+    path = Path(path)
+    saved = None
+    with path.open(encoding="utf-8") as handle:
+        for number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if saved is None:
+                if record.get("event") != "plan":
+                    raise ValueError(f"{path}: not a sync plan file")
+                if record.get("version") != PLAN_SCHEMA_VERSION:
+                    raise ValueError(f"{path}: unsupported plan schema")
+                saved = SavedPlan(
+                    tenant=record.get("tenant") or {},
+                    created_at=float(record.get("created_at") or 0),
+                    prune=bool(record.get("prune")),
+                    stage=record.get("stage") or "",
+                    action=record.get("action") or "",
+                    host_groups=list(record.get("host_groups") or []),
+                    plan=SyncPlan(unchanged=int(record.get("unchanged") or 0)),
+                )
+                continue
+            op = record.get("op")
+            plan = saved.plan
+            if op == "create":
+                plan.to_create.append(_decode_payload(record["indicator"]))
+            elif op == "update":
+                payload = _decode_payload(record["indicator"])
+                plan.to_update.append(payload)
+                plan.update_fields[payload.value] = record.get("fields") or []
+            elif op == "delete":
+                plan.to_delete[(record["type"], record["value"])] = record["id"]
+            else:
+                raise ValueError(f"{path}:{number}: unknown plan operation {op!r}")
+    if saved is None:
+        raise ValueError(f"{path}: empty plan file")
+    return saved
+
+
+def plan_context_errors(
+    saved: SavedPlan,
+    stage: str,
+    host_groups: list[str],
+    action: str | None = None,
+) -> list[str]:
+    """Reasons ``saved`` must not be applied under this stage, scope and action."""
+    errors = []
+    if saved.stage != stage:
+        errors.append(f"planned for stage {saved.stage!r}, running {stage!r}")
+    if action is not None and saved.action != action:
+        errors.append(f"planned with action {saved.action!r}, resolved {action!r}")
+    planned = sorted(x.lower() for x in saved.host_groups)
+    if planned != sorted(x.lower() for x in host_groups):
+        errors.append(
+            "planned for host groups "
+            f"{saved.host_groups or 'GLOBAL'}, running {host_groups or 'GLOBAL'}"
+        )
+    return errors
+
+
+def plan_to_file(
+    client,
+    desired: list[NormalizedEntry],
+    path: Path,
+    prune: bool,
+    action: str,
+    platforms: list,
+    host_groups: list[str] | None = None,
+    ioc_index=None,
+    stage: str = "",
+    host_group_names: list[str] | None = None,
+) -> dict:
+    """Plan a full sync without writing to the tenant and save it for ``--apply``.
+
+    The tenant fingerprint is probed before listing, so any change made while
+    or after the plan was computed shows up as stale at apply time.
+    """
+    tenant = tenant_fingerprint(client)
+    desired_by_key = build_desired(desired, action, platforms, host_groups)
+    plan, _ = list_and_plan(client, desired_by_key, prune, ioc_index)
+    write_plan(path, plan, tenant, prune, stage, action, host_group_names)
+    return plan.counts()
+
+
+def apply_saved_plan(
+    client,
+    path: Path,
+    retrodetects: bool,
+    max_inflight: int = DEFAULT_MAX_INFLIGHT,
+    journal=None,
+    ioc_index=None,
+    saved: SavedPlan | None = None,
+) -> dict | None:
+    """Execute a saved plan after a one-call staleness check instead of a relist.
+
+    ``saved`` is the already loaded plan at ``path``, if the caller checked it.
+    Returns applied counts, or ``None`` when the tenant no longer matches the
+    fingerprint recorded at planning time and the plan must be recomputed.
+    """
+    if saved is None:
+        saved = load_plan(path)
+    current = tenant_fingerprint(client)
+    if current != saved.tenant:
+        LOGGER.error(
+            "Sync plan %s is stale: tenant changed since it was planned "
+            "(planned %s, now %s). Re-run with --plan-out.",
+            path,
+            saved.tenant,
+            current,
+        )
+        return None
+    LOGGER.info(
+        "Applying sync plan %s from %s",
+        path,
+        time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(saved.created_at)),
+    )
+    outcome = apply_plan(
+        client, saved.plan, retrodetects, max_inflight=max_inflight, journal=journal
+    )
+    if ioc_index is not None:
+        ioc_index.forget(k for k in saved.plan.to_delete if k not in outcome["failed"])
+    return applied_counts(saved.plan, outcome)
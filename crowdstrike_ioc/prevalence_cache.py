@@ -0,0 +1,84 @@
+import logging
+import sqlite3
+import time
+from pathlib import Path
+
+DEFAULT_TTL_HOURS = 24
+DEFAULT_MAX_ENTRIES = 50000
+
+LOGGER = logging.getLogger(__name__)
+
+
+class PrevalenceCache:
+    """Persistent (tenant, domain) -> device count cache with TTL and LRU eviction."""
+
+    def __init__(
+        self,
+        path: Path,
+        ttl_hours: float = DEFAULT_TTL_HOURS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.path = Path(path)
+        self.ttl_seconds = float(ttl_hours) * 3600
+        self.max_entries = int(max_entries)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS prevalence ("
+            "tenant TEXT NOT NULL, domain TEXT NOT NULL, count INTEGER NOT NULL, "
+            "fetched_at REAL NOT NULL, accessed_at REAL NOT NULL, "
+            "PRIMARY KEY (tenant, domain))"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS prevalence_lru ON prevalence (accessed_at)"
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def get_many(self, tenant: str, domains: list[str]) -> dict:
+        """Return unexpired counts for ``domains`` and mark them recently used."""
+        now = time.time()
+        found = {}
+        for start in range(0, len(domains), 500):
+            chunk = domains[start : start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            rows = self.conn.execute(
+                f"SELECT domain, count FROM prevalence WHERE tenant = ? "
+                f"AND fetched_at > ? AND domain IN ({placeholders})",
+                [tenant, now - self.ttl_seconds, *chunk],
+            )
+            found.update(rows)
+        self.conn.executemany(
+            "UPDATE prevalence SET accessed_at = ? WHERE tenant = ? AND domain = ?",
+            [(now, tenant, domain) for domain in found],
+        )
+        self.conn.commit()
+        return found
+
+    def put_many(self, tenant: str, counts: dict):
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO prevalence "
+            "(tenant, domain, count, fetched_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+            [
+                (tenant, domain, int(count), now, now)
+                for domain, count in counts.items()
+            ],
+        )
+        self._evict()
+        self.conn.commit()
+
+    def _evict(self):
+        if self.max_entries <= 0:
+            return
+        total = self.conn.execute("SELECT COUNT(*) FROM prevalence").fetchone()[0]
+        excess = total - self.max_entries
+        if excess > 0:
+            self.conn.execute(
+                "DELETE FROM prevalence WHERE rowid IN ("
+                "SELECT rowid FROM prevalence ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+            LOGGER.debug("Evicted %d least recently used prevalence entries", excess)
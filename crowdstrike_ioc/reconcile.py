@@ -1,9 +1,24 @@
+import asyncio
 import datetime as dt
+import hashlib
+import itertools
+import json
 import logging
-from dataclasses import replace
+import operator
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
 
-from crowdstrike_api import iter_managed_iocs, make_indicator
+from crowdstrike_api import (
+    iter_managed_pages,
+    iter_managed_pages_async,
+    make_indicator,
+    tenant_fingerprint,
+)
 from source import NormalizedEntry
+from sync_state import SyncState, load_state, parse_state_key, save_state, state_key
 
 LOGGER = logging.getLogger(__name__)
 
@@ -17,23 +32,408 @@ COMPARE_FIELDS = [
     "platforms",
     "host_groups",
 ]
+LIST_COMPARE_FIELDS = {"tags", "platforms", "host_groups"}
+LIST_FIELD_INDEXES = [
+    i for i, x in enumerate(COMPARE_FIELDS) if x in LIST_COMPARE_FIELDS
+]
+# Few distinct values across the whole tenant; interned so a listing shares them.
+SHARED_FIELD_INDEXES = [
+    COMPARE_FIELDS.index(x) for x in ("action", "severity", "source")
+]
+DEFAULT_MAX_INFLIGHT = 4
+CANONICAL_LIST_CACHE_SIZE = 4096
+
+
+@dataclass
+class SyncPlan:
+    to_create: list = field(default_factory=list)
+    to_update: list = field(default_factory=list)
+    # key -> indicator id, in planning order
+    to_delete: dict = field(default_factory=dict)
+    unchanged: int = 0
+    # value -> changed field names, for dry-run reporting
+    update_fields: dict = field(default_factory=dict)
+
+    def counts(self) -> dict:
+        return {
+            "create": len(self.to_create),
+            "update": len(self.to_update),
+            "delete": len(self.to_delete),
+            "unchanged": self.unchanged,
+        }
 
 
 def chunked(items: list, size: int) -> list:
     return [items[i : i + size] for i in range(0, len(items), size)]
 
 
-def _field_diff(payload, existing_item: dict) -> list[str]:
-    changes = []
-    for field in COMPARE_FIELDS:
-        left = getattr(payload, field, None)
-        right = existing_item.get(field)
-        if isinstance(left, list):
-            left = sorted(str(x).lower() for x in left)
-            right = sorted(str(x).lower() for x in (right or []))
-        if left != right:
-            changes.append(field)
-    return changes
+def _lower(text: str) -> str:
+    # Values are normally lower-case already; keep the original string object.
+    lowered = text.lower()
+    return text if lowered == text else lowered
+
+
+def indicator_key(item) -> tuple[str, str]:
+    if isinstance(item, dict):
+        kind, value = str(item.get("type", "")), str(item.get("value", ""))
+    else:
+        kind, value = item.type, item.value
+    return (sys.intern(kind.lower()), _lower(value))
+
+
+_read_compare_fields = operator.attrgetter(*COMPARE_FIELDS)
+_canonical_lists: dict[tuple, tuple] = {}
+
+
+def _canonical_list(values) -> tuple:
+    key = tuple(values or ())
+    try:
+        return _canonical_lists[key]
+    except KeyError:
+        pass
+    except TypeError:
+        return tuple(sorted(str(x).lower() for x in key))
+    result = tuple(sorted(str(x).lower() for x in key))
+    if len(_canonical_lists) < CANONICAL_LIST_CACHE_SIZE:
+        _canonical_lists[key] = result
+    return result
+
+
+def canonical_fields(item) -> tuple:
+    """The compared fields of a payload or tenant item, normalized as in ``_field_diff``.
+
+    Two items with equal canonical tuples need no update, so the per-field diff
+    only runs for the few that differ. Tags, platforms and host groups repeat
+    across nearly every indicator, so their normalized form is memoized.
+    """
+    if isinstance(item, dict):
+        values = [item.get(name) for name in COMPARE_FIELDS]
+    else:
+        values = list(_read_compare_fields(item))
+    for index in LIST_FIELD_INDEXES:
+        values[index] = _canonical_list(values[index])
+    for index in SHARED_FIELD_INDEXES:
+        if isinstance(values[index], str):
+            values[index] = sys.intern(values[index])
+    return tuple(values)
+
+
+def _fields_fingerprint(fields: tuple) -> str:
+    encoded = json.dumps(fields, separators=(",", ":"), default=str)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+def compare_fingerprint(item) -> str:
+    """Digest of ``canonical_fields``, persisted in the incremental sync state."""
+    return _fields_fingerprint(canonical_fields(item))
+
+
+@dataclass(frozen=True, slots=True)
+class ExistingIndicator:
+    """What planning keeps of a tenant indicator: its id and canonical fields."""
+
+    id: str | None
+    fields: tuple
+
+
+def index_existing(items, into: dict | None = None) -> dict:
+    """Key tenant items as ``ExistingIndicator``; ``items`` may be a stream of pages.
+
+    Only the compact form is retained, so the full listing never has to be held
+    in memory at once.
+    """
+    existing_by_key = {} if into is None else into
+    for item in items:
+        existing_by_key[indicator_key(item)] = ExistingIndicator(
+            item.get("id"), canonical_fields(item)
+        )
+    return existing_by_key
+
+
+def _field_diff(fields: tuple, existing_fields: tuple) -> list[str]:
+    return [
+        name
+        for name, left, right in zip(COMPARE_FIELDS, fields, existing_fields)
+        if left != right
+    ]
+
+
+def build_desired(
+    desired: list[NormalizedEntry],
+    action: str,
+    platforms: list,
+    host_groups: list[str] | None = None,
+) -> dict:
+    payloads = (
+        make_indicator(x, action=action, platforms=platforms, host_groups=host_groups)
+        for x in desired
+    )
+    return {indicator_key(d): d for d in payloads}
+
+
+def plan_sync(desired_by_key: dict, existing_by_key: dict, prune: bool) -> SyncPlan:
+    """Diff desired payloads against ``index_existing`` output."""
+    plan = SyncPlan()
+    for key, payload in desired_by_key.items():
+        existing = existing_by_key.get(key)
+        if existing is None:
+            plan.to_create.append(payload)
+            continue
+
+        fields = canonical_fields(payload)
+        if fields == existing.fields:
+            plan.unchanged += 1
+            continue
+        plan.to_update.append(replace(payload, id=existing.id))
+        plan.update_fields[payload.value] = _field_diff(fields, existing.fields)
+
+    if prune:
+        plan.to_delete = {
+            key: existing.id
+            for key, existing in existing_by_key.items()
+            if key not in desired_by_key
+        }
+    return plan
+
+
+def _log_dry_run(plan: SyncPlan):
+    if plan.to_create:
+        LOGGER.info("Dry run: First 10 planned creates:")
+        for payload in plan.to_create[:10]:
+            LOGGER.info("  + %s", payload.value)
+    if plan.to_update:
+        LOGGER.info("Dry run: First 10 planned updates:")
+        for payload in plan.to_update[:10]:
+            fields = plan.update_fields.get(payload.value) or ["changed"]
+            LOGGER.info("  ~ %s (fields: %s)", payload.value, ", ".join(fields))
+
+
+def _response_errors(response: dict) -> list:
+    return (response.get("body") or {}).get("errors") or response.get("errors") or []
+
+
+def _batch_request(kind: str, batch: list, comment: str, retrodetects: bool):
+    """Return the service method name and kwargs that submit ``batch``."""
+    if kind == "delete":
+        return "indicator_delete", {"ids": [ioc_id for _, ioc_id in batch]}
+    kwargs = {
+        "indicators": [x.to_api() for x in batch],
+        "comment": comment,
+        "ignore_warnings": True,
+    }
+    if retrodetects:
+        kwargs["retrodetects"] = True
+    return f"indicator_{kind}", kwargs
+
+
+def _batch_outcome(kind: str, batch: list, response: dict):
+    """Split a batch response into created ids and the keys that did not apply.
+
+    Resources flagged ``message_type: error`` fail individually; when the batch
+    as a whole reports errors, anything the response does not confirm fails too.
+    """
+    created = {}
+    failed = set()
+    errors = _response_errors(response)
+    rejected = errors or int(response.get("status_code") or 200) >= 400
+    resources = (response.get("body") or {}).get("resources") or []
+    if kind == "delete":
+        if rejected:
+            LOGGER.error("Delete batch errors: %s", errors)
+            deleted = {x for x in resources if isinstance(x, str)}
+            failed.update(key for key, ioc_id in batch if ioc_id not in deleted)
+        return created, failed
+
+    confirmed = set()
+    for item in resources:
+        if not isinstance(item, dict):
+            continue
+        key = indicator_key(item)
+        if item.get("message_type") == "error":
+            LOGGER.error("%s failed for %s: %s", kind, key[1], item.get("message"))
+            failed.add(key)
+            continue
+        confirmed.add(key)
+        if kind == "create" and item.get("id"):
+            created[key] = item["id"]
+    if rejected:
+        LOGGER.error("%s batch errors: %s", kind.capitalize(), errors)
+        if batch:
+            LOGGER.error("Sample failed payload (first item): %s", batch[0].to_api())
+        failed.update(
+            indicator_key(x) for x in batch if indicator_key(x) not in confirmed
+        )
+    return created, failed
+
+
+def _batch_keys(kind: str, batch: list) -> set:
+    if kind == "delete":
+        return {key for key, _ in batch}
+    return {indicator_key(x) for x in batch}
+
+
+def _sync_comment() -> str:
+    date_text = dt.datetime.utcnow().strftime("%Y-%m-%d")
+    return f"[autormmdetect] sync_{date_text.replace('-', '')}"
+
+
+def _merge_outcomes(outcomes) -> dict:
+    created = {}
+    failed = set()
+    for batch_created, batch_failed in outcomes:
+        created.update(batch_created)
+        failed.update(batch_failed)
+    return {"created": created, "failed": failed}
+
+
+def plan_batches(plan: SyncPlan) -> list[tuple[str, list]]:
+    batches = [("create", batch) for batch in chunked(plan.to_create, 200)]
+    batches += [("update", batch) for batch in chunked(plan.to_update, 200)]
+    batches += [
+        ("delete", batch) for batch in chunked(list(plan.to_delete.items()), 500)
+    ]
+    return batches
+
+
+def applied_counts(plan: SyncPlan, outcome: dict | None) -> dict:
+    """Plan counts reduced to what the tenant actually accepted."""
+    counts = plan.counts()
+    if outcome is None:
+        return counts
+    failed = outcome["failed"]
+    counts["create"] -= sum(1 for x in plan.to_create if indicator_key(x) in failed)
+    counts["update"] -= sum(1 for x in plan.to_update if indicator_key(x) in failed)
+    counts["delete"] -= sum(1 for key in plan.to_delete if key in failed)
+    counts["failed"] = len(failed)
+    return counts
+
+
+def _submit_batches(
+    client,
+    jobs: list,
+    comment: str,
+    retrodetects: bool,
+    max_inflight: int,
+    journal=None,
+) -> dict:
+    def submit(job):
+        seq, (kind, batch) = job
+        method, kwargs = _batch_request(kind, batch, comment, retrodetects)
+        try:
+            response = getattr(client, method)(**kwargs)
+        except Exception as exc:
+            # Left without a done record, so --resume replays the whole batch.
+            LOGGER.error(
+                "%s batch %d did not complete: %s", kind.capitalize(), seq, exc
+            )
+            return {}, _batch_keys(kind, batch)
+        created, failed = _batch_outcome(kind, batch, response)
+        if journal is not None:
+            journal.record_done(seq, created, failed)
+        return created, failed
+
+    if max_inflight <= 1 or len(jobs) <= 1:
+        outcomes = [submit(job) for job in jobs]
+    else:
+        with ThreadPoolExecutor(max_workers=max_inflight) as pool:
+            outcomes = list(pool.map(submit, jobs))
+    return _merge_outcomes(outcomes)
+
+
+def apply_plan(
+    client,
+    plan: SyncPlan,
+    retrodetects: bool,
+    max_inflight: int = DEFAULT_MAX_INFLIGHT,
+    journal=None,
+) -> dict:
+    """Execute a plan; return created ids by key and the keys that failed.
+
+    Batches touch disjoint indicators, so up to ``max_inflight`` of them are
+    submitted at once. With a ``SyncJournal`` the batches are logged before the
+    first write and each completed batch is recorded as it finishes.
+    """
+    comment = _sync_comment()
+    batches = plan_batches(plan)
+    if journal is not None:
+        journal.begin(batches, comment, retrodetects, unchanged=plan.unchanged)
+    return _submit_batches(
+        client, list(enumerate(batches)), comment, retrodetects, max_inflight, journal
+    )
+
+
+async def apply_plan_async(
+    client,
+    plan: SyncPlan,
+    retrodetects: bool,
+    max_inflight: int = DEFAULT_MAX_INFLIGHT,
+    journal=None,
+) -> dict:
+    """Async counterpart of ``apply_plan`` for an ``AsyncFalconClient``."""
+    comment = _sync_comment()
+    batches = plan_batches(plan)
+    if journal is not None:
+        journal.begin(batches, comment, retrodetects, unchanged=plan.unchanged)
+    slots = asyncio.Semaphore(max(1, max_inflight))
+
+    async def submit(seq: int, kind: str, batch: list):
+        method, kwargs = _batch_request(kind, batch, comment, retrodetects)
+        try:
+            async with slots:
+                response = await getattr(client, method)(**kwargs)
+        except Exception as exc:
+            LOGGER.error(
+                "%s batch %d did not complete: %s", kind.capitalize(), seq, exc
+            )
+            return {}, _batch_keys(kind, batch)
+        created, failed = _batch_outcome(kind, batch, response)
+        if journal is not None:
+            journal.record_done(seq, created, failed)
+        return created, failed
+
+    outcomes = await asyncio.gather(
+        *(submit(seq, kind, batch) for seq, (kind, batch) in enumerate(batches))
+    )
+    return _merge_outcomes(outcomes)
+
+
+def resume_journal(
+    client, journal, max_inflight: int = DEFAULT_MAX_INFLIGHT
+) -> dict | None:
+    """Replay the batches an interrupted run never finished.
+
+    Returns counts for the whole journaled run (earlier batches included), or
+    ``None`` when there is nothing to resume.
+    """
+    run = journal.load()
+    if run is None or not run.pending:
+        LOGGER.info("Resume: no unfinished sync run in %s", journal.path)
+        return None
+    LOGGER.info(
+        "Resume: replaying %d of %d batches from %s",
+        len(run.pending),
+        len(run.batches),
+        journal.path,
+    )
+    replayed = _submit_batches(
+        client, run.pending, run.comment, run.retrodetects, max_inflight, journal
+    )
+    plan = SyncPlan(unchanged=run.unchanged)
+    for kind, batch in run.batches.values():
+        if kind == "create":
+            plan.to_create.extend(batch)
+        elif kind == "update":
+            plan.to_update.extend(batch)
+        else:
+            plan.to_delete.update(batch)
+    outcome = _merge_outcomes(
+        [(x["created"], x["failed"]) for x in run.done.values()]
+        + [(replayed["created"], replayed["failed"])]
+    )
+    counts = applied_counts(plan, outcome)
+    _log_plan(plan)
+    LOGGER.info("Resume: %d indicators still failed", counts["failed"])
+    return counts
 
 
 def sync(
@@ -45,132 +445,233 @@ def sync(
     action: str,
     platforms: list,
     host_groups: list[str] | None = None,
+    ioc_index=None,
+    max_inflight: int = DEFAULT_MAX_INFLIGHT,
+    journal=None,
 ) -> dict:
-    existing = iter_managed_iocs(client)
-    existing_by_key = {
-        (str(item.get("type", "")).lower(), str(item.get("value", "")).lower()): item
-        for item in existing
-    }
+    plan, _, outcome = _full_sync(
+        client,
+        desired_by_key=build_desired(desired, action, platforms, host_groups),
+        dry_run=dry_run,
+        retrodetects=retrodetects,
+        prune=prune,
+        ioc_index=ioc_index,
+        max_inflight=max_inflight,
+        journal=journal,
+    )
+    return applied_counts(plan, outcome)
 
-    desired_payloads = [
-        make_indicator(x, action=action, platforms=platforms, host_groups=host_groups)
-        for x in desired
-    ]
-    desired_by_key = {(d.type, d.value.lower()): d for d in desired_payloads}
 
-    to_create = []
-    to_update = []
-    unchanged = 0
-    dry_run_details = {"creates": [], "updates": []}
+def list_and_plan(client, desired_by_key: dict, prune: bool, ioc_index=None):
+    """List the managed tenant (or refresh ``ioc_index``) and diff it against desired."""
+    if ioc_index is not None:
+        existing_by_key = index_existing(ioc_index.refresh(client))
+    else:
+        pages = iter_managed_pages(client)
+        existing_by_key = index_existing(itertools.chain.from_iterable(pages))
+    plan = plan_sync(desired_by_key, existing_by_key, prune)
 
-    for key, payload in desired_by_key.items():
-        existing_item = existing_by_key.get(key)
-        if not existing_item:
-            to_create.append(payload)
-            if dry_run and len(dry_run_details["creates"]) < 10:
-                dry_run_details["creates"].append(payload.value)
-            continue
+    LOGGER.info("Managed existing IOC count: %d", len(existing_by_key))
+    _log_plan(plan)
+    return plan, existing_by_key
 
-        changes = _field_diff(payload, existing_item)
-        if changes:
-            to_update.append(replace(payload, id=existing_item["id"]))
-            if dry_run and len(dry_run_details["updates"]) < 10:
-                dry_run_details["updates"].append(
-                    {"value": payload.value, "fields": changes}
-                )
-        else:
-            unchanged += 1
 
-    to_delete = []
-    if prune:
-        desired_keys = set(desired_by_key.keys())
-        to_delete = [
-            item["id"]
-            for key, item in existing_by_key.items()
-            if key not in desired_keys
-        ]
+def _full_sync(
+    client,
+    desired_by_key: dict,
+    dry_run: bool,
+    retrodetects: bool,
+    prune: bool,
+    ioc_index=None,
+    max_inflight: int = DEFAULT_MAX_INFLIGHT,
+    journal=None,
+):
+    plan, existing_by_key = list_and_plan(client, desired_by_key, prune, ioc_index)
+    if dry_run:
+        _log_dry_run(plan)
+        return plan, existing_by_key, None
+    outcome = apply_plan(
+        client, plan, retrodetects, max_inflight=max_inflight, journal=journal
+    )
+    if ioc_index is not None:
+        # Creates and updates arrive with the next modified-since refresh.
+        ioc_index.forget(k for k in plan.to_delete if k not in outcome["failed"])
+    return plan, existing_by_key, outcome
 
-    LOGGER.info("Managed existing IOC count: %d", len(existing))
+
+async def sync_async(
+    client,
+    desired: list[NormalizedEntry],
+    dry_run: bool,
+    retrodetects: bool,
+    prune: bool,
+    action: str,
+    platforms: list,
+    host_groups: list[str] | None = None,
+    max_inflight: int = DEFAULT_MAX_INFLIGHT,
+    journal=None,
+) -> dict:
+    """Async counterpart of ``sync``: same plan, listing and batches run on asyncio."""
+    desired_by_key = build_desired(desired, action, platforms, host_groups)
+    existing_by_key = {}
+    async for page in iter_managed_pages_async(client):
+        index_existing(page, into=existing_by_key)
+    plan = plan_sync(desired_by_key, existing_by_key, prune)
+
+    LOGGER.info("Managed existing IOC count: %d", len(existing_by_key))
+    _log_plan(plan)
+    if dry_run:
+        _log_dry_run(plan)
+        return plan.counts()
+    outcome = await apply_plan_async(
+        client, plan, retrodetects, max_inflight=max_inflight, journal=journal
+    )
+    return applied_counts(plan, outcome)
+
+
+def _log_plan(plan: SyncPlan):
+    counts = plan.counts()
     LOGGER.info(
         "Plan -> create: %d, update: %d, unchanged: %d, delete: %d",
-        len(to_create),
-        len(to_update),
-        unchanged,
-        len(to_delete),
+        counts["create"],
+        counts["update"],
+        counts["unchanged"],
+        counts["delete"],
     )
 
-    if dry_run:
-        if dry_run_details["creates"]:
-            LOGGER.info("Dry run: First 10 planned creates:")
-            for val in dry_run_details["creates"]:
-                LOGGER.info("  + %s", val)
-        if dry_run_details["updates"]:
-            LOGGER.info("Dry run: First 10 planned updates:")
-            for item in dry_run_details["updates"]:
-                LOGGER.info(
-                    "  ~ %s (fields: %s)", item["value"], ", ".join(item["fields"])
-                )
-        return {
-            "create": len(to_create),
-            "update": len(to_update),
-            "delete": len(to_delete),
-            "unchanged": unchanged,
-        }
 
-    date_text = dt.datetime.utcnow().strftime("%Y-%m-%d")
-    comment = f"[autormmdetect] sync_{date_text.replace('-', '')}"
+def _state_entry(ioc_id, fingerprint: str, entry: NormalizedEntry | None) -> dict:
+    record = {"id": ioc_id, "fp": fingerprint}
+    if entry is not None:
+        record["entry"] = asdict(entry)
+    return record
 
-    for batch in chunked(to_create, 200):
-        kwargs = {
-            "indicators": [x.to_api() for x in batch],
-            "comment": comment,
-            "ignore_warnings": True,
-        }
-        if retrodetects:
-            kwargs["retrodetects"] = True
-        response = client.indicator_create(**kwargs)
-        errors = (
-            (response.get("body") or {}).get("errors") or response.get("errors") or []
+
+def _full_sync_reason(
+    client, state: SyncState | None, full_sync_hours: float, force_full: bool
+):
+    if force_full:
+        return "requested", None
+    if state is None:
+        return "no saved state", None
+    if state.full_sync_due(full_sync_hours):
+        return "scheduled", None
+    if any(not record.get("id") for record in state.entries.values()):
+        return "incomplete saved state", None
+    fingerprint = tenant_fingerprint(client)
+    if fingerprint != state.tenant:
+        return "tenant changed since last sync", fingerprint
+    return None, fingerprint
+
+
+def sync_incremental(
+    client,
+    desired: list[NormalizedEntry],
+    dry_run: bool,
+    retrodetects: bool,
+    prune: bool,
+    action: str,
+    platforms: list,
+    host_groups: list[str] | None = None,
+    state_path: Path = Path("sync_state.json"),
+    full_sync_hours: float = 24,
+    force_full: bool = False,
+    ioc_index=None,
+    max_inflight: int = DEFAULT_MAX_INFLIGHT,
+    journal=None,
+) -> dict:
+    """Apply only what changed since the last saved state.
+
+    A tenant fingerprint probe (one API call) guards against drift; a full
+    listing and diff runs when no state exists, the probe disagrees, the
+    ``full_sync_hours`` schedule is due, or ``force_full`` is set.
+    """
+    state = load_state(state_path)
+    desired_by_key = build_desired(desired, action, platforms, host_groups)
+    entries_by_key = {("domain", x.domain.lower()): x for x in desired}
+    reason, fingerprint = _full_sync_reason(client, state, full_sync_hours, force_full)
+
+    if reason:
+        LOGGER.info("Incremental sync: running full reconcile (%s)", reason)
+        plan, existing_by_key, outcome = _full_sync(
+            client,
+            desired_by_key,
+            dry_run,
+            retrodetects,
+            prune,
+            ioc_index=ioc_index,
+            max_inflight=max_inflight,
+            journal=journal,
         )
-        if errors:
-            LOGGER.error("Create batch errors: %s", errors)
-            if batch:
-                LOGGER.error(
-                    "Sample failed payload (first item): %s", batch[0].to_api()
-                )
-            resources = (response.get("body") or {}).get("resources") or []
-            if resources:
-                LOGGER.error("Detailed resources response: %s", resources)
-
-    for batch in chunked(to_update, 200):
-        kwargs = {
-            "indicators": [x.to_api() for x in batch],
-            "comment": comment,
-            "ignore_warnings": True,
+        if dry_run:
+            return plan.counts()
+        previous = {
+            key: _state_entry(item.id, _fields_fingerprint(item.fields), None)
+            for key, item in existing_by_key.items()
         }
-        if retrodetects:
-            kwargs["retrodetects"] = True
-        response = client.indicator_update(**kwargs)
-        errors = (
-            (response.get("body") or {}).get("errors") or response.get("errors") or []
+        full_sync_at = time.time()
+    else:
+        previous = {parse_state_key(k): v for k, v in state.entries.items()}
+        plan = SyncPlan()
+        for key, payload in desired_by_key.items():
+            record = previous.get(key)
+            if not record:
+                plan.to_create.append(payload)
+            elif record.get("fp") != compare_fingerprint(payload):
+                plan.to_update.append(replace(payload, id=record["id"]))
+            else:
+                plan.unchanged += 1
+        if prune:
+            plan.to_delete = {
+                key: record["id"]
+                for key, record in previous.items()
+                if key not in desired_by_key
+            }
+        LOGGER.info("Incremental sync: tenant unchanged, applying delta only")
+        _log_plan(plan)
+        if dry_run:
+            _log_dry_run(plan)
+            return plan.counts()
+        if not (plan.to_create or plan.to_update or plan.to_delete):
+            # Nothing to write; the saved state (and fingerprint) are still valid.
+            return plan.counts()
+        outcome = apply_plan(
+            client, plan, retrodetects, max_inflight=max_inflight, journal=journal
         )
-        if errors:
-            LOGGER.error("Update batch errors: %s", errors)
-
-    if to_delete:
-        for batch in chunked(to_delete, 500):
-            response = client.indicator_delete(ids=batch)
-            errors = (
-                (response.get("body") or {}).get("errors")
-                or response.get("errors")
-                or []
+        if ioc_index is not None:
+            ioc_index.forget(k for k in plan.to_delete if k not in outcome["failed"])
+        full_sync_at = state.full_sync_at
+
+    entries = dict(previous)
+    failed = outcome["failed"]
+    for payload in plan.to_create:
+        key = indicator_key(payload)
+        if key not in failed:
+            entries[key] = _state_entry(
+                outcome["created"].get(key),
+                compare_fingerprint(payload),
+                entries_by_key.get(key),
             )
-            if errors:
-                LOGGER.error("Delete batch errors: %s", errors)
-
-    return {
-        "create": len(to_create),
-        "update": len(to_update),
-        "delete": len(to_delete),
-        "unchanged": unchanged,
-    }
+    for payload in plan.to_update:
+        key = indicator_key(payload)
+        if key not in failed:
+            entries[key] = _state_entry(
+                payload.id, compare_fingerprint(payload), entries_by_key.get(key)
+            )
+    for key in plan.to_delete:
+        if key not in failed:
+            entries.pop(key, None)
+    for key, record in entries.items():
+        if key in entries_by_key and "entry" not in record:
+            record["entry"] = asdict(entries_by_key[key])
+
+    save_state(
+        state_path,
+        SyncState(
+            tenant=tenant_fingerprint(client),
+            entries={state_key(k): v for k, v in entries.items()},
+            full_sync_at=full_sync_at,
+            applied_at=time.time(),
+        ),
+    )
+    return applied_counts(plan, outcome)
@@ -1,10 +1,13 @@
+import asyncio
 import datetime as dt
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from crowdstrike_api import extract_device_count
-from source import SOURCE_STATS_KEYS, is_domain_ioc_safe
+from source import PER_SOURCE_STATS_KEYS, SOURCE_STATS_KEYS, is_domain_ioc_safe
+from throttle import RateLimiter
 
 LOGGER = logging.getLogger(__name__)
 
@@ -13,20 +16,95 @@ SUMMARY_COUNT_KEYS = ("selected", "safe", "unsafe", "priority_hits")
 SUMMARY_SYNC_PLAN_KEYS = ("create", "update", "delete", "unchanged")
 DEFAULT_PREVALENCE_STATS = {"status": "skipped"}
 DEFAULT_SYNC_PLAN = {"status": "not_applicable"}
+DEFAULT_PREVALENCE_WORKERS = 8
+DEFAULT_PREVALENCE_RATE = 20
 
 
-def run_prevalence_report(
-    client, desired: list, threshold: int, max_items: int
-) -> dict:
+def _query_device_counts(
+    client, domains: list[str], workers: int, rate: float
+) -> list[int]:
+    """Look up device counts concurrently; results keep the order of ``domains``."""
+    limiter = RateLimiter(rate=rate, burst=max(1, workers))
+
+    def lookup(domain: str) -> int:
+        limiter.acquire()
+        return extract_device_count(client.devices_count(type="domain", value=domain))
+
+    if workers <= 1 or len(domains) <= 1:
+        return [lookup(domain) for domain in domains]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lookup, domains))
+
+
+def _select_prevalence_domains(desired: list, max_items: int):
     filtered = [entry for entry in desired if is_domain_ioc_safe(entry.domain)]
     if max_items and max_items > 0:
         filtered = filtered[:max_items]
+    return filtered, list(dict.fromkeys(entry.domain for entry in filtered))
+
+
+def run_prevalence_report(
+    client,
+    desired: list,
+    threshold: int,
+    max_items: int,
+    workers: int = DEFAULT_PREVALENCE_WORKERS,
+    rate: float = DEFAULT_PREVALENCE_RATE,
+    cache=None,
+    tenant: str = "",
+) -> dict:
+    filtered, domains = _select_prevalence_domains(desired, max_items)
+    known = cache.get_many(tenant, domains) if cache is not None else {}
+    missing = [domain for domain in domains if domain not in known]
+    fetched = dict(
+        zip(missing, _query_device_counts(client, missing, workers=workers, rate=rate))
+    )
+    return _prevalence_result(filtered, threshold, known, fetched, cache, tenant)
+
+
+async def run_prevalence_report_async(
+    client,
+    desired: list,
+    threshold: int,
+    max_items: int,
+    workers: int = DEFAULT_PREVALENCE_WORKERS,
+    rate: float = DEFAULT_PREVALENCE_RATE,
+    cache=None,
+    tenant: str = "",
+) -> dict:
+    """Async counterpart of ``run_prevalence_report`` for an ``AsyncFalconClient``.
+
+    ``workers`` bounds in-flight requests rather than threads.
+    """
+    filtered, domains = _select_prevalence_domains(desired, max_items)
+    known = cache.get_many(tenant, domains) if cache is not None else {}
+    missing = [domain for domain in domains if domain not in known]
+    limiter = RateLimiter(rate=rate, burst=max(1, workers))
+    slots = asyncio.Semaphore(max(1, workers))
+
+    async def lookup(domain: str) -> int:
+        async with slots:
+            delay = limiter.reserve()
+            if delay:
+                await asyncio.sleep(delay)
+            response = await client.devices_count(type="domain", value=domain)
+        return extract_device_count(response)
+
+    counts = await asyncio.gather(*(lookup(domain) for domain in missing))
+    fetched = dict(zip(missing, counts))
+    return _prevalence_result(filtered, threshold, known, fetched, cache, tenant)
+
+
+def _prevalence_result(
+    filtered: list, threshold: int, known: dict, fetched: dict, cache, tenant: str
+) -> dict:
+    if cache is not None and fetched:
+        cache.put_many(tenant, fetched)
+    counts = [known.get(x.domain, fetched.get(x.domain, 0)) for x in filtered]
 
     domain_results = []
     tool_max = {}
-    for entry in filtered:
-        response = client.devices_count(type="domain", value=entry.domain)
-        count = extract_device_count(response)
+    for entry, count in zip(filtered, counts):
         domain_results.append(
             {"tool": entry.tool, "domain": entry.domain, "count": count}
         )
@@ -39,6 +117,8 @@ def run_prevalence_report(
 
     LOGGER.info("Prevalence report:")
     LOGGER.info("- evaluated_indicators: %d", len(domain_results))
+    if cache is not None:
+        LOGGER.info("- cache_hits: %d, cache_misses: %d", len(known), len(fetched))
     LOGGER.info("- threshold: %d", threshold)
     LOGGER.info("- high_prevalence_domains: %d", len(high_prevalence))
     LOGGER.info("- high_prevalence_tools: %d", len(high_tools))
@@ -55,12 +135,16 @@ def run_prevalence_report(
         key=lambda x: (x["count"], x["domain"]),
     )
 
-    return {
+    result = {
         "evaluated": len(domain_results),
         "high_prevalence_domains": len(high_prevalence),
         "high_prevalence_tools": high_tools,
         "low_prevalence_sample": low_prevalence[:20],
     }
+    if cache is not None:
+        result["cache_hits"] = len(known)
+        result["cache_misses"] = len(fetched)
+    return result
 
 
 def write_json_summary(output_path: Path, summary_data: dict):
@@ -79,6 +163,7 @@ def build_summary_payload(
     dry_run: bool,
     sync_plan: dict,
     prevalence_stats: dict,
+    api_stats: dict | None = None,
 ) -> dict:
     safe_count = sum(1 for x in desired if is_domain_ioc_safe(x.domain))
     return normalize_summary(
@@ -92,6 +177,7 @@ def build_summary_payload(
             "source_stats": stats,
             "sync_plan": sync_plan,
             "prevalence_stats": prevalence_stats,
+            "api_stats": api_stats,
             "stage": stage,
             "action": action,
             "dry_run": dry_run,
@@ -113,6 +199,15 @@ def normalize_summary(summary_data: dict) -> dict:
     normalized_source_stats = {
         key: _safe_int(source_stats.get(key, 0)) for key in SOURCE_STATS_KEYS
     }
+    per_source = source_stats.get("sources")
+    if isinstance(per_source, dict) and per_source:
+        normalized_source_stats["sources"] = {
+            str(name): {
+                key: _safe_int(counts.get(key, 0)) for key in PER_SOURCE_STATS_KEYS
+            }
+            for name, counts in per_source.items()
+            if isinstance(counts, dict)
+        }
 
     raw_sync_plan = data.get("sync_plan", {})
     sync_plan = raw_sync_plan if isinstance(raw_sync_plan, dict) else {}
@@ -121,6 +216,7 @@ def normalize_summary(summary_data: dict) -> dict:
         normalized_sync_plan = {
             key: _safe_int(sync_plan.get(key, 0)) for key in SUMMARY_SYNC_PLAN_KEYS
         }
+        normalized_sync_plan["failed"] = _safe_int(sync_plan.get("failed", 0))
 
     prevalence_stats = data.get("prevalence_stats")
     if not isinstance(prevalence_stats, dict):
@@ -130,7 +226,7 @@ def normalize_summary(summary_data: dict) -> dict:
     action = str(data.get("action", "unknown"))
     dry_run = bool(data.get("dry_run", False))
 
-    return {
+    normalized = {
         "summary_schema_version": SUMMARY_SCHEMA_VERSION,
         "generated_at": dt.datetime.now(dt.UTC).strftime("%Y-%m-%dT%H:%M:%SZ"),
         "counts": normalized_counts,
@@ -141,6 +237,25 @@ def normalize_summary(summary_data: dict) -> dict:
         "action": action,
         "dry_run": dry_run,
     }
+    raw_api_stats = data.get("api_stats")
+    if isinstance(raw_api_stats, dict):
+        normalized["api_stats"] = {
+            key: _safe_float(value) for key, value in raw_api_stats.items()
+        }
+    # Multi-tenant runs (--tenants) carry one result per tenant plus a failure count.
+    raw_tenants = data.get("tenants")
+    if isinstance(raw_tenants, dict):
+        normalized["tenants"] = {str(name): x for name, x in raw_tenants.items()}
+        normalized["tenants_failed"] = _safe_int(data.get("tenants_failed", 0))
+    return normalized
+
+
+def _safe_float(value, default: float = 0) -> float:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return default
+    return int(number) if number.is_integer() else number
 
 
 def _safe_int(value, default: int = 0) -> int:
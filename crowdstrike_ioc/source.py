@@ -1,13 +1,43 @@
+import codecs
+import functools
+import gzip
+import hashlib
 import json
 import logging
 import re
+import urllib.error
 import urllib.request
-from dataclasses import dataclass, field
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass, field
+
+from domain_trie import DomainTrie
+from feed_cache import FeedCache
 
 LOLRMM_URL = "https://lolrmm.io/api/rmm_tools.json"
 PLACEHOLDER_VALUES = {"", "user_managed", "unknown", "n/a", "na", "none"}
 IPV4_RE = re.compile(r"^\d{1,3}(?:\.\d{1,3}){3}$")
+JSON_WS_RE = re.compile(r"[ \t\r\n]*")
 DOMAIN_IOC_RE = re.compile(r"^(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,63}$")
+# Same steps as the string-method normalization: drop scheme, path and port, then
+# leading "*", one ".", leading "-", and trailing dots/whitespace.
+NORMALIZE_RE = re.compile(
+    r"(?:.*?://)?\s*\**\.?-*(?P<host>[^/:]*?)\.*\s*(?::[^/]*)?(?:/.*)?", re.DOTALL
+)
+CLASSIFY_RE = re.compile(
+    r"^(?:(?P<ipv4>\d{1,3}(?:\.\d{1,3}){3})"
+    r"|(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,63})$"
+)
+# Fast path for the common "host.tld" / "*.host.tld" shapes, which need no
+# normalization beyond dropping the wildcard prefix.
+CLEAN_DOMAIN_RE = re.compile(
+    r"\**\.?(?P<domain>(?P<ipv4>\d{1,3}(?:\.\d{1,3}){3})"
+    r"|(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,63})"
+)
+DOMAIN_PLACEHOLDER = "placeholder"
+DOMAIN_IPV4 = "ipv4"
+DOMAIN_UNSAFE = "unsafe"
+DOMAIN_VALID = "valid"
+NORMALIZE_CACHE_SIZE = 1 << 18
 SOURCE_STATS_KEYS = (
     "tools_total",
     "tools_excluded",
@@ -18,43 +48,262 @@ SOURCE_STATS_KEYS = (
     "skipped_ipv4",
     "skipped_excluded_domains",
     "deduped",
+    "minimized_subdomains",
 )
+# Per-feed counters reported under ``stats["sources"][name]``.
+PER_SOURCE_STATS_KEYS = ("tools_total", "tools_excluded", "raw_domains", "accepted")
+# Record key naming the feed a tool record came from (see ``feeds.iter_merged``).
+SOURCE_FIELD = "_source"
+DEFAULT_SOURCE = "lolrmm"
+# Bump when collect_domains output changes so cached results are not reused.
+COLLECT_CACHE_VERSION = 4
 
 LOGGER = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class NormalizedEntry:
     domain: str
     tool: str
     tools: list[str] = field(default_factory=list)
     description: str = ""
     priority: bool = False
+    # Feeds that contributed this domain, e.g. ("internal", "lolrmm")
+    sources: tuple[str, ...] = ()
+
+
+def _body_stream(response):
+    if (response.headers.get("Content-Encoding") or "").lower() == "gzip":
+        return gzip.GzipFile(fileobj=response)
+    return response
+
+
+def iter_json_array(stream, chunk_size: int = 1 << 16):
+    """Yield the elements of a top-level JSON array read incrementally from ``stream``.
+
+    Only the element being decoded (plus one read chunk) is held in memory.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def read_more() -> bool:
+        nonlocal buffer, pos, eof
+        if eof:
+            return False
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[pos:] + utf8.decode(chunk, final=eof)
+        pos = 0
+        return True
+
+    state = "open"
+    while True:
+        while True:
+            pos = JSON_WS_RE.match(buffer, pos).end()
+            if pos < len(buffer) or not read_more():
+                break
+        if pos >= len(buffer):
+            raise ValueError("Unexpected end of JSON feed")
+
+        char = buffer[pos]
+        if state == "open":
+            if char != "[":
+                raise ValueError("Expected the feed to be a JSON array")
+            pos += 1
+            state = "first"
+            continue
+        if char == "]" and state in ("first", "separator"):
+            return
+        if state == "separator":
+            if char != ",":
+                raise ValueError(f"Expected ',' in JSON feed, found {char!r}")
+            pos += 1
+            state = "value"
+            continue
+
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if not read_more():
+                    raise
+                continue
+            # A bare number at the buffer edge may continue in the next chunk.
+            if end == len(buffer) and not isinstance(value, (dict, list, str)):
+                if read_more():
+                    continue
+            break
+        pos = end
+        state = "separator"
+        yield value
+
 
+def refresh_feed(cache: FeedCache, max_age: int = 0, url: str = LOLRMM_URL) -> str:
+    """Bring the cached snapshot up to date and return its content digest."""
+    meta = cache.load_meta()
+    if cache.is_fresh(meta, max_age):
+        LOGGER.debug("Feed snapshot younger than %ss; skipping revalidation", max_age)
+        return meta["digest"]
 
-def fetch_lolrmm() -> list:
-    LOGGER.debug("Fetching LOLRMM feed: %s", LOLRMM_URL)
-    req = urllib.request.Request(LOLRMM_URL, headers={"User-Agent": "Mozilla/5.0"})
+    headers = {"User-Agent": "Mozilla/5.0", "Accept-Encoding": "gzip"}
+    headers.update(cache.validator_headers(meta))
+    LOGGER.debug("Revalidating LOLRMM feed: %s", url)
+    req = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=60) as response:
+            meta = cache.store_snapshot(
+                _body_stream(response),
+                url=url,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+    except urllib.error.HTTPError as exc:
+        if exc.code == 304 and meta:
+            LOGGER.info("LOLRMM feed not modified (digest %s)", meta["digest"][:12])
+            return cache.mark_checked(meta)["digest"]
+        if not meta:
+            raise
+        LOGGER.warning("Feed fetch failed (%s); using cached snapshot", exc)
+        return meta["digest"]
+    except urllib.error.URLError as exc:
+        if not meta:
+            raise
+        LOGGER.warning("Feed fetch failed (%s); using cached snapshot", exc)
+        return meta["digest"]
+
+    LOGGER.info(
+        "Fetched LOLRMM feed: %d bytes (digest %s)", meta["size"], meta["digest"][:12]
+    )
+    return meta["digest"]
+
+
+def iter_snapshot(cache: FeedCache, digest: str):
+    with cache.open_snapshot(digest) as handle:
+        yield from iter_json_array(handle)
+
+
+def iter_lolrmm(
+    cache: FeedCache | None = None, max_age: int = 0, url: str = LOLRMM_URL
+):
+    """Yield LOLRMM tool records one at a time from the cache or the network."""
+    if cache is not None:
+        yield from iter_snapshot(cache, refresh_feed(cache, max_age=max_age, url=url))
+        return
+
+    LOGGER.debug("Fetching LOLRMM feed: %s", url)
+    req = urllib.request.Request(
+        url, headers={"User-Agent": "Mozilla/5.0", "Accept-Encoding": "gzip"}
+    )
     with urllib.request.urlopen(req, timeout=60) as response:
-        return json.loads(response.read().decode("utf-8"))
+        yield from iter_json_array(_body_stream(response))
+
+
+def fetch_lolrmm(cache: FeedCache | None = None, max_age: int = 0) -> list:
+    return list(iter_lolrmm(cache=cache, max_age=max_age))
+
+
+def _collect_cache_key(config: dict, limit: int) -> str:
+    safety = config.get("safety", {})
+    rollout = config.get("rollout", {})
+    material = {
+        "version": COLLECT_CACHE_VERSION,
+        "excluded_platforms": sorted(
+            str(x) for x in safety.get("excluded_platforms", [])
+        ),
+        "excluded_domains": sorted(str(x) for x in safety.get("excluded_domains", [])),
+        "priority_platforms": sorted(
+            str(x) for x in rollout.get("priority_platforms", [])
+        ),
+        "minimize_subdomains": bool(
+            config.get("policy", {}).get("minimize_subdomains", False)
+        ),
+        "limit": limit,
+    }
+    encoded = json.dumps(material, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def load_desired(
+    config: dict,
+    limit: int = 0,
+    cache: FeedCache | None = None,
+    max_age: int = 0,
+    observe=None,
+) -> tuple[list[NormalizedEntry], dict]:
+    """Fetch and normalize the feed, reusing cached results for an unchanged feed.
+
+    When the feed is unchanged (304 or within ``max_age``) and the normalization
+    inputs match a previous run, the stored result is returned without parsing
+    the feed at all. ``observe`` wraps the record stream (e.g.
+    ``ArtifactCollector.observe``); it needs every record, so it always parses.
+    """
+    if cache is None:
+        records = iter_lolrmm()
+        if observe is not None:
+            records = observe(records)
+        return collect_domains(records, config=config, limit=limit)
+
+    digest = refresh_feed(cache, max_age=max_age)
+    key = _collect_cache_key(config, limit)
+    cached = cache.load_derived(digest, key) if observe is None else None
+    if cached:
+        LOGGER.debug("Reusing normalized domains for feed digest %s", digest[:12])
+        return entries_from_cache(cached["entries"]), cached["stats"]
+
+    records = iter_snapshot(cache, digest)
+    if observe is not None:
+        records = observe(records)
+    desired, stats = collect_domains(records, config=config, limit=limit)
+    cache.store_derived(
+        digest, key, {"entries": [asdict(x) for x in desired], "stats": stats}
+    )
+    return desired, stats
+
+
+def entries_from_cache(items: list[dict]) -> list[NormalizedEntry]:
+    entries = [NormalizedEntry(**item) for item in items]
+    for entry in entries:
+        entry.sources = tuple(entry.sources)
+    return entries
+
+
+@functools.lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def classify_domain(value: str) -> tuple[str, str]:
+    """Normalize a raw domain and classify it in one pass.
+
+    Returns ``(kind, domain)`` where kind is one of ``DOMAIN_PLACEHOLDER``,
+    ``DOMAIN_IPV4``, ``DOMAIN_UNSAFE`` or ``DOMAIN_VALID``. Memoized, so the same
+    raw value seen by several tools, feeds or stages is only parsed once.
+    """
+    lowered = value.strip().lower()
+    match = CLEAN_DOMAIN_RE.fullmatch(lowered)
+    if match is not None:
+        domain = match.group("domain")
+    else:
+        domain = NORMALIZE_RE.fullmatch(lowered).group("host")
+        if not domain or domain in PLACEHOLDER_VALUES:
+            return DOMAIN_PLACEHOLDER, domain
+        match = CLASSIFY_RE.match(domain)
+        if match is None:
+            return DOMAIN_UNSAFE, domain
+    octets = match.group("ipv4")
+    if octets is None:
+        return DOMAIN_VALID, domain
+    if all(int(part) <= 255 for part in octets.split(".")):
+        return DOMAIN_IPV4, domain
+    return DOMAIN_UNSAFE, domain
+
+
+def normalize_many(values: Iterable[str]) -> list[tuple[str, str]]:
+    """``classify_domain`` over a batch of raw values, sharing its memo."""
+    return list(map(classify_domain, values))
 
 
 def normalize_domain(value: str) -> str:
-    domain = value.strip().lower()
-    if not domain:
-        return ""
-    if "://" in domain:
-        domain = domain.split("://", 1)[1]
-    domain = domain.split("/", 1)[0].strip()
-    if ":" in domain:
-        domain = domain.split(":")[0].strip()
-    while domain.startswith("*"):
-        domain = domain[1:]
-    if domain.startswith("."):
-        domain = domain[1:]
-    if domain.startswith("-"):
-        domain = domain.lstrip("-")
-    return domain.rstrip(".")
+    return classify_domain(value)[1]
 
 
 def is_ipv4(value: str) -> bool:
@@ -64,6 +313,10 @@ def is_ipv4(value: str) -> bool:
 
 
 def is_domain_ioc_safe(value: str) -> bool:
+    kind, domain = classify_domain(value)
+    if domain == value:
+        # Already normalized: answered from the shared memo.
+        return kind == DOMAIN_VALID
     # Basic structural check (no wildcards in middle, no spaces)
     if "*" in value or " " in value:
         return False
@@ -71,9 +324,57 @@ def is_domain_ioc_safe(value: str) -> bool:
     return bool(DOMAIN_IOC_RE.match(value))
 
 
+def exclusion_rule(raw: str) -> str | None:
+    """``DomainTrie`` rule for one ``safety.excluded_domains`` entry.
+
+    The domain is normalized like a feed domain, so scheme, port and path are
+    dropped; a leading ``*.`` or ``.`` is kept for ``parse_rule`` to interpret.
+    Returns ``None`` for an entry that normalizes to nothing.
+    """
+    text = str(raw).strip().lower()
+    kind, domain = classify_domain(text)
+    if kind == DOMAIN_PLACEHOLDER or not domain:
+        return None
+    body = text.split("://", 1)[-1].lstrip()
+    for prefix in ("*.", "."):
+        if body.startswith(prefix):
+            return prefix + domain
+    return domain
+
+
+def minimize_subdomains(domain_map: dict) -> int:
+    """Fold domains covered by a parent indicator into that parent, in place.
+
+    Every entry of one run shares the same action and host-group scope, so a
+    child is redundant whenever an ancestor domain is also desired. The child's
+    tools and descriptions are merged into the topmost such ancestor. Returns
+    the number of indicators removed.
+    """
+    parents = DomainTrie(f".{domain}" for domain in domain_map)
+    merged = 0
+    for domain in list(domain_map):
+        root = parents.match(domain)[1:]
+        if root == domain:
+            continue
+        child = domain_map.pop(domain)
+        domain_map[root]["tools"].update(child["tools"])
+        domain_map[root]["descriptions"].update(child["descriptions"])
+        domain_map[root]["sources"].update(child["sources"])
+        LOGGER.debug("Minimized %s into parent indicator %s", domain, root)
+        merged += 1
+    return merged
+
+
 def collect_domains(
-    data: list, config: dict, limit: int = 0
+    data: Iterable[dict], config: dict, limit: int = 0
 ) -> tuple[list[NormalizedEntry], dict]:
+    """Normalize tool records into domain entries.
+
+    ``data`` may be any iterable (e.g. ``iter_lolrmm()`` or ``feeds.iter_merged``);
+    it is consumed once, so only the per-domain map is retained, never the whole
+    feed. Records tagged with ``SOURCE_FIELD`` are counted per feed under
+    ``stats["sources"]`` and their feed is kept in each entry's ``sources``.
+    """
     excluded_tools = {
         x.strip().lower()
         for x in config.get("safety", {}).get("excluded_platforms", [])
@@ -84,14 +385,16 @@ def collect_domains(
         for x in config.get("rollout", {}).get("priority_platforms", [])
         if str(x).strip()
     }
-    excluded_domains = {
-        normalize_domain(x)
-        for x in config.get("safety", {}).get("excluded_domains", [])
-        if str(x).strip()
-    }
+    excluded_domains = DomainTrie(
+        rule
+        for rule in map(
+            exclusion_rule, config.get("safety", {}).get("excluded_domains", [])
+        )
+        if rule
+    )
 
     stats = {
-        "tools_total": len(data),
+        "tools_total": 0,
         "tools_excluded": 0,
         "raw_domains": 0,
         "normalized_domains": 0,
@@ -100,53 +403,71 @@ def collect_domains(
         "skipped_ipv4": 0,
         "skipped_excluded_domains": 0,
         "deduped": 0,
+        "minimized_subdomains": 0,
     }
+    source_stats = {}
 
     seen_pairs = set()
     domain_map = {}
     for tool in data:
+        source_name = tool.get(SOURCE_FIELD) or DEFAULT_SOURCE
+        per_source = source_stats.get(source_name)
+        if per_source is None:
+            per_source = source_stats[source_name] = dict.fromkeys(
+                PER_SOURCE_STATS_KEYS, 0
+            )
+        stats["tools_total"] += 1
+        per_source["tools_total"] += 1
         tool_name = (tool.get("Name") or "Unknown Tool").strip()
         if tool_name.lower() in excluded_tools:
             stats["tools_excluded"] += 1
+            per_source["tools_excluded"] += 1
             continue
 
         tool_desc = (tool.get("Description") or "").strip()
         artifacts = tool.get("Artifacts") or {}
         for net in artifacts.get("Network") or []:
-            for raw_domain in net.get("Domains") or []:
-                if not isinstance(raw_domain, str):
-                    continue
-                stats["raw_domains"] += 1
-                domain = normalize_domain(raw_domain)
-                if not domain or domain in PLACEHOLDER_VALUES:
-                    stats["skipped_placeholders"] += 1
-                    continue
-                if is_ipv4(domain):
+            raw_domains = [x for x in net.get("Domains") or [] if isinstance(x, str)]
+            stats["raw_domains"] += len(raw_domains)
+            per_source["raw_domains"] += len(raw_domains)
+            for kind, domain in normalize_many(raw_domains):
+                if kind == DOMAIN_IPV4:
                     stats["skipped_ipv4"] += 1
                     continue
-
-                # Check for invalid characters or structure
-                if not is_domain_ioc_safe(domain):
-                    LOGGER.debug("Skipping unsafe/invalid domain format: %s", domain)
+                if kind != DOMAIN_VALID:
+                    if kind == DOMAIN_UNSAFE:
+                        LOGGER.debug(
+                            "Skipping unsafe/invalid domain format: %s", domain
+                        )
                     stats["skipped_placeholders"] += 1
                     continue
 
-                if domain in excluded_domains:
+                if excluded_domains and domain in excluded_domains:
                     stats["skipped_excluded_domains"] += 1
                     continue
 
                 pair_key = (domain, tool_name.lower())
                 if pair_key in seen_pairs:
                     stats["deduped"] += 1
+                    domain_map[domain]["sources"].add(source_name)
                     continue
                 seen_pairs.add(pair_key)
+                per_source["accepted"] += 1
 
                 if domain not in domain_map:
-                    domain_map[domain] = {"tools": set(), "descriptions": set()}
+                    domain_map[domain] = {
+                        "tools": set(),
+                        "descriptions": set(),
+                        "sources": set(),
+                    }
                 domain_map[domain]["tools"].add(tool_name)
+                domain_map[domain]["sources"].add(source_name)
                 if tool_desc:
                     domain_map[domain]["descriptions"].add(tool_desc)
 
+    if config.get("policy", {}).get("minimize_subdomains", False):
+        stats["minimized_subdomains"] = minimize_subdomains(domain_map)
+
     ordered_domains = sorted(
         domain_map.keys(),
         key=lambda domain: (
@@ -159,12 +480,15 @@ def collect_domains(
         ),
     )
 
+    # Nearly every entry has the same one or two feeds; share those tuples.
+    shared_sources = {}
     results = []
     for domain in ordered_domains:
         tools = sorted(domain_map[domain]["tools"], key=lambda x: x.lower())
         descriptions = sorted(
             domain_map[domain]["descriptions"], key=lambda x: x.lower()
         )
+        sources = tuple(sorted(domain_map[domain]["sources"]))
         is_priority = any(tool.lower() in priority_tools for tool in tools)
         if is_priority:
             stats["priority_domains"] += 1
@@ -177,10 +501,12 @@ def collect_domains(
                 if descriptions
                 else "Remote monitoring and management domain from LOLRMM",
                 priority=is_priority,
+                sources=shared_sources.setdefault(sources, sources),
             )
         )
 
     if limit and limit > 0:
         results = results[:limit]
     stats["normalized_domains"] = len(results)
+    stats["sources"] = source_stats
     return results, stats
@@ -0,0 +1,109 @@
+from pathlib import Path
+
+from artifacts import write_csv_if_changed
+from source import NormalizedEntry
+
+LOOKUP_FILE = "lolrmm_domains.csv"
+# ``domain`` answers exact queries; ``suffix`` (".domain") answers any subdomain,
+# so a search looks up the query itself and its parent suffixes, never a regex.
+LOOKUP_HEADER = ("domain", "suffix", "tool", "tools", "priority", "sources")
+DNS_SEARCH_FILE = "non-es-lolrrm_dns_search.spl"
+DNS_TSTATS_FILE = "es-lolrrm_dns_search.spl"
+
+# Lower-cased query without a trailing dot, then ".parent.tld" for every parent.
+_MATCH_SPL = """\
+| eval rmm_query=lower(rtrim({field}, "."))
+| eval rmm_labels=split(rmm_query, ".")
+| eval rmm_idx=mvrange(1, mvcount(rmm_labels))
+| eval rmm_suffixes=mvmap(rmm_idx, "." . mvjoin(mvindex(rmm_labels, rmm_idx, -1), "."))
+| lookup {lookup} domain AS rmm_query OUTPUT tool AS rmm_exact_tool, tools AS rmm_exact_tools, priority AS rmm_exact_priority
+| lookup {lookup} suffix AS rmm_suffixes OUTPUT tool AS rmm_suffix_tool, tools AS rmm_suffix_tools, priority AS rmm_suffix_priority
+| eval tool=coalesce(rmm_exact_tool, mvindex(rmm_suffix_tool, 0)), tools=coalesce(rmm_exact_tools, mvindex(rmm_suffix_tools, 0)), priority=coalesce(rmm_exact_priority, mvindex(rmm_suffix_priority, 0))
+| where isnotnull(tool)
+| fields - rmm_labels rmm_idx rmm_suffixes rmm_exact_* rmm_suffix_*
+"""
+
+# Splunk 8.1+ inline comment; the searches return nothing until the lookup exists.
+_REQUIRES = (
+    "```Requires the {lookup} lookup written by splunk/generate_lookup.py```\n"
+)
+
+# Collapse events to one row per distinct query first, so the two lookups run
+# once per name instead of once per event, and no term list is built.
+_DNS_SEARCH = (
+    _REQUIRES
+    + """\
+index={index} sourcetype={sourcetype} query=*
+| stats count min(_time) as firstTime max(_time) as lastTime values(src_ip) as src_ip values(dest_ip) as dest_ip values(answer) as answer values(record_type) as record_type by query
+{match}| convert ctime(firstTime) ctime(lastTime)
+| table firstTime lastTime src_ip dest_ip query answer record_type count tool tools priority
+"""
+)
+
+_DNS_TSTATS = (
+    _REQUIRES
+    + """\
+| tstats `security_content_summariesonly` count min(_time) as firstTime max(_time) as lastTime values(DNS.src) as src values(DNS.answer) as answer from datamodel=Network_Resolution where DNS.query="*.*" DNS.query!="unknown" by DNS.query
+| `drop_dm_object_name("DNS")`
+{match}| `security_content_ctime(firstTime)`
+| `security_content_ctime(lastTime)`
+| table firstTime lastTime src query answer count tool tools priority
+"""
+)
+
+
+def lookup_rows(entries: list[NormalizedEntry]):
+    for entry in entries:
+        yield (
+            entry.domain,
+            f".{entry.domain}",
+            entry.tool,
+            "; ".join(entry.tools),
+            "true" if entry.priority else "false",
+            "; ".join(entry.sources),
+        )
+
+
+def render_searches(
+    lookup: str = LOOKUP_FILE,
+    index: str = "corelight",
+    sourcetype: str = "corelight_dns_red",
+) -> dict:
+    """The generated SPL by file name; the domain list lives only in the lookup.
+
+    Both searches reduce the DNS data to one row per distinct query (``stats``
+    over the raw index, ``tstats`` over ``Network_Resolution``), then match it
+    and its parent suffixes with two plain ``lookup`` calls.
+    """
+    match = _MATCH_SPL.format(field="query", lookup=lookup)
+    return {
+        DNS_SEARCH_FILE: _DNS_SEARCH.format(
+            index=index, sourcetype=sourcetype, lookup=lookup, match=match
+        ),
+        DNS_TSTATS_FILE: _DNS_TSTATS.format(lookup=lookup, match=match),
+    }
+
+
+def write_splunk_files(
+    entries: list[NormalizedEntry],
+    lookup_dir: Path,
+    searches_dir: Path,
+    index: str = "corelight",
+    sourcetype: str = "corelight_dns_red",
+) -> dict:
+    """Write the domain lookup and the searches that use it; return ``{file: changed}``."""
+    lookup_path = Path(lookup_dir) / LOOKUP_FILE
+    changed = {
+        LOOKUP_FILE: write_csv_if_changed(
+            lookup_path, LOOKUP_HEADER, lookup_rows(entries)
+        )
+    }
+    for name, text in render_searches(LOOKUP_FILE, index, sourcetype).items():
+        path = Path(searches_dir) / name
+        if path.exists() and path.read_text(encoding="utf-8") == text:
+            changed[name] = False
+            continue
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+        changed[name] = True
+    return changed
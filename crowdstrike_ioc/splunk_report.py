@@ -0,0 +1,273 @@
+import argparse
+import csv
+import datetime as dt
+import itertools
+import logging
+import operator
+import sys
+import time
+from pathlib import Path
+
+LOGGER = logging.getLogger(__name__)
+
+# Column order of lolrmm.csv as written by es-lolrmm_network_report.spl (see demo.csv).
+REPORT_HEADER = (
+    "src",
+    "dest",
+    "app",
+    "count",
+    "firstTime",
+    "lastTime",
+    "dest_port",
+    "user",
+    "category",
+    "desc",
+    "isutility",
+    "rmm_exception",
+    "rmm_exception_end",
+    "signature",
+)
+FLOW_COLUMNS = REPORT_HEADER[:8]
+# search NOT app IN (...) in the report search; Splunk compares case-insensitively.
+EXCLUDED_APPS = frozenset(
+    (
+        "traceroute",
+        "ping",
+        "icmp",
+        "not-applicable",
+        "incomplete",
+        "netbios-ns",
+        "null",
+        "asa",
+    )
+)
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
+# ``(exception, end, active)`` for flows with no exception row.
+NO_EXCEPTION = ("", "", False)
+CHUNK_ROWS = 65536
+
+
+def load_catalog(path: Path) -> dict:
+    """``remote_access_software`` rows by ``remote_appid``.
+
+    Keys keep their case: like the Splunk lookup (case-sensitive by default),
+    ``TeamViewer`` does not match a ``teamviewer`` appid. Only utilities
+    (``isutility`` true) are kept, since the report drops the rest, and appids
+    on the excluded ``app`` list are left out so one lookup applies both filters.
+    Values are ``(category, desc, isutility, signature)``.
+    """
+    catalog = {}
+    with Path(path).open(encoding="utf-8", newline="") as handle:
+        for row in csv.DictReader(handle):
+            appid = (row.get("remote_appid") or "").strip()
+            isutility = (row.get("isutility") or "").strip()
+            if (
+                not appid
+                or isutility.lower() != "true"
+                or appid.lower() in EXCLUDED_APPS
+                or appid in catalog
+            ):
+                continue
+            catalog[appid] = (
+                row.get("category") or "",
+                row.get("comment_reference") or "",
+                isutility,
+                row.get("description") or "",
+            )
+    return catalog
+
+
+def _exception_end(row: dict, now: dt.datetime) -> str:
+    """``rmm_exception_end`` for one exception row: TRUE, FALSE, UNLIMITED or ""."""
+    ttl = (row.get("exception_ttl_days") or "").strip()
+    date = (row.get("exception_date") or "").strip()
+    if ttl and date and "false" not in ttl and "false" not in date:
+        try:
+            end = dt.datetime.strptime(date, "%Y-%m-%d") + dt.timedelta(
+                days=float(ttl)
+            )
+        except ValueError:
+            return ""
+        return "TRUE" if now >= end else "FALSE"
+    if not ttl and (row.get("exception") or "").strip().lower() == "true":
+        return "UNLIMITED"
+    return ""
+
+
+def load_exceptions(path: Path, now: dt.datetime) -> dict:
+    """Evaluate every exception once: ``{(asset, software): (exception, end, active)}``.
+
+    TTL expiry is a property of the exception, not the flow, so it is computed
+    here per exception row instead of per report row. An asset/software pair is
+    suppressed when any of its exceptions is true and unexpired or unlimited.
+    """
+    resolved = {}
+    with Path(path).open(encoding="utf-8", newline="") as handle:
+        for row in csv.DictReader(handle):
+            key = (
+                (row.get("asset") or "").strip(),
+                (row.get("software") or "").strip(),
+            )
+            exception = (row.get("exception") or "").strip()
+            if "false" in exception:
+                exception = ""
+            end = _exception_end(row, now)
+            active = exception.lower() == "true" and end in ("FALSE", "UNLIMITED")
+            previous = resolved.get(key)
+            if previous is None or (active and not previous[2]):
+                resolved[key] = (exception, end, active)
+    return resolved
+
+
+def _ctime(value: str) -> str:
+    """``convert ctime`` for tstats epoch seconds; formatted values pass through."""
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        return value or ""
+    return dt.datetime.fromtimestamp(seconds, dt.timezone.utc).strftime(TIME_FORMAT)
+
+
+def evaluate_chunk(columns: dict, catalog: dict, exceptions: dict) -> list:
+    """Report rows for one chunk of flow columns (``{name: [values]}``).
+
+    The chunk is processed a column at a time: one ``map`` joins the ``app``
+    column against the catalog, and its result masks every other column with
+    ``itertools.compress``. Exceptions are then looked up for the surviving rows
+    only. Without numpy each step still loops over values, but inside
+    ``map``/``compress``/``zip`` rather than in per-row Python code.
+    """
+    matched = list(map(catalog.get, columns["app"]))
+    meta = list(itertools.compress(matched, matched))
+    if not meta:
+        return []
+    kept = {
+        name: list(itertools.compress(columns[name], matched))
+        for name in FLOW_COLUMNS
+    }
+    signatures = list(map(operator.itemgetter(3), meta))
+    assets = [src or dest for src, dest in zip(kept["src"], kept["dest"])]
+    status = list(
+        map(exceptions.get, zip(assets, signatures), itertools.repeat(NO_EXCEPTION))
+    )
+    exception, end, active = zip(*status)
+    category, desc, isutility, _ = zip(*meta)
+    rows = zip(
+        kept["src"],
+        kept["dest"],
+        kept["app"],
+        kept["count"],
+        map(_ctime, kept["firstTime"]),
+        map(_ctime, kept["lastTime"]),
+        kept["dest_port"],
+        kept["user"],
+        category,
+        desc,
+        isutility,
+        exception,
+        end,
+        signatures,
+    )
+    return list(itertools.compress(rows, map(operator.not_, active)))
+
+
+def iter_chunks(path: Path, size: int = CHUNK_ROWS):
+    """Column dicts of up to ``size`` flow rows each."""
+    with Path(path).open(encoding="utf-8", newline="") as handle:
+        reader = csv.reader(handle)
+        header = next(reader, None)
+        if header is None:
+            return
+        positions = [header.index(x) if x in header else None for x in FLOW_COLUMNS]
+        width = len(header)
+        while True:
+            batch = list(itertools.islice(reader, size))
+            if not batch:
+                return
+            if any(len(r) < width for r in batch):
+                batch = [r + [""] * (width - len(r)) for r in batch]
+            transposed = list(zip(*batch))
+            yield {
+                name: transposed[pos] if pos is not None else ("",) * len(batch)
+                for name, pos in zip(FLOW_COLUMNS, positions)
+            }
+
+
+def build_report(
+    flows: Path,
+    catalog: Path,
+    out: Path,
+    exceptions: Path | None = None,
+    now: dt.datetime | None = None,
+    chunk_rows: int = CHUNK_ROWS,
+) -> dict:
+    """Evaluate the network report over ``flows`` and append it to ``out``.
+
+    Like ``outputlookup append=true`` the header is only written to a new file.
+    Rows are written chunk by chunk, so memory does not grow with the input.
+    """
+    started = time.perf_counter()
+    now = now or dt.datetime.now()
+    apps = load_catalog(catalog)
+    resolved = load_exceptions(exceptions, now) if exceptions else {}
+    stats = {"rows_in": 0, "rows_out": 0}
+    out = Path(out)
+    new_file = not out.exists() or out.stat().st_size == 0
+    with out.open("a", encoding="utf-8", newline="") as handle:
+        writer = csv.writer(handle)
+        if new_file:
+            writer.writerow(REPORT_HEADER)
+        for columns in iter_chunks(flows, chunk_rows):
+            rows = evaluate_chunk(columns, apps, resolved)
+            writer.writerows(rows)
+            stats["rows_in"] += len(columns["app"])
+            stats["rows_out"] += len(rows)
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = round(elapsed, 3)
+    stats["rows_per_sec"] = int(stats["rows_in"] / elapsed) if elapsed else 0
+    LOGGER.info(
+        "Report: %d of %d flows written to %s",
+        stats["rows_out"],
+        stats["rows_in"],
+        out,
+    )
+    return stats
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Evaluate es-lolrmm_network_report.spl offline over a flow CSV"
+    )
+    parser.add_argument(
+        "flows", help="Network_Traffic tstats export (src, dest, app, count, ...)"
+    )
+    parser.add_argument(
+        "--catalog",
+        required=True,
+        help="remote_access_software lookup CSV (remote_appid, isutility, ...)",
+    )
+    parser.add_argument(
+        "--exceptions",
+        help="remote_access_software_exceptions lookup CSV (asset, software, ...)",
+    )
+    parser.add_argument(
+        "--out", default="lolrmm.csv", help="Report CSV to append to (lolrmm.csv)"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    stats = build_report(
+        Path(args.flows), Path(args.catalog), Path(args.out), args.exceptions
+    )
+    print(
+        f"{stats['rows_out']} of {stats['rows_in']} flows reported "
+        f"({stats['rows_per_sec']}/s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from crowdstrike_api import IndicatorPayload
+
+JOURNAL_SCHEMA_VERSION = 1
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class JournalRun:
+    """A sync run read back from its journal."""
+
+    started_at: float = 0.0
+    comment: str = ""
+    retrodetects: bool = False
+    unchanged: int = 0
+    # seq -> (kind, batch) in the shape ``plan_batches`` produces
+    batches: dict = field(default_factory=dict)
+    # seq -> {"created": {key: id}, "failed": set(keys)}
+    done: dict = field(default_factory=dict)
+
+    @property
+    def pending(self) -> list[tuple[int, tuple[str, list]]]:
+        return [(seq, job) for seq, job in self.batches.items() if seq not in self.done]
+
+
+def _encode_batch(kind: str, batch: list) -> list:
+    if kind == "delete":
+        return [[key[0], key[1], ioc_id] for key, ioc_id in batch]
+    return [asdict(payload) for payload in batch]
+
+
+def _decode_batch(kind: str, items: list) -> list:
+    if kind == "delete":
+        return [((kind_, value), ioc_id) for kind_, value, ioc_id in items]
+    return [IndicatorPayload(**item) for item in items]
+
+
+class SyncJournal:
+    """Append-only JSONL write-ahead log of one sync run.
+
+    ``begin`` records every planned batch before anything is submitted and each
+    finished batch appends a ``done`` record with its created ids and failed keys,
+    so an interrupted run can replay exactly the batches that never completed.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def _append(self, records: list[dict], mode: str = "a"):
+        data = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open(mode, encoding="utf-8") as handle:
+                handle.write(data)
+                handle.flush()
+                os.fsync(handle.fileno())
+
+    def begin(
+        self, batches: list, comment: str, retrodetects: bool, unchanged: int = 0
+    ):
+        previous = self.load()
+        if previous is not None and previous.pending:
+            LOGGER.warning(
+                "Discarding %d unfinished batches from the previous journal %s "
+                "(use --resume to replay them instead)",
+                len(previous.pending),
+                self.path,
+            )
+        header = {
+            "event": "begin",
+            "version": JOURNAL_SCHEMA_VERSION,
+            "started_at": time.time(),
+            "comment": comment,
+            "retrodetects": retrodetects,
+            "unchanged": unchanged,
+        }
+        records = [header] + [
+            {
+                "event": "batch",
+                "seq": seq,
+                "kind": kind,
+                "items": _encode_batch(kind, b),
+            }
+            for seq, (kind, b) in enumerate(batches)
+        ]
+        self._append(records, mode="w")
+
+    def record_done(self, seq: int, created: dict, failed: set):
+        self._append(
+            [
+                {
+                    "event": "done",
+                    "seq": seq,
+                    "at": time.time(),
+                    "created": [[k[0], k[1], v] for k, v in created.items()],
+                    "failed": sorted([k[0], k[1]] for k in failed),
+                }
+            ]
+        )
+
+    def load(self) -> JournalRun | None:
+        if not self.path.exists():
+            return None
+        run = None
+        with self.path.open(encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A crash can leave a torn final line; everything before it holds.
+                    LOGGER.warning("Ignoring truncated journal record in %s", self.path)
+                    continue
+                event = record.get("event")
+                if event == "begin":
+                    if record.get("version") != JOURNAL_SCHEMA_VERSION:
+                        LOGGER.warning(
+                            "Ignoring journal with unsupported schema: %s", self.path
+                        )
+                        return None
+                    run = JournalRun(
+                        started_at=float(record.get("started_at") or 0),
+                        comment=record.get("comment") or "",
+                        retrodetects=bool(record.get("retrodetects")),
+                        unchanged=int(record.get("unchanged") or 0),
+                    )
+                elif run is None:
+                    continue
+                elif event == "batch":
+                    kind = record["kind"]
+                    run.batches[record["seq"]] = (
+                        kind,
+                        _decode_batch(kind, record["items"]),
+                    )
+                elif event == "done":
+                    run.done[record["seq"]] = {
+                        "created": {
+                            (t, v): i for t, v, i in record.get("created") or []
+                        },
+                        "failed": {(t, v) for t, v in record.get("failed") or []},
+                    }
+        return run
@@ -0,0 +1,70 @@
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from feed_cache import atomic_write
+
+STATE_SCHEMA_VERSION = 1
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class SyncState:
+    """What the tenant looked like after the last applied sync.
+
+    ``entries`` maps ``"type|value"`` to the indicator id, the compare-field
+    fingerprint and (for desired indicators) the ``NormalizedEntry`` it came from.
+    """
+
+    tenant: dict = field(default_factory=dict)
+    entries: dict = field(default_factory=dict)
+    full_sync_at: float = 0.0
+    applied_at: float = 0.0
+
+    def full_sync_due(self, interval_hours: float) -> bool:
+        if not interval_hours or interval_hours <= 0:
+            return False
+        return (time.time() - self.full_sync_at) >= interval_hours * 3600
+
+
+def state_key(key: tuple[str, str]) -> str:
+    return f"{key[0]}|{key[1]}"
+
+
+def parse_state_key(value: str) -> tuple[str, str]:
+    kind, _, indicator = value.partition("|")
+    return kind, indicator
+
+
+def load_state(path: Path) -> SyncState | None:
+    if not path.exists():
+        return None
+    try:
+        raw = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        LOGGER.warning("Ignoring unreadable sync state %s: %s", path, exc)
+        return None
+    if not isinstance(raw, dict) or raw.get("version") != STATE_SCHEMA_VERSION:
+        LOGGER.warning("Ignoring sync state with unsupported schema: %s", path)
+        return None
+    return SyncState(
+        tenant=raw.get("tenant") or {},
+        entries=raw.get("entries") or {},
+        full_sync_at=float(raw.get("full_sync_at") or 0),
+        applied_at=float(raw.get("applied_at") or 0),
+    )
+
+
+def save_state(path: Path, state: SyncState):
+    payload = {
+        "version": STATE_SCHEMA_VERSION,
+        "tenant": state.tenant,
+        "full_sync_at": state.full_sync_at,
+        "applied_at": state.applied_at,
+        "entries": state.entries,
+    }
+    atomic_write(path, json.dumps(payload, sort_keys=True).encode("utf-8"))
+    LOGGER.info("Saved sync state (%d indicators): %s", len(state.entries), path)
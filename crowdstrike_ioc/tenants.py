@@ -0,0 +1,255 @@
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from crowdstrike_api import resolve_action, resolve_host_group_ids, resolve_platforms
+from ioc_index import IOCIndex
+from reconcile import DEFAULT_MAX_INFLIGHT, sync, sync_incremental
+from reporting import (
+    DEFAULT_PREVALENCE_STATS,
+    DEFAULT_SYNC_PLAN,
+    build_summary_payload,
+    normalize_summary,
+)
+from sync_journal import SyncJournal
+from throttle import DEFAULT_MAX_RETRIES, ClientStats, RetryingClient
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover
+    yaml = None
+
+DEFAULT_TENANT_WORKERS = 4
+TENANT_NAME_RE = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class TenantSpec:
+    """One CID from the tenant manifest and the limits its sync runs under."""
+
+    name: str
+    client_id: str
+    client_secret: str
+    base_url: str | None = None
+    member_cid: str | None = None
+    # None = use ``rollout.host_groups`` from the shared config
+    host_groups: list[str] | None = None
+    max_inflight: int = DEFAULT_MAX_INFLIGHT
+    api_rate: float = 0
+    max_retries: int = DEFAULT_MAX_RETRIES
+
+    def falcon_kwargs(self) -> dict:
+        kwargs = {"client_id": self.client_id, "client_secret": self.client_secret}
+        if self.base_url:
+            kwargs["base_url"] = self.base_url
+        if self.member_cid:
+            kwargs["member_cid"] = self.member_cid
+        return kwargs
+
+
+def _credential(entry: dict, name: str, env: dict, fallback: str | None):
+    if entry.get(name):
+        return str(entry[name])
+    env_name = entry.get(f"{name}_env")
+    if env_name:
+        return env.get(env_name) or os.environ.get(env_name)
+    return fallback
+
+
+def load_tenant_manifest(path: Path, env: dict, defaults: dict) -> list[TenantSpec]:
+    """Read the tenant manifest (YAML or JSON).
+
+    Each entry under ``tenants`` needs a unique ``name``. Credentials come from
+    ``client_id``/``client_secret``, from the env vars named by
+    ``client_id_env``/``client_secret_env``, or fall back to the parent
+    credentials (the usual MSSP setup, with a ``member_cid`` per child).
+    ``defaults`` and the manifest's own ``defaults`` section supply
+    ``base_url``, ``max_inflight``, ``api_rate`` and ``max_retries``.
+    """
+    if yaml is None:
+        raise RuntimeError(
+            "PyYAML is required for the tenant manifest. Install with: uv pip install pyyaml"
+        )
+    loaded = yaml.safe_load(Path(path).read_text(encoding="utf-8")) or {}
+    entries = loaded.get("tenants") if isinstance(loaded, dict) else None
+    if not isinstance(entries, list) or not entries:
+        raise RuntimeError(f"Tenant manifest must list 'tenants': {path}")
+    shared = dict(defaults)
+    shared.update(loaded.get("defaults") or {})
+
+    specs = []
+    seen = set()
+    for entry in entries:
+        if not isinstance(entry, dict):
+            raise RuntimeError(f"Tenant manifest entries must be mappings: {path}")
+        name = str(entry.get("name") or "")
+        if not TENANT_NAME_RE.match(name) or name in seen:
+            raise RuntimeError(f"Tenant names must be unique and file-safe: {name!r}")
+        seen.add(name)
+        settings = dict(shared, **entry)
+        client_id = _credential(entry, "client_id", env, shared.get("client_id"))
+        client_secret = _credential(
+            entry, "client_secret", env, shared.get("client_secret")
+        )
+        if not client_id or not client_secret:
+            raise RuntimeError(f"Tenant '{name}' has no API credentials")
+        host_groups = entry.get("host_groups")
+        specs.append(
+            TenantSpec(
+                name=name,
+                client_id=client_id,
+                client_secret=client_secret,
+                base_url=settings.get("base_url") or None,
+                member_cid=entry.get("member_cid") or None,
+                host_groups=None if host_groups is None else list(host_groups),
+                max_inflight=int(settings.get("max_inflight") or DEFAULT_MAX_INFLIGHT),
+                api_rate=float(settings.get("api_rate") or 0),
+                max_retries=int(settings.get("max_retries", DEFAULT_MAX_RETRIES)),
+            )
+        )
+    return specs
+
+
+def tenant_path(path: str | Path | None, name: str) -> Path | None:
+    """Per-tenant variant of a path: ``sync_state.json`` -> ``sync_state.<name>.json``."""
+    if not path:
+        return None
+    path = Path(path)
+    return path.with_name(f"{path.stem}.{name}{path.suffix}")
+
+
+def sync_tenant(
+    spec: TenantSpec,
+    client,
+    desired: list,
+    stage: str,
+    config: dict,
+    options: dict,
+    stats: ClientStats | None = None,
+) -> dict:
+    """Resolve action, platforms and host groups for one tenant, then sync it.
+
+    ``options`` holds the run-wide flags: ``dry_run``, ``retrodetects``,
+    ``prune``, ``incremental``, ``state_file``, ``full_sync_hours``,
+    ``force_full``, ``journal`` and ``ioc_index`` (paths are made per-tenant).
+    """
+    group_names = spec.host_groups
+    if group_names is None:
+        group_names = config.get("rollout", {}).get("host_groups", [])
+    host_group_ids = []
+    if group_names:
+        host_group_ids = resolve_host_group_ids(
+            client_id=spec.client_id,
+            client_secret=spec.client_secret,
+            base_url=spec.base_url,
+            group_names=group_names,
+            stats=stats,
+            member_cid=spec.member_cid,
+        )
+        if not host_group_ids:
+            raise RuntimeError(
+                "Host groups configured but none resolved; refusing a global rollout"
+            )
+
+    action = resolve_action(client, stage=stage, config=config)
+    platforms = resolve_platforms(client)
+    LOGGER.info("[%s] action=%s platforms=%s", spec.name, action, platforms)
+
+    dry_run = options.get("dry_run", False)
+    journal_path = tenant_path(options.get("journal"), spec.name)
+    index_path = tenant_path(options.get("ioc_index"), spec.name)
+    sync_kwargs = {
+        "desired": desired,
+        "dry_run": dry_run,
+        "retrodetects": options.get("retrodetects", False),
+        "prune": options.get("prune", False),
+        "action": action,
+        "platforms": platforms,
+        "host_groups": host_group_ids,
+        "ioc_index": IOCIndex(index_path) if index_path else None,
+        "max_inflight": spec.max_inflight,
+        "journal": SyncJournal(journal_path) if journal_path and not dry_run else None,
+    }
+    try:
+        if options.get("incremental"):
+            counts = sync_incremental(
+                client=client,
+                **sync_kwargs,
+                state_path=tenant_path(options.get("state_file"), spec.name),
+                full_sync_hours=options.get("full_sync_hours", 24),
+                force_full=options.get("force_full", False),
+            )
+        else:
+            counts = sync(client=client, **sync_kwargs)
+    finally:
+        if sync_kwargs["ioc_index"] is not None:
+            sync_kwargs["ioc_index"].close()
+    return {"action": action, "sync_plan": counts}
+
+
+def run_tenants(
+    specs: list[TenantSpec],
+    client_factory,
+    desired: list,
+    stats: dict,
+    stage: str,
+    config: dict,
+    options: dict,
+    workers: int = DEFAULT_TENANT_WORKERS,
+) -> dict:
+    """Sync one parsed desired set into every tenant, ``workers`` tenants at a time.
+
+    ``client_factory(spec)`` returns the raw IOC service for a tenant; each one
+    gets its own ``RetryingClient`` and rate limit. A tenant that raises is
+    recorded as failed and does not stop the others. Returns the combined
+    summary: the shared source counts plus a ``tenants`` section keyed by name.
+    """
+
+    def run_one(spec: TenantSpec) -> dict:
+        api_stats = ClientStats()
+        try:
+            client = RetryingClient(
+                client_factory(spec),
+                max_retries=spec.max_retries,
+                rate=spec.api_rate,
+                stats=api_stats,
+            )
+            result = sync_tenant(
+                spec, client, desired, stage, config, options, stats=api_stats
+            )
+        except Exception as exc:
+            LOGGER.exception("[%s] tenant sync failed", spec.name)
+            return {
+                "status": "failed",
+                "error": f"{type(exc).__name__}: {exc}",
+                "sync_plan": dict(DEFAULT_SYNC_PLAN),
+                "api_stats": api_stats.as_dict(),
+            }
+        LOGGER.info("[%s] sync plan: %s", spec.name, result["sync_plan"])
+        return {
+            "status": "ok",
+            "action": result["action"],
+            "sync_plan": normalize_summary(result)["sync_plan"],
+            "api_stats": api_stats.as_dict(),
+        }
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(run_one, specs))
+
+    summary = build_summary_payload(
+        desired=desired,
+        stats=stats,
+        stage=stage,
+        action="per-tenant",
+        dry_run=options.get("dry_run", False),
+        sync_plan=dict(DEFAULT_SYNC_PLAN),
+        prevalence_stats=dict(DEFAULT_PREVALENCE_STATS),
+    )
+    summary["tenants"] = {spec.name: x for spec, x in zip(specs, results)}
+    summary["tenants_failed"] = sum(1 for x in results if x["status"] != "ok")
+    return summary
@@ -0,0 +1,2 @@
+# The in-memory tenant lives with the benchmarks, which run without the tests.
+from benchmarks.fake_falcon import FakeIOCClient  # noqa: F401
@@ -0,0 +1,104 @@
+import csv
+import gzip
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from artifact_match import ArtifactMatcher, match_exports, scan_export
+from artifacts import ARTIFACT_HEADER
+
+SHA256 = "a" * 64
+ROWS = [
+    ("AnyDesk.exe", "filename", "AnyDesk"),
+    ("rustdesk-*.exe", "filename", "RustDesk"),
+    ("*desk*.exe", "filename", "Generic Desk"),
+    (SHA256, "hash", "Atera"),
+    ("mstsc.exe", "filename", "mstsc"),
+    ("tool[1].exe", "filename", "Brackets"),
+]
+
+
+class TestArtifactMatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.artifacts = self.root / "RMM_Artifacts.csv"
+        with self.artifacts.open("w", encoding="utf-8", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(ARTIFACT_HEADER)
+            writer.writerows(ROWS)
+        events = [
+            {
+                "event_simpleName": "NetworkConnectIP4",
+                "ComputerName": "WS01",
+                "ContextBaseFileName": "ANYDESK.EXE",
+                "RemoteAddressIP4": "1.2.3.4",
+                "RemotePort": 443,
+            },
+            {
+                "event_simpleName": "ProcessRollup2",
+                "aid": "abc",
+                "ImageFileName": "\\Device\\HarddiskVolume3\\Temp\\rustdesk-1.2.exe",
+            },
+            {"ComputerName": "WS02", "FileName": "x.exe", "SHA256HashData": SHA256},
+            {"ComputerName": "WS03", "ContextBaseFileName": "mstsc.exe"},
+            {"ComputerName": "WS04", "ContextBaseFileName": "chrome.exe"},
+        ]
+        self.ndjson = self.root / "events.ndjson.gz"
+        with gzip.open(self.ndjson, "wt", encoding="utf-8") as handle:
+            handle.write("\n".join(json.dumps(x) for x in events) + "\n")
+        self.csv = self.root / "network.csv"
+        self.csv.write_text(
+            "ComputerName,ContextBaseFileName,RemoteIP,RemotePort\n"
+            "WS05,AnyDesk.exe,5.6.7.8,6568\n",
+            encoding="utf-8",
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_matcher_combines_exact_hash_and_globs(self):
+        matcher = ArtifactMatcher(ROWS, exclude_apps="mstsc")
+        self.assertEqual(matcher.match("anydesk.exe"), ("AnyDesk", "Generic Desk"))
+        self.assertEqual(matcher.match("RustDesk-x.exe"), ("Generic Desk", "RustDesk"))
+        self.assertEqual(matcher.match("x.exe", [SHA256.upper()]), ("Atera",))
+        self.assertEqual(matcher.match("tool[1].exe"), ("Brackets",))
+        self.assertEqual(matcher.match("toolx.exe"), ())
+        self.assertEqual(matcher.match("mstsc.exe"), ())
+        self.assertEqual(matcher.match(None), ())
+
+    def test_exclusion_applies_to_the_filename_not_the_tool(self):
+        rows = [("*.exe", "filename", "mstsc Bundle"), (SHA256, "hash", "Atera")]
+        matcher = ArtifactMatcher(rows, exclude_apps="mstsc|PsExec")
+        self.assertEqual(matcher.match("anydesk.exe"), ("mstsc Bundle",))
+        self.assertEqual(matcher.match("PsExec.exe", [SHA256]), ())
+        # Case-sensitive, like LogScale's regex() without the i flag.
+        self.assertEqual(matcher.match("psexec.exe"), ("mstsc Bundle",))
+        self.assertEqual(matcher.match(None, [SHA256]), ("Atera",))
+
+    def test_scan_ndjson_extracts_host_ip_port(self):
+        records, groups = scan_export(self.ndjson, ArtifactMatcher(ROWS[:1]))
+        self.assertEqual(records, 5)
+        self.assertEqual(
+            groups,
+            {"AnyDesk": [1, {"WS01"}, {"1.2.3.4"}, {"443"}, {"ANYDESK.EXE"}]},
+        )
+
+    def test_aggregates_across_processes(self):
+        paths = [self.ndjson, self.csv]
+        serial = match_exports(paths, self.artifacts)
+        parallel = match_exports(paths, self.artifacts, workers=2)
+        self.assertEqual(serial["tools"], parallel["tools"])
+        self.assertEqual(serial["stats"]["records"], 6)
+        self.assertNotIn("mstsc", serial["tools"])
+        anydesk = serial["tools"]["AnyDesk"]
+        self.assertEqual(anydesk["host_names"], ["WS01", "WS05"])
+        self.assertEqual(anydesk["remote_ips"], ["1.2.3.4", "5.6.7.8"])
+        self.assertEqual(anydesk["remote_ports"], ["443", "6568"])
+        self.assertEqual(serial["tools"]["RustDesk"]["host_names"], ["abc"])
+        self.assertEqual(serial["tools"]["Atera"]["files"], ["x.exe"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import csv
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from artifacts import (
+    DOMAIN_ARTIFACTS_CSV,
+    FILE_ARTIFACTS_CSV,
+    ArtifactCollector,
+    domain_glob,
+    is_hash,
+)
+from feeds import load_desired
+
+TOOL = {
+    "Name": "AnyDesk ",
+    "Details": {
+        "PEMetadata": [{"Filename": "AnyDesk.exe"}, "adsvc.exe"],
+        "InstallationPaths": [
+            "C:\\Program Files (x86)\\AnyDesk\\AnyDesk.exe",
+            "/opt/anydesk/*",
+            "D41D8CD98F00B204E9800998ECF8427E",
+            "user_?.exe",
+        ],
+    },
+    "Artifacts": {
+        "Network": [
+            {"Domains": ["*.AnyDesk.com", "https://boot.net.anydesk.com:443/x", "n/a"]}
+        ]
+    },
+}
+
+
+class TestArtifacts(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, name: str) -> list:
+        with (self.root / name).open(encoding="utf-8", newline="") as handle:
+            return list(csv.reader(handle))
+
+    def test_helpers(self):
+        self.assertTrue(is_hash("a" * 40))
+        self.assertFalse(is_hash("a" * 39))
+        self.assertEqual(domain_glob(" *.Vendor.com"), "*.vendor.com")
+        self.assertEqual(domain_glob("http://vendor.com/path"), "vendor.com")
+        self.assertIsNone(domain_glob("user_managed"))
+
+    def test_domain_glob_keeps_wildcards_in_place(self):
+        for raw, expected in (
+            ("relay*.Vendor.com", "relay*.vendor.com"),
+            ("vendor.*", "vendor.*"),
+            ("*vendor.com", "*vendor.com"),
+            ("https://*.vendor.com:443/path", "*.vendor.com"),
+            ("10.0.*.*", "10.0.*.*"),
+            ("tcp://1.2.3.4:5938", "1.2.3.4"),
+            ("999.1.1.1", None),
+            ("*", None),
+            ("*.*", None),
+            ("n/a", None),
+            ("bad_host*.com", None),
+        ):
+            with self.subTest(raw=raw):
+                self.assertEqual(domain_glob(raw), expected)
+
+    def test_one_pass_extracts_all_artifact_types(self):
+        collector = ArtifactCollector(self.root)
+        self.assertEqual(list(collector.observe([TOOL, TOOL])), [TOOL, TOOL])
+        self.assertEqual(
+            collector.finish(),
+            {FILE_ARTIFACTS_CSV: True, DOMAIN_ARTIFACTS_CSV: True},
+        )
+        self.assertEqual(
+            self.read(DOMAIN_ARTIFACTS_CSV),
+            [
+                ["Artifact", "Type", "Tool"],
+                ["*.anydesk.com", "domain", "AnyDesk"],
+                ["boot.net.anydesk.com", "domain", "AnyDesk"],
+            ],
+        )
+        self.assertEqual(
+            self.read(FILE_ARTIFACTS_CSV)[1:],
+            [
+                ["AnyDesk.exe", "filename", "AnyDesk"],
+                ["adsvc.exe", "filename", "AnyDesk"],
+                ["D41D8CD98F00B204E9800998ECF8427E", "hash", "AnyDesk"],
+            ],
+        )
+
+    def test_unchanged_lookup_is_not_rewritten(self):
+        def run():
+            collector = ArtifactCollector(self.root)
+            collector.add(TOOL)
+            return collector.finish()
+
+        run()
+        path = self.root / FILE_ARTIFACTS_CSV
+        before = path.stat().st_mtime_ns
+        self.assertEqual(set(run().values()), {False})
+        self.assertEqual(path.stat().st_mtime_ns, before)
+        self.assertEqual(
+            {p.name for p in self.root.iterdir()},
+            {DOMAIN_ARTIFACTS_CSV, FILE_ARTIFACTS_CSV},
+        )
+
+    def test_observe_shares_the_sync_parse(self):
+        feed = self.root / "feed.json"
+        feed.write_text(json.dumps([TOOL]), encoding="utf-8")
+        collector = ArtifactCollector(self.root)
+        desired, _ = load_desired(
+            {"sources": {"lolrmm": False}},
+            extra=[str(feed)],
+            observe=collector.observe,
+        )
+        self.assertEqual(
+            [x.domain for x in desired], ["anydesk.com", "boot.net.anydesk.com"]
+        )
+        self.assertEqual(collector.domains.count, 2)
+        self.assertEqual(collector.files.count, 3)
+        collector.discard()
+        self.assertEqual([p.name for p in self.root.iterdir()], ["feed.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
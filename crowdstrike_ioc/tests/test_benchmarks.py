@@ -0,0 +1,32 @@
+import unittest
+
+from benchmarks.feed import iter_feed
+from benchmarks.run import SCENARIOS, BenchParams, compare, run_scenarios
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_feed_is_deterministic(self):
+        self.assertEqual(list(iter_feed(20, seed=3)), list(iter_feed(20, seed=3)))
+        self.assertNotEqual(list(iter_feed(20, seed=3)), list(iter_feed(20, seed=4)))
+
+    def test_scenarios_run_with_injected_errors(self):
+        report = run_scenarios(BenchParams(tools=60, repeat=1, error_rate=0.2))
+        self.assertEqual(set(report["results"]), set(SCENARIOS))
+        for result in report["results"].values():
+            self.assertGreater(result["items"], 0)
+
+    def test_memory_records_peak(self):
+        params = BenchParams(tools=20, repeat=1)
+        report = run_scenarios(params, ["sync_plan"], memory=True)
+        self.assertGreater(report["results"]["sync_plan"]["peak_bytes"], 0)
+
+    def test_compare_flags_regressions(self):
+        current = {"results": {"a": {"seconds": 1.5}, "b": {"seconds": 1.0}}}
+        baseline = {"results": {"a": {"seconds": 1.0}, "b": {"seconds": 1.0}}}
+        rows = {row["scenario"]: row for row in compare(current, baseline, 0.2)}
+        self.assertTrue(rows["a"]["regressed"])
+        self.assertFalse(rows["b"]["regressed"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+
+from domain_trie import BELOW, EXACT, SUBTREE, DomainTrie, parse_rule
+
+
+class TestDomainTrie(unittest.TestCase):
+    def test_rule_forms(self):
+        trie = DomainTrie(["exact.com", "*.wild.com", ".tree.com", "*.tree.com"])
+        self.assertEqual(len(trie), 3)
+        self.assertIn("exact.com", trie)
+        self.assertNotIn("a.exact.com", trie)
+        self.assertNotIn("wild.com", trie)
+        self.assertEqual(trie.match("a.b.wild.com"), "*.wild.com")
+        self.assertEqual(trie.match("tree.com"), ".tree.com")
+        self.assertEqual(trie.match("x.tree.com"), ".tree.com")
+        self.assertNotIn("othertree.com", trie)
+        self.assertNotIn("com", trie)
+
+    def test_mixed_rules_on_one_node(self):
+        trie = DomainTrie(["*.vendor.com", "Vendor.com."])
+        self.assertEqual(trie.match("vendor.com"), "Vendor.com.")
+        self.assertEqual(trie.match("api.vendor.com"), "*.vendor.com")
+        self.assertFalse(DomainTrie([""]))
+
+    def test_parse_rule_kinds(self):
+        self.assertEqual(parse_rule(" Vendor.com. "), ("vendor.com", EXACT))
+        self.assertEqual(parse_rule("*.vendor.com"), ("vendor.com", BELOW))
+        self.assertEqual(parse_rule(".vendor.com"), ("vendor.com", SUBTREE))
+
+
+if __name__ == "__main__":
+    unittest.main()
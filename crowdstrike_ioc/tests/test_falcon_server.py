@@ -0,0 +1,108 @@
+import asyncio
+import json
+import time
+import unittest
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from async_falcon import AsyncFalconClient, run_with_client
+from benchmarks.falcon_server import ServerProfile, make_server, serve_in_thread
+from reconcile import sync_async
+from source import NormalizedEntry
+
+
+class TestFalconServer(unittest.TestCase):
+    def start(self, **profile):
+        self.server = make_server(ServerProfile(**profile))
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = serve_in_thread(self.server)
+        return self.server.state
+
+    def call(self, method: str, path: str, token: str | None = None, data=None):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        request = urllib.request.Request(
+            self.base_url + path, data=data, method=method, headers=headers
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, dict(response.headers), json.load(response)
+        except urllib.error.HTTPError as exc:
+            return exc.code, dict(exc.headers), json.load(exc)
+
+    def token(self) -> str:
+        form = urllib.parse.urlencode({"client_id": "a", "client_secret": "b"})
+        status, _, body = self.call("POST", "/oauth2/token", data=form.encode())
+        self.assertEqual(status, 201)
+        return body["access_token"]
+
+    def test_auth_catalog_and_host_groups(self):
+        self.start(host_groups=["Purple Team Exercise Hosts", "Servers"])
+        self.assertEqual(self.call("GET", "/iocs/queries/actions/v1")[0], 401)
+        token = self.token()
+        _, _, actions = self.call("GET", "/iocs/queries/actions/v1", token)
+        self.assertIn("no_action", actions["resources"])
+        query = urllib.parse.urlencode({"filter": "name:*'purple team*'"})
+        _, _, groups = self.call(
+            "GET", f"/devices/combined/host-groups/v1?{query}", token
+        )
+        self.assertEqual(
+            [g["name"] for g in groups["resources"]], ["Purple Team Exercise Hosts"]
+        )
+
+    def test_rate_limit_headers_and_429(self):
+        self.start(rate_limit=2)
+        token = self.token()
+        status, headers, _ = self.call("GET", "/iocs/queries/platforms/v1", token)
+        self.assertEqual((status, headers["X-RateLimit-Remaining"]), (200, "1"))
+        self.call("GET", "/iocs/queries/platforms/v1", token)
+        status, headers, _ = self.call("GET", "/iocs/queries/platforms/v1", token)
+        self.assertEqual(status, 429)
+        self.assertIn("Retry-After", headers)
+
+    def test_partial_create_errors_are_reported_per_indicator(self):
+        state = self.start(partial_error_rate=0.3, seed=5)
+        state.seed_indicators(4)
+        desired = [
+            NormalizedEntry(domain=f"d{i}.example.com", tool="T") for i in range(40)
+        ]
+        counts = run_with_client(
+            {"client_id": "a", "client_secret": "b", "base_url": self.base_url},
+            sync_async,
+            desired=desired,
+            dry_run=False,
+            retrodetects=False,
+            prune=True,
+            action="detect",
+            platforms=["windows"],
+        )
+        self.assertGreater(counts["failed"], 0)
+        self.assertEqual(counts["create"] + counts["failed"], 40)
+        self.assertEqual(counts["delete"], 4)
+        self.assertEqual(len(state.store.indicators), counts["create"])
+        _, _, stats = self.call("GET", "/_stats")
+        self.assertEqual(stats["calls"]["POST /iocs/entities/indicators/v1"], 1)
+
+    def test_expired_tokens_are_rejected_and_refreshed(self):
+        state = self.start(token_ttl=0.2)
+        token = self.token()
+        self.assertEqual(self.call("GET", "/iocs/queries/actions/v1", token)[0], 200)
+        time.sleep(0.3)
+        self.assertEqual(self.call("GET", "/iocs/queries/actions/v1", token)[0], 401)
+
+        async def twice(client: AsyncFalconClient):
+            first = await client.action_query()
+            await asyncio.sleep(0.3)
+            second = await client.action_query()
+            return first["status_code"], second["status_code"]
+
+        statuses = run_with_client(
+            {"client_id": "a", "client_secret": "b", "base_url": self.base_url}, twice
+        )
+        self.assertEqual(statuses, (200, 200))
+        self.assertEqual(len(state.tokens), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import gzip
+import io
+import json
+import tempfile
+import unittest
+import urllib.error
+from pathlib import Path
+from unittest.mock import patch
+
+from feed_cache import FeedCache, atomic_write
+from source import load_desired, refresh_feed
+
+FEED = [
+    {
+        "Name": "ToolA",
+        "Description": "desc",
+        "Artifacts": {"Network": [{"Domains": ["a.example.com"]}]},
+    }
+]
+
+
+class FakeResponse:
+    def __init__(self, body: bytes, headers: dict):
+        self._body = io.BytesIO(body)
+        self.headers = headers
+
+    def read(self, size=-1):
+        return self._body.read(size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def not_modified(req, timeout=None):
+    raise urllib.error.HTTPError(req.full_url, 304, "Not Modified", {}, None)
+
+
+class TestFeedCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = FeedCache(Path(self.tmp.name))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    @patch("source.urllib.request.urlopen")
+    def test_gzip_response_is_stored_decompressed(self, mock_open):
+        raw = json.dumps(FEED).encode("utf-8")
+        mock_open.return_value = FakeResponse(
+            gzip.compress(raw), {"Content-Encoding": "gzip", "ETag": '"v1"'}
+        )
+        digest = refresh_feed(self.cache)
+        self.assertEqual(self.cache.read_snapshot(digest), raw)
+        self.assertEqual(self.cache.load_meta()["etag"], '"v1"')
+        req = mock_open.call_args[0][0]
+        self.assertEqual(req.get_header("Accept-encoding"), "gzip")
+
+    @patch("source.urllib.request.urlopen")
+    def test_not_modified_sends_validators_and_reuses_snapshot(self, mock_open):
+        raw = json.dumps(FEED).encode("utf-8")
+        mock_open.return_value = FakeResponse(raw, {"ETag": '"v1"'})
+        first = refresh_feed(self.cache)
+
+        mock_open.side_effect = not_modified
+        second = refresh_feed(self.cache)
+        self.assertEqual(first, second)
+        req = mock_open.call_args[0][0]
+        self.assertEqual(req.get_header("If-none-match"), '"v1"')
+
+    @patch("source.urllib.request.urlopen")
+    def test_fresh_snapshot_skips_network(self, mock_open):
+        mock_open.return_value = FakeResponse(json.dumps(FEED).encode("utf-8"), {})
+        refresh_feed(self.cache)
+        refresh_feed(self.cache, max_age=3600)
+        self.assertEqual(mock_open.call_count, 1)
+
+    @patch("source.urllib.request.urlopen")
+    def test_load_desired_skips_parse_when_unchanged(self, mock_open):
+        mock_open.return_value = FakeResponse(json.dumps(FEED).encode("utf-8"), {})
+        desired, stats = load_desired({}, cache=self.cache)
+        self.assertEqual([x.domain for x in desired], ["a.example.com"])
+
+        mock_open.side_effect = not_modified
+        with patch.object(self.cache, "open_snapshot") as mock_read:
+            cached, cached_stats = load_desired({}, cache=self.cache)
+        mock_read.assert_not_called()
+        self.assertEqual(cached, desired)
+        self.assertEqual(cached_stats, stats)
+
+    def test_interrupted_download_leaves_no_staging_file(self):
+        class Broken(io.BytesIO):
+            def read(self, size=-1):
+                raise ConnectionResetError("reset mid-body")
+
+        with self.assertRaises(ConnectionResetError):
+            self.cache.store_snapshot(Broken(), "https://x", None, None)
+        self.assertEqual(list((Path(self.tmp.name) / "snapshots").iterdir()), [])
+        meta = self.cache.store_snapshot(io.BytesIO(b"[]"), "https://x", None, None)
+        self.assertEqual(self.cache.read_snapshot(meta["digest"]), b"[]")
+
+    def test_prune_leaves_caches_with_a_longer_name_alone(self):
+        mirror = FeedCache(Path(self.tmp.name), name="lolrmm-mirror")
+        kept = mirror.store_snapshot(io.BytesIO(b"[1]"), "https://m", None, None)
+        for body in (b"[2]", b"[3]", b"[4]", b"[5]"):
+            self.cache.store_snapshot(io.BytesIO(body), "https://x", None, None)
+        self.assertEqual(mirror.read_snapshot(kept["digest"]), b"[1]")
+
+    def test_failed_atomic_write_leaves_no_temporary_file(self):
+        target = Path(self.tmp.name) / "meta.json"
+        target.mkdir()  # os.replace cannot put a file over a directory
+        with self.assertRaises(OSError):
+            atomic_write(target, b"{}")
+        self.assertEqual([x.name for x in Path(self.tmp.name).iterdir()], ["meta.json"])
+        with self.assertRaises(TypeError):
+            atomic_write(Path(self.tmp.name) / "other.json", "not bytes")
+        self.assertEqual([x.name for x in Path(self.tmp.name).iterdir()], ["meta.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
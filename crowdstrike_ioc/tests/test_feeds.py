@@ -0,0 +1,115 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from feed_cache import FeedCache
+from feeds import FeedSource, FileSource, build_sources, iter_merged, load_desired
+from source import collect_domains
+
+CONFIG = {"sources": {"lolrmm": False}}
+
+
+class BrokenSource(FeedSource):
+    def iter_records(self):
+        yield {"Name": "X", "Artifacts": {"Network": [{"Domains": ["x.example"]}]}}
+        raise ConnectionError("feed down")
+
+
+class TestFeeds(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.lolrmm = self.root / "lolrmm.json"
+        self.lolrmm.write_text(
+            json.dumps(
+                [
+                    {
+                        "Name": "AnyDesk",
+                        "Description": "Remote desktop",
+                        "Artifacts": {"Network": [{"Domains": ["*.anydesk.com"]}]},
+                    }
+                ]
+            ),
+            encoding="utf-8",
+        )
+        self.csv = self.root / "internal.csv"
+        self.csv.write_text(
+            "Domain,Tool\nanydesk.com,AnyDesk\nrmm.internal.example.com,\n",
+            encoding="utf-8",
+        )
+        self.yaml = self.root / "customer.yaml"
+        self.yaml.write_text(
+            "CustomTool:\n  - custom-rmm.example.net\n", encoding="utf-8"
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def sources(self):
+        return build_sources(
+            CONFIG, extra=[str(self.lolrmm), str(self.csv), str(self.yaml)]
+        )
+
+    def test_merge_keeps_provenance_and_per_source_stats(self):
+        desired, stats = collect_domains(iter_merged(self.sources()), config={})
+        by_domain = {x.domain: x for x in desired}
+        self.assertEqual(by_domain["anydesk.com"].sources, ("internal", "lolrmm"))
+        self.assertEqual(by_domain["anydesk.com"].tools, ["AnyDesk"])
+        self.assertEqual(by_domain["rmm.internal.example.com"].tools, ["internal"])
+        self.assertEqual(by_domain["custom-rmm.example.net"].sources, ("customer",))
+        self.assertEqual(stats["tools_total"], 4)
+        self.assertEqual(stats["deduped"], 1)
+        self.assertEqual(
+            stats["sources"]["internal"],
+            {"tools_total": 2, "tools_excluded": 0, "raw_domains": 2, "accepted": 1},
+        )
+
+    def test_failed_source_stops_merge_unless_optional(self):
+        good = FileSource("customer", self.yaml)
+        with self.assertRaises(RuntimeError):
+            list(iter_merged([good, BrokenSource("broken")]))
+        records = list(iter_merged([good, BrokenSource("broken", optional=True)]))
+        self.assertEqual({x["_source"] for x in records}, {"customer", "broken"})
+
+    def test_derived_result_reused_while_files_are_unchanged(self):
+        cache = FeedCache(self.root / "cache")
+        extra = [str(self.csv), str(self.yaml)]
+        first = load_desired(CONFIG, cache=cache, extra=extra)
+        with patch("feeds.collect_domains") as collect:
+            second = load_desired(CONFIG, cache=cache, extra=extra)
+        collect.assert_not_called()
+        self.assertEqual(first, second)
+
+        self.yaml.write_text("Other:\n  - other.example.org\n", encoding="utf-8")
+        desired, _ = load_desired(CONFIG, cache=cache, extra=extra)
+        self.assertIn("other.example.org", {x.domain for x in desired})
+
+    def test_missing_optional_source_is_skipped_with_a_cache(self):
+        cache = FeedCache(self.root / "cache")
+        missing = {"path": str(self.root / "gone.csv"), "optional": True}
+        desired, _ = load_desired(CONFIG, cache=cache, extra=[str(self.yaml), missing])
+        self.assertEqual([x.domain for x in desired], ["custom-rmm.example.net"])
+        with self.assertRaises(RuntimeError):
+            load_desired(CONFIG, cache=cache, extra=[str(self.root / "gone.csv")])
+
+    def test_url_sources_keep_separate_cache_directories(self):
+        cache = FeedCache(self.root / "cache")
+        sources = build_sources(
+            {},
+            extra=[
+                {"url": "https://mirror.example/lolrmm.json", "name": "lolrmm"},
+                {"url": "https://mirror.example/x.json", "name": "lolrmm-mirror"},
+            ],
+            cache=cache,
+        )
+        roots = [x.cache.root.relative_to(cache.root) for x in sources]
+        self.assertEqual(
+            [str(x) for x in roots],
+            [".", "sources/lolrmm-2", "sources/lolrmm-mirror"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import gzip
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from hunt import SuffixMatcher, hunt, hunt_table, scan_file
+from source import NormalizedEntry
+
+TABLE = {"anydesk.com": "AnyDesk", "zohoassist.jp": "Zoho Assist"}
+
+ZEEK_TSV = (
+    "#separator \\x09\n"
+    "#fields\tts\tuid\tid.orig_h\tid.orig_p\tid.resp_h\tquery\tanswers\n"
+    "#types\ttime\tstring\taddr\tport\taddr\tstring\tvector[string]\n"
+    "1.0\tC1\t10.0.0.5\t5353\t10.0.0.1\trelay-1.net.AnyDesk.com.\t1.2.3.4\n"
+    "2.0\tC2\t10.0.0.6\t5353\t10.0.0.1\texample.org\t-\n"
+    "3.0\tC3\t10.0.0.6\t5353\t10.0.0.1\tanydesk.com\t-\n"
+    "#close\t2024-01-01-00-00-00\n"
+)
+
+
+class TestHunt(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.zeek = self.root / "dns.log.gz"
+        with gzip.open(self.zeek, "wt", encoding="utf-8") as handle:
+            handle.write(ZEEK_TSV)
+        self.zeek_json = self.root / "dns.json"
+        self.zeek_json.write_text(
+            json.dumps({"id.orig_h": "10.0.0.7", "query": "zohoassist.jp"})
+            + "\n\n"
+            + json.dumps({"id.orig_h": "10.0.0.7", "query": "notzohoassist.jp"})
+            + "\n",
+            encoding="utf-8",
+        )
+        self.falcon = self.root / "DnsRequest.ndjson"
+        self.falcon.write_text(
+            "\n".join(
+                json.dumps(x)
+                for x in [
+                    {
+                        "event_simpleName": "DnsRequest",
+                        "aid": "abc",
+                        "ComputerName": "WS01",
+                        "DomainName": "boot.anydesk.com",
+                    },
+                    {"aid": "def", "DomainName": "anydesk.com.evil.net"},
+                ]
+            ),
+            encoding="utf-8",
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_matcher_covers_domain_and_subdomains_only(self):
+        matcher = SuffixMatcher.from_entries([NormalizedEntry("anydesk.com", "A")])
+        self.assertEqual(matcher.match(b"anydesk.com"), (0,))
+        self.assertEqual(matcher.match(b"X.AnyDesk.com."), (0,))
+        self.assertIsNone(matcher.match(b"myanydesk.com"))
+        self.assertIsNone(matcher.match(b"com"))
+        self.assertIsNone(matcher.match(b""))
+
+    def test_scan_zeek_tsv_gzip(self):
+        records, matched, groups = scan_file(self.zeek, SuffixMatcher(TABLE))
+        self.assertEqual((records, matched), (3, 2))
+        self.assertEqual(
+            groups,
+            {
+                0: [
+                    2,
+                    {b"relay-1.net.anydesk.com", b"anydesk.com"},
+                    {b"10.0.0.5", b"10.0.0.6"},
+                ]
+            },
+        )
+
+    def test_hunt_aggregates_per_tool_across_processes(self):
+        paths = [self.zeek, self.zeek_json, self.falcon]
+        serial = hunt(paths, TABLE, workers=1)
+        parallel = hunt(paths, TABLE, workers=2)
+        self.assertEqual(serial["tools"], parallel["tools"])
+        self.assertEqual(serial["stats"]["records"], 7)
+        self.assertEqual(serial["stats"]["matched"], 4)
+        anydesk = serial["tools"]["AnyDesk"]
+        self.assertEqual(anydesk["hosts"], 3)
+        self.assertEqual(anydesk["host_names"], ["10.0.0.5", "10.0.0.6", "WS01"])
+        self.assertEqual(
+            anydesk["domains"],
+            ["anydesk.com", "boot.anydesk.com", "relay-1.net.anydesk.com"],
+        )
+        self.assertEqual(serial["tools"]["Zoho Assist"]["events"], 1)
+
+    def test_shared_domain_counts_for_every_tool(self):
+        table = hunt_table(
+            [
+                NormalizedEntry("anydesk.com", "AnyDesk", ["AnyDesk", "Rebrand"]),
+                NormalizedEntry("zohoassist.jp", "Zoho Assist"),
+            ]
+        )
+        result = hunt([self.zeek, self.falcon], table)
+        self.assertEqual(result["stats"]["matched"], 3)
+        for tool in ("AnyDesk", "Rebrand"):
+            self.assertEqual(result["tools"][tool]["events"], 3)
+            self.assertEqual(result["tools"][tool]["hosts"], 3)
+        self.assertNotIn("Zoho Assist", result["tools"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from ioc_index import IOCIndex
+from reconcile import sync
+from source import NormalizedEntry
+from tests.fakes import FakeIOCClient
+
+
+class TestIOCIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index = IOCIndex(Path(self.tmp.name) / "iocs.sqlite")
+        self.client = FakeIOCClient(page_size=2)
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp.cleanup()
+
+    def run_sync(self, domains):
+        return sync(
+            client=self.client,
+            desired=[NormalizedEntry(domain=d, tool="T") for d in domains],
+            dry_run=False,
+            retrodetects=False,
+            prune=True,
+            action="detect",
+            platforms=["windows"],
+            ioc_index=self.index,
+        )
+
+    def test_refresh_fetches_only_modified(self):
+        self.run_sync(["a.example.com", "b.example.com", "c.example.com"])
+        self.client.calls.clear()
+        result = self.run_sync(["a.example.com", "b.example.com", "c.example.com"])
+        self.assertEqual(result["unchanged"], 3)
+        # One modified-since page plus the count probe, not a full paged listing.
+        self.assertEqual(self.client.calls, ["indicator_combined"] * 2)
+
+        item = self.index.items()[0]
+        self.assertIsInstance(item["platforms"], list)
+        self.assertIs(item["applied_globally"], True)
+
+    def test_external_delete_triggers_relist(self):
+        self.run_sync(["a.example.com", "b.example.com"])
+        self.client.indicators.pop(next(iter(self.client.indicators)))
+        result = self.run_sync(["a.example.com", "b.example.com"])
+        self.assertEqual(result["create"], 1)
+        self.assertEqual(self.index.count(), 1)
+        self.assertEqual(
+            self.run_sync(["a.example.com", "b.example.com"])["unchanged"], 2
+        )
+
+    def test_prune_forgets_deleted(self):
+        self.run_sync(["a.example.com", "b.example.com"])
+        self.run_sync(["a.example.com"])
+        values = sorted(x["value"] for x in self.index.refresh(self.client))
+        self.assertEqual(values, ["a.example.com"])
+
+
+if __name__ == "__main__":
+    unittest.main()
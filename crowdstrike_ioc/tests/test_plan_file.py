@@ -0,0 +1,115 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from plan_file import apply_saved_plan, load_plan, plan_context_errors, plan_to_file
+from reconcile import sync
+from source import NormalizedEntry
+from tests.fakes import FakeIOCClient
+
+
+class TestPlanFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "plan.jsonl"
+        self.client = FakeIOCClient()
+        self.desired = [
+            NormalizedEntry(domain=f"d{i}.example.com", tool="T") for i in range(5)
+        ]
+        sync(
+            client=self.client,
+            desired=self.desired[:3],
+            dry_run=False,
+            retrodetects=False,
+            prune=False,
+            action="detect",
+            platforms=["windows"],
+        )
+        self.desired[0] = NormalizedEntry(domain="d0.example.com", tool="Other")
+        self.desired.pop(1)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def plan(self) -> dict:
+        return plan_to_file(
+            self.client,
+            self.desired,
+            self.path,
+            prune=True,
+            action="detect",
+            platforms=["windows"],
+        )
+
+    def test_plan_round_trips_and_applies_without_relisting(self):
+        counts = self.plan()
+        self.assertEqual(
+            counts, {"create": 2, "update": 1, "delete": 1, "unchanged": 1}
+        )
+        saved = load_plan(self.path)
+        self.assertEqual(saved.plan.counts(), counts)
+        self.assertTrue(saved.prune)
+        self.assertEqual(saved.plan.to_update[0].platforms, ("windows",))
+        self.assertEqual(saved.plan.update_fields, {"d0.example.com": ["description"]})
+
+        self.client.calls.clear()
+        applied = apply_saved_plan(self.client, self.path, retrodetects=False)
+        self.assertEqual(applied, dict(counts, failed=0))
+        # One fingerprint probe, then only the writes.
+        self.assertEqual(self.client.calls.count("indicator_combined"), 1)
+        values = sorted(x["value"] for x in self.client.indicators.values())
+        self.assertEqual(values, [x.domain for x in self.desired])
+
+    def test_stale_plan_is_refused(self):
+        self.plan()
+        self.client.indicator_create(
+            [{"type": "domain", "value": "manual.example.com"}]
+        )
+        before = dict(self.client.indicators)
+        self.assertIsNone(apply_saved_plan(self.client, self.path, retrodetects=False))
+        self.assertEqual(self.client.indicators, before)
+
+    def test_header_records_rollout_context(self):
+        plan_to_file(
+            self.client,
+            self.desired,
+            self.path,
+            prune=False,
+            action="prevent",
+            platforms=["windows"],
+            host_groups=["hg-1"],
+            stage="deploy",
+            host_group_names=["Servers"],
+        )
+        saved = load_plan(self.path)
+        self.assertEqual((saved.stage, saved.action), ("deploy", "prevent"))
+        self.assertEqual(saved.host_groups, ["Servers"])
+        self.assertFalse(saved.is_global)
+        self.assertEqual(saved.host_group_ids, ["hg-1"])
+        self.assertEqual(
+            plan_context_errors(saved, "deploy", ["servers"], "prevent"), []
+        )
+        self.assertEqual(len(plan_context_errors(saved, "report", [], "detect")), 3)
+
+    def test_global_scope_comes_from_payloads(self):
+        plan_to_file(
+            self.client,
+            self.desired,
+            self.path,
+            prune=False,
+            action="detect",
+            platforms=["windows"],
+            stage="report",
+            # Header claims a scope, but the payloads carry no host groups.
+            host_group_names=["Servers"],
+        )
+        self.assertTrue(load_plan(self.path).is_global)
+
+    def test_rejects_non_plan_file(self):
+        self.path.write_text('{"event": "begin"}\n', encoding="utf-8")
+        with self.assertRaises(ValueError):
+            load_plan(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
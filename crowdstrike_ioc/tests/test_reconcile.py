@@ -1,9 +1,19 @@
+import tempfile
 import unittest
+from pathlib import Path
 from unittest.mock import patch
 
 from crowdstrike_api import IndicatorPayload
-from reconcile import sync
+from reconcile import (
+    build_desired,
+    compare_fingerprint,
+    index_existing,
+    plan_sync,
+    sync,
+    sync_incremental,
+)
 from source import NormalizedEntry
+from tests.fakes import FakeIOCClient
 
 
 class TestReconcile(unittest.TestCase):
@@ -24,21 +34,23 @@ class TestReconcile(unittest.TestCase):
         self.assertEqual(out["id"], "abc")
         self.assertEqual(out["platforms"], ["windows"])
 
-    @patch("reconcile.iter_managed_iocs")
-    def test_sync_dry_run_reports_update(self, mock_iter):
-        mock_iter.return_value = [
-            {
-                "id": "ioc1",
-                "type": "domain",
-                "value": "example.com",
-                "action": "detect",
-                "severity": "informational",
-                "source": "autormmdetect_lolrmm",
-                "description": "old",
-                "applied_globally": True,
-                "tags": ["autormmdetect"],
-                "platforms": ["windows"],
-            }
+    @patch("reconcile.iter_managed_pages")
+    def test_sync_dry_run_reports_update(self, mock_pages):
+        mock_pages.return_value = [
+            [
+                {
+                    "id": "ioc1",
+                    "type": "domain",
+                    "value": "example.com",
+                    "action": "detect",
+                    "severity": "informational",
+                    "source": "autormmdetect_lolrmm",
+                    "description": "old",
+                    "applied_globally": True,
+                    "tags": ["autormmdetect"],
+                    "platforms": ["windows"],
+                }
+            ]
         ]
         desired = [
             NormalizedEntry(
@@ -64,6 +76,119 @@ class TestReconcile(unittest.TestCase):
         self.assertEqual(result["update"], 1)
         self.assertEqual(result["delete"], 0)
 
+    def test_parallel_apply_matches_serial(self):
+        desired = [
+            NormalizedEntry(domain=f"d{i}.example.com", tool="T") for i in range(1100)
+        ]
+        for max_inflight in (1, 8):
+            client = FakeIOCClient()
+            kwargs = {
+                "client": client,
+                "dry_run": False,
+                "retrodetects": False,
+                "prune": True,
+                "action": "detect",
+                "platforms": ["windows"],
+                "max_inflight": max_inflight,
+            }
+            self.assertEqual(sync(desired=desired, **kwargs)["create"], 1100)
+            self.assertEqual(len(client.indicators), 1100)
+            result = sync(desired=desired[:100], **kwargs)
+            self.assertEqual(result["delete"], 1000)
+            self.assertEqual(len(client.indicators), 100)
+
+    def test_plan_ignores_list_order_and_case(self):
+        payload = IndicatorPayload(
+            type="domain",
+            value="example.com",
+            action="detect",
+            severity="informational",
+            source="autormmdetect_lolrmm",
+            description="desc",
+            tags=["b", "a"],
+            platforms=["windows", "mac"],
+            host_groups=[],
+        )
+        existing = dict(
+            payload.to_api(), id="ioc1", tags=["A", "b"], platforms=["Mac", "windows"]
+        )
+        self.assertEqual(compare_fingerprint(payload), compare_fingerprint(existing))
+        key = ("domain", "example.com")
+        plan = plan_sync({key: payload}, index_existing([existing]), prune=False)
+        self.assertEqual((plan.unchanged, plan.to_update), (1, []))
+
+        existing["severity"] = "high"
+        plan = plan_sync({key: payload}, index_existing([existing]), prune=False)
+        self.assertEqual(plan.update_fields, {"example.com": ["severity"]})
+
+    def test_payloads_share_list_fields(self):
+        entries = [
+            NormalizedEntry(domain=f"d{i}.example.com", tool="T") for i in (1, 2)
+        ]
+        first, second = build_desired(entries, "detect", ["windows", "mac"]).values()
+        self.assertIs(first.platforms, second.platforms)
+        self.assertIs(first.tags, second.tags)
+        self.assertFalse(hasattr(first, "__dict__"))
+        self.assertEqual(first.to_api()["platforms"], ["windows", "mac"])
+
+
+class TestIncrementalSync(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.state_path = Path(self.tmp.name) / "state.json"
+        self.client = FakeIOCClient()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_sync(self, domains, prune=True, **kwargs):
+        desired = [NormalizedEntry(domain=d, tool="T", tools=["T"]) for d in domains]
+        return sync_incremental(
+            client=self.client,
+            desired=desired,
+            dry_run=False,
+            retrodetects=False,
+            prune=prune,
+            action="detect",
+            platforms=["windows"],
+            state_path=self.state_path,
+            **kwargs,
+        )
+
+    def test_unchanged_feed_costs_one_probe(self):
+        first = self.run_sync(["a.example.com", "b.example.com"])
+        self.assertEqual(first["create"], 2)
+
+        self.client.calls.clear()
+        second = self.run_sync(["a.example.com", "b.example.com"])
+        self.assertEqual(
+            second, {"create": 0, "update": 0, "delete": 0, "unchanged": 2}
+        )
+        self.assertEqual(self.client.calls, ["indicator_combined"])
+
+    def test_delta_applies_only_changes(self):
+        self.run_sync(["a.example.com", "b.example.com"])
+        self.client.calls.clear()
+        result = self.run_sync(["a.example.com", "c.example.com"])
+        self.assertEqual(
+            result, {"create": 1, "update": 0, "delete": 1, "unchanged": 1, "failed": 0}
+        )
+        self.assertNotIn("indicator_update", self.client.calls)
+        values = sorted(x["value"] for x in self.client.indicators.values())
+        self.assertEqual(values, ["a.example.com", "c.example.com"])
+
+    def test_tenant_drift_triggers_full_reconcile(self):
+        self.run_sync(["a.example.com"])
+        ioc_id = next(iter(self.client.indicators))
+        self.client.indicators[ioc_id]["description"] = "edited in console"
+        self.client.indicators[ioc_id]["modified_on"] = "2099-01-01T00:00:00Z"
+
+        result = self.run_sync(["a.example.com"])
+        self.assertEqual(result["update"], 1)
+        self.client.calls.clear()
+        self.assertEqual(self.run_sync(["a.example.com"])["unchanged"], 1)
+        self.assertEqual(self.client.calls, ["indicator_combined"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,7 +1,16 @@
+import tempfile
 import unittest
+from pathlib import Path
 
-from reporting import SUMMARY_SCHEMA_VERSION, build_summary_payload, normalize_summary
+from prevalence_cache import PrevalenceCache
+from reporting import (
+    SUMMARY_SCHEMA_VERSION,
+    build_summary_payload,
+    normalize_summary,
+    run_prevalence_report,
+)
 from source import NormalizedEntry
+from tests.fakes import FakeIOCClient
 
 
 class TestReporting(unittest.TestCase):
@@ -32,6 +41,48 @@ class TestReporting(unittest.TestCase):
         self.assertEqual(result["counts"]["unsafe"], 1)
         self.assertEqual(result["counts"]["priority_hits"], 1)
 
+    def test_prevalence_report_is_deterministic_across_workers(self):
+        desired = [
+            NormalizedEntry(domain=f"d{i}.example.com", tool=f"Tool{i % 7}")
+            for i in range(60)
+        ]
+        counts = {x.domain: (i * 37) % 41 for i, x in enumerate(desired)}
+        results = [
+            run_prevalence_report(
+                client=FakeIOCClient(device_counts=counts),
+                desired=desired,
+                threshold=30,
+                max_items=0,
+                workers=workers,
+                rate=0,
+            )
+            for workers in (1, 16)
+        ]
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0]["evaluated"], 60)
+
+    def test_prevalence_cache_skips_known_domains(self):
+        desired = [
+            NormalizedEntry(domain=f"d{i}.example.com", tool="T") for i in range(5)
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = PrevalenceCache(Path(tmp) / "prev.sqlite", max_entries=4)
+            client = FakeIOCClient(device_counts={"d0.example.com": 99})
+            first = run_prevalence_report(
+                client, desired[:3], threshold=10, max_items=0, cache=cache, tenant="t1"
+            )
+            second = run_prevalence_report(
+                client, desired, threshold=10, max_items=0, cache=cache, tenant="t1"
+            )
+            self.assertEqual((first["cache_hits"], first["cache_misses"]), (0, 3))
+            self.assertEqual((second["cache_hits"], second["cache_misses"]), (3, 2))
+            self.assertEqual(client.calls.count("devices_count"), 5)
+            self.assertEqual(second["high_prevalence_domains"], 1)
+            # LRU cap of 4: the least recently used entry was evicted.
+            self.assertEqual(len(cache.get_many("t1", [x.domain for x in desired])), 4)
+            self.assertEqual(cache.get_many("t2", ["d0.example.com"]), {})
+            cache.close()
+
 
 if __name__ == "__main__":
     unittest.main()
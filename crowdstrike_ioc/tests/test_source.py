@@ -1,5 +1,53 @@
+import io
+import json
+import random
+import re
 import unittest
-from source import normalize_domain, is_ipv4, is_domain_ioc_safe
+from source import (
+    DOMAIN_IPV4,
+    DOMAIN_PLACEHOLDER,
+    DOMAIN_UNSAFE,
+    DOMAIN_VALID,
+    PLACEHOLDER_VALUES,
+    classify_domain,
+    collect_domains,
+    is_domain_ioc_safe,
+    is_ipv4,
+    iter_json_array,
+    normalize_domain,
+    normalize_many,
+)
+
+
+def reference_classify(value: str) -> tuple[str, str]:
+    """The original multi-pass normalize/is_ipv4/is_domain_ioc_safe pipeline."""
+    domain = value.strip().lower()
+    if domain:
+        if "://" in domain:
+            domain = domain.split("://", 1)[1]
+        domain = domain.split("/", 1)[0].strip()
+        if ":" in domain:
+            domain = domain.split(":")[0].strip()
+        while domain.startswith("*"):
+            domain = domain[1:]
+        if domain.startswith("."):
+            domain = domain[1:]
+        if domain.startswith("-"):
+            domain = domain.lstrip("-")
+        domain = domain.rstrip(".")
+    if not domain or domain in PLACEHOLDER_VALUES:
+        return DOMAIN_PLACEHOLDER, domain
+    if re.match(r"^\d{1,3}(?:\.\d{1,3}){3}$", domain) and all(
+        0 <= int(part) <= 255 for part in domain.split(".")
+    ):
+        return DOMAIN_IPV4, domain
+    if "*" in domain or " " in domain:
+        return DOMAIN_UNSAFE, domain
+    if not re.match(
+        r"^(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,63}$", domain
+    ):
+        return DOMAIN_UNSAFE, domain
+    return DOMAIN_VALID, domain
 
 
 class TestSource(unittest.TestCase):
@@ -25,6 +73,107 @@ class TestSource(unittest.TestCase):
         # Our regex requires at least one dot and length constraints
         self.assertFalse(is_domain_ioc_safe("localhost"))
 
+    def test_classify_matches_reference_pipeline(self):
+        rng = random.Random(11)
+        alphabet = ["a", "Z", "0", "9", "2", "5", ".", "-", "*", "/", ":", " ", "\t"]
+        alphabet += ["\n", "_", "://", "com", "256", "N/A", "\u00e9"]
+        samples = [
+            "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+            for _ in range(20000)
+        ]
+        samples += ["*.Example.com", "https://a.b.com:8443/x", "10.0.0.1", "a.com\n."]
+        for value in samples:
+            self.assertEqual(classify_domain(value), reference_classify(value), value)
+        self.assertEqual(
+            normalize_many(samples[:50]), [reference_classify(x) for x in samples[:50]]
+        )
+
+    def test_iter_json_array_across_chunk_boundaries(self):
+        items = [{"Name": f"Tool{i}", "Description": "x" * i} for i in range(50)]
+        items.append({"Name": "Unicode \u00e9\u4e2d", "Artifacts": {}})
+        raw = json.dumps(items, ensure_ascii=False).encode("utf-8")
+        for chunk_size in (1, 7, 4096):
+            parsed = list(iter_json_array(io.BytesIO(raw), chunk_size=chunk_size))
+            self.assertEqual(parsed, items)
+        self.assertEqual(list(iter_json_array(io.BytesIO(b" [ ] "))), [])
+        with self.assertRaises(ValueError):
+            list(iter_json_array(io.BytesIO(b'[{"a": 1}')))
+
+    def test_collect_domains_accepts_generator(self):
+        tools = (
+            {
+                "Name": name,
+                "Artifacts": {"Network": [{"Domains": ["*.Example.com", "1.2.3.4"]}]},
+            }
+            for name in ("A", "B")
+        )
+        desired, stats = collect_domains(tools, config={})
+        self.assertEqual(stats["tools_total"], 2)
+        self.assertEqual(stats["skipped_ipv4"], 2)
+        self.assertEqual([x.tools for x in desired], [["A", "B"]])
+
+    def test_collect_domains_excluded_domain_rules(self):
+        domains = ["vendor.com", "api.vendor.com", "cdn.other.com", "other.com"]
+        tools = [{"Name": "A", "Artifacts": {"Network": [{"Domains": domains}]}}]
+        config = {"safety": {"excluded_domains": [".vendor.com", "other.com"]}}
+        desired, stats = collect_domains(tools, config=config)
+        self.assertEqual([x.domain for x in desired], ["cdn.other.com"])
+        self.assertEqual(stats["skipped_excluded_domains"], 3)
+
+    def test_collect_domains_normalizes_excluded_domain_rules(self):
+        domains = [
+            "https://relay.vendor.com/path",
+            "relay2.vendor.com",
+            "*.screenconnect.com",
+            "host.screenconnect.com",
+            "vendor.com",
+        ]
+        tools = [{"Name": "A", "Artifacts": {"Network": [{"Domains": domains}]}}]
+        for rule, kept in (
+            ("https://relay.vendor.com/", 4),
+            ("relay2.vendor.com:443", 4),
+            # Subdomains only: the feed's *.screenconnect.com became the apex.
+            ("*.screenconnect.com", 4),
+            ("https://*.screenconnect.com/", 4),
+            (".screenconnect.com", 3),
+            ("n/a", 5),
+        ):
+            with self.subTest(rule=rule):
+                config = {"safety": {"excluded_domains": [rule]}}
+                desired, stats = collect_domains(tools, config=config)
+                self.assertEqual(len(desired), kept)
+                self.assertEqual(stats["skipped_excluded_domains"], 5 - kept)
+        desired, _ = collect_domains(
+            tools, config={"safety": {"excluded_domains": ["*.screenconnect.com"]}}
+        )
+        self.assertIn("screenconnect.com", {x.domain for x in desired})
+        self.assertNotIn("host.screenconnect.com", {x.domain for x in desired})
+
+    def test_minimize_subdomains_merges_into_topmost_parent(self):
+        tools = [
+            {"Name": "A", "Artifacts": {"Network": [{"Domains": ["vendor.com"]}]}},
+            {
+                "Name": "B",
+                "Artifacts": {
+                    "Network": [{"Domains": ["api.vendor.com", "x.relay.vendor.com"]}]
+                },
+            },
+            {"Name": "C", "Artifacts": {"Network": [{"Domains": ["othervendor.com"]}]}},
+        ]
+        config = {
+            "policy": {"minimize_subdomains": True},
+            "rollout": {"priority_platforms": ["B"]},
+        }
+        desired, stats = collect_domains(tools, config=config)
+        self.assertEqual([x.domain for x in desired], ["vendor.com", "othervendor.com"])
+        self.assertEqual(desired[0].tools, ["A", "B"])
+        self.assertTrue(desired[0].priority)
+        self.assertEqual(stats["minimized_subdomains"], 2)
+        self.assertEqual(stats["normalized_domains"], 2)
+
+        _, stats = collect_domains(tools, config={})
+        self.assertEqual(stats["minimized_subdomains"], 0)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,71 @@
+import csv
+import tempfile
+import unittest
+from pathlib import Path
+
+from source import NormalizedEntry
+from splunk_lookup import (
+    DNS_SEARCH_FILE,
+    DNS_TSTATS_FILE,
+    LOOKUP_FILE,
+    render_searches,
+    write_splunk_files,
+)
+
+ENTRIES = [
+    NormalizedEntry(
+        "anydesk.com",
+        "AnyDesk",
+        ["AnyDesk", "Other"],
+        priority=True,
+        sources=("lolrmm",),
+    ),
+    NormalizedEntry("zohoassist.jp", "Zoho Assist", ["Zoho Assist"]),
+]
+
+
+class TestSplunkLookup(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_lookup_has_exact_and_suffix_columns(self):
+        write_splunk_files(ENTRIES, self.root, self.root / "searches")
+        with (self.root / LOOKUP_FILE).open(encoding="utf-8", newline="") as handle:
+            rows = list(csv.DictReader(handle))
+        self.assertEqual(rows[0]["domain"], "anydesk.com")
+        self.assertEqual(rows[0]["suffix"], ".anydesk.com")
+        self.assertEqual(rows[0]["tools"], "AnyDesk; Other")
+        self.assertEqual(rows[0]["priority"], "true")
+        self.assertEqual(rows[1]["sources"], "")
+
+    def test_searches_use_lookup_not_literals_or_rex(self):
+        searches = render_searches(index="dns", sourcetype="zeek_dns")
+        self.assertEqual(set(searches), {DNS_SEARCH_FILE, DNS_TSTATS_FILE})
+        raw = searches[DNS_SEARCH_FILE].splitlines()
+        self.assertTrue(raw[1].startswith("index=dns sourcetype=zeek_dns "))
+        self.assertTrue(raw[2].endswith(" by query"))
+        tstats = searches[DNS_TSTATS_FILE].splitlines()
+        self.assertTrue(tstats[1].startswith("| tstats "))
+        self.assertTrue(tstats[1].endswith(" by DNS.query"))
+        for text in searches.values():
+            self.assertIn(LOOKUP_FILE, text.splitlines()[0])
+            for absent in ("rex", "inputlookup", "format", "anydesk"):
+                self.assertNotIn(absent, text)
+            self.assertIn(f"lookup {LOOKUP_FILE} suffix AS rmm_suffixes", text)
+
+    def test_regenerating_unchanged_files_is_a_no_op(self):
+        first = write_splunk_files(ENTRIES, self.root, self.root / "searches")
+        self.assertEqual(set(first.values()), {True})
+        second = write_splunk_files(ENTRIES, self.root, self.root / "searches")
+        self.assertEqual(set(second.values()), {False})
+        third = write_splunk_files(ENTRIES[:1], self.root, self.root / "searches")
+        self.assertTrue(third[LOOKUP_FILE])
+        self.assertFalse(third[DNS_SEARCH_FILE])
+
+
+if __name__ == "__main__":
+    unittest.main()
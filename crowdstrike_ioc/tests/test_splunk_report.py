@@ -0,0 +1,108 @@
+import csv
+import datetime as dt
+import tempfile
+import unittest
+from pathlib import Path
+
+from splunk_report import REPORT_HEADER, build_report
+
+DEMO_CSV = Path(__file__).resolve().parents[2] / "splunk" / "demo.csv"
+NOW = dt.datetime(2025, 3, 30)
+
+CATALOG = (
+    "remote_appid,isutility,description,comment_reference,category\n"
+    "teamviewer,True,TeamViewer,https://teamviewer.example,RMM\n"
+    "radmin,True,RAdmin,https://radmin.example,RMM\n"
+    "anydesk,True,AnyDesk,https://anydesk.example,RMM\n"
+    "ssh,False,SSH,,Protocol\n"
+)
+EXCEPTIONS = (
+    "asset,software,exception,exception_date,exception_ttl_days,comment\n"
+    "10.0.0.1,TeamViewer,true,2025-03-25,30,change 1\n"
+    "10.0.0.2,TeamViewer,true,2025-01-01,30,expired\n"
+    "10.0.0.3,RAdmin,true,,,forever\n"
+    "10.0.0.4,AnyDesk,false,2025-03-25,30,\n"
+)
+FLOWS = (
+    "src,dest,app,count,firstTime,lastTime,dest_port,user\n"
+    "10.0.0.1,8.8.8.8,teamviewer,3,1743069323,1743069923,5938,john\n"
+    "10.0.0.2,8.8.8.8,teamviewer,1,1743069323,1743069923,5938,jane\n"
+    "10.0.0.6,8.8.8.8,TeamViewer,1,1743069323,1743069923,5938,jim\n"
+    "10.0.0.3,8.8.4.4,radmin,4,1743069323,1743069923,5500,\n"
+    "10.0.0.4,1.1.1.1,anydesk,2,1743069323,1743069923,443,james\n"
+    "10.0.0.5,1.1.1.1,ping,9,1743069323,1743069923,,\n"
+    "10.0.0.5,1.1.1.1,ssh,9,1743069323,1743069923,22,\n"
+    "10.0.0.5,1.1.1.1,,9,1743069323,1743069923,22,\n"
+)
+
+
+class TestSplunkReport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        for name, text in (
+            ("catalog.csv", CATALOG),
+            ("exceptions.csv", EXCEPTIONS),
+            ("flows.csv", FLOWS),
+        ):
+            (self.root / name).write_text(text, encoding="utf-8")
+        self.out = self.root / "lolrmm.csv"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_report(self, flows: Path, chunk_rows: int = 2) -> dict:
+        return build_report(
+            flows,
+            self.root / "catalog.csv",
+            self.out,
+            exceptions=self.root / "exceptions.csv",
+            now=NOW,
+            chunk_rows=chunk_rows,
+        )
+
+    def read(self) -> list:
+        with self.out.open(encoding="utf-8", newline="") as handle:
+            return list(csv.reader(handle))
+
+    def test_exceptions_ttl_and_app_filters(self):
+        stats = self.run_report(self.root / "flows.csv")
+        # The appid lookup is case-sensitive, as in Splunk: jim's "TeamViewer" drops.
+        self.assertEqual((stats["rows_in"], stats["rows_out"]), (8, 2))
+        rows = self.read()
+        self.assertEqual(tuple(rows[0]), REPORT_HEADER)
+        self.assertEqual(
+            rows[1],
+            [
+                "10.0.0.2",
+                "8.8.8.8",
+                "teamviewer",
+                "1",
+                "2025-03-27T09:55:23",
+                "2025-03-27T10:05:23",
+                "5938",
+                "jane",
+                "RMM",
+                "https://teamviewer.example",
+                "True",
+                "true",
+                "TRUE",
+                "TeamViewer",
+            ],
+        )
+        self.assertEqual(rows[2][2], "anydesk")
+        self.assertEqual(rows[2][11:13], ["", "FALSE"])
+
+    def test_appends_demo_shaped_input(self):
+        self.run_report(self.root / "flows.csv")
+        self.run_report(DEMO_CSV, chunk_rows=1000)
+        rows = self.read()
+        self.assertEqual([r for r in rows if r[0] == "src"], [list(REPORT_HEADER)])
+        demo = rows[3:]
+        self.assertTrue(demo)
+        self.assertEqual({r[2] for r in demo}, {"teamviewer", "radmin"})
+        self.assertEqual(demo[0][4], "2025-03-27T10:15:23")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from reconcile import resume_journal, sync
+from source import NormalizedEntry
+from sync_journal import SyncJournal
+from tests.fakes import FakeIOCClient
+
+
+class FlakyClient(FakeIOCClient):
+    """Fails every create call after the first ``ok_creates`` succeed."""
+
+    def __init__(self, ok_creates: int, reject: set | None = None):
+        super().__init__()
+        self.ok_creates = ok_creates
+        self.reject = reject or set()
+
+    def indicator_create(self, indicators, **kwargs):
+        if self.ok_creates <= 0:
+            raise ConnectionError("token expired")
+        self.ok_creates -= 1
+        accepted = [x for x in indicators if x["value"] not in self.reject]
+        response = super().indicator_create(accepted, **kwargs)
+        rejected = [
+            dict(x, message_type="error", message="invalid")
+            for x in indicators
+            if x["value"] in self.reject
+        ]
+        response["body"]["resources"].extend(rejected)
+        if rejected:
+            response["body"]["errors"] = [{"message": "some indicators failed"}]
+        return response
+
+
+class TestSyncJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.journal = SyncJournal(Path(self.tmp.name) / "journal.jsonl")
+        self.desired = [
+            NormalizedEntry(domain=f"d{i}.example.com", tool="T") for i in range(450)
+        ]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_sync(self, client):
+        return sync(
+            client=client,
+            desired=self.desired,
+            dry_run=False,
+            retrodetects=False,
+            prune=False,
+            action="detect",
+            platforms=["windows"],
+            max_inflight=1,
+            journal=self.journal,
+        )
+
+    def test_interrupted_run_resumes_unfinished_batches_only(self):
+        client = FlakyClient(ok_creates=1, reject={"d3.example.com"})
+        first = self.run_sync(client)
+        self.assertEqual(first["create"], 199)
+        self.assertEqual(first["failed"], 251)
+
+        run = self.journal.load()
+        self.assertEqual(len(run.batches), 3)
+        self.assertEqual([seq for seq, _ in run.pending], [1, 2])
+
+        client.ok_creates = 10
+        client.calls.clear()
+        resumed = resume_journal(client, self.journal)
+        self.assertEqual(client.calls, ["indicator_create", "indicator_create"])
+        self.assertEqual(resumed["create"], 449)
+        self.assertEqual(resumed["failed"], 1)
+        self.assertEqual(len(client.indicators), 449)
+
+        self.assertEqual(self.journal.load().pending, [])
+        self.assertIsNone(resume_journal(client, self.journal))
+
+    def test_truncated_tail_is_ignored(self):
+        self.run_sync(FlakyClient(ok_creates=0))
+        with self.journal.path.open("a", encoding="utf-8") as handle:
+            handle.write('{"event": "done", "seq"')
+        self.assertEqual(len(self.journal.load().pending), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import main
+from source import NormalizedEntry
+from tenants import TenantSpec, load_tenant_manifest, run_tenants, tenant_path
+from tests.fakes import FakeIOCClient
+
+CONFIG = {"policy": {"deploy_action": "detect"}, "rollout": {"host_groups": []}}
+
+
+class TenantIOCClient(FakeIOCClient):
+    def action_query(self, **kwargs):
+        return self._ok(["detect", "no_action"])
+
+    def platform_query(self, **kwargs):
+        return self._ok(["windows", "mac", "linux"])
+
+
+class TestTenantManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "tenants.yaml"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_credentials_and_limits_resolve_with_defaults(self):
+        self.path.write_text(
+            "defaults:\n"
+            "  max_inflight: 2\n"
+            "tenants:\n"
+            "  - name: child-a\n"
+            "    member_cid: abc123\n"
+            "  - name: other\n"
+            "    client_id_env: OTHER_ID\n"
+            "    client_secret_env: OTHER_SECRET\n"
+            "    api_rate: 5\n"
+            "    host_groups: [Servers]\n",
+            encoding="utf-8",
+        )
+        specs = load_tenant_manifest(
+            self.path,
+            env={"OTHER_ID": "oid", "OTHER_SECRET": "osecret"},
+            defaults={"client_id": "parent", "client_secret": "psecret"},
+        )
+        first, second = specs
+        self.assertEqual(first.falcon_kwargs()["member_cid"], "abc123")
+        self.assertEqual((first.client_id, first.max_inflight), ("parent", 2))
+        self.assertIsNone(first.host_groups)
+        self.assertEqual((second.client_id, second.api_rate), ("oid", 5.0))
+        self.assertEqual(second.host_groups, ["Servers"])
+
+    def test_duplicate_names_are_rejected(self):
+        self.path.write_text(
+            "tenants:\n  - name: a\n  - name: a\n", encoding="utf-8"
+        )
+        with self.assertRaises(RuntimeError):
+            load_tenant_manifest(
+                self.path, env={}, defaults={"client_id": "x", "client_secret": "y"}
+            )
+
+    def test_tenant_path(self):
+        self.assertEqual(
+            tenant_path("state/sync_state.json", "acme"),
+            Path("state/sync_state.acme.json"),
+        )
+        self.assertIsNone(tenant_path(None, "acme"))
+
+
+class TestRunTenants(unittest.TestCase):
+    def test_one_failing_tenant_does_not_stop_the_others(self):
+        desired = [
+            NormalizedEntry(domain=f"d{i}.example.com", tool="T") for i in range(3)
+        ]
+        clients = {"a": TenantIOCClient(), "c": TenantIOCClient()}
+
+        def factory(spec):
+            if spec.name == "b":
+                raise ConnectionError("bad credentials")
+            return clients[spec.name]
+
+        specs = [TenantSpec(name=x, client_id="id", client_secret="s") for x in "abc"]
+        summary = run_tenants(
+            specs,
+            factory,
+            desired=desired,
+            stats={},
+            stage="deploy",
+            config=CONFIG,
+            options={"dry_run": False, "prune": True},
+            workers=3,
+        )
+        self.assertEqual(summary["tenants_failed"], 1)
+        self.assertEqual(summary["counts"]["selected"], 3)
+        self.assertEqual(summary["tenants"]["b"]["status"], "failed")
+        self.assertIn("bad credentials", summary["tenants"]["b"]["error"])
+        for name in "ac":
+            result = summary["tenants"][name]
+            self.assertEqual(result["status"], "ok")
+            self.assertEqual(result["action"], "detect")
+            self.assertEqual(result["sync_plan"]["create"], 3)
+            self.assertEqual(len(clients[name].indicators), 3)
+
+    def test_main_writes_per_tenant_summary_json(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = Path(tmp.name)
+        manifest = root / "tenants.yaml"
+        manifest.write_text(
+            "tenants:\n  - name: a\n  - name: b\n    client_id: broken\n",
+            encoding="utf-8",
+        )
+        summary_path = root / "summary.json"
+
+        def factory(**kwargs):
+            if kwargs.get("client_id") == "broken":
+                raise ConnectionError("bad credentials")
+            return TenantIOCClient()
+
+        desired = [NormalizedEntry(domain="d.example.com", tool="T")]
+        stats = dict.fromkeys(main.SOURCE_STATS_KEYS, 0)
+        argv = [
+            "main.py",
+            "--config",
+            str(root / "config.yaml"),
+            "--env-file",
+            str(root / ".env"),
+            "--stage",
+            "deploy",
+            "--tenants",
+            str(manifest),
+            "--client-id",
+            "id",
+            "--client-secret",
+            "secret",
+            "--confirm-write",
+            "--summary-json",
+            str(summary_path),
+        ]
+        with (
+            patch.object(sys, "argv", argv),
+            patch.object(main, "IOC", factory),
+            patch.object(main, "load_desired", return_value=(desired, stats)),
+        ):
+            self.assertEqual(main.main(), 1)
+        summary = json.loads(summary_path.read_text(encoding="utf-8"))
+        self.assertEqual(summary["tenants_failed"], 1)
+        self.assertEqual(summary["tenants"]["a"]["sync_plan"]["create"], 1)
+        self.assertEqual(summary["tenants"]["b"]["status"], "failed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+
+from throttle import ClientStats, RetryingClient
+
+
+class FlakyService:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+        self.label = "static"
+
+    def devices_count(self, **kwargs):
+        self.calls += 1
+        item = self.responses.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    indicator_create = devices_count
+
+
+class TestRetryingClient(unittest.TestCase):
+    def make_client(self, responses, **kwargs):
+        self.sleeps = []
+        service = FlakyService(responses)
+        client = RetryingClient(service, sleep=self.sleeps.append, **kwargs)
+        return service, client
+
+    def test_retries_throttled_calls_using_retry_after(self):
+        service, client = self.make_client(
+            [
+                {"status_code": 429, "headers": {"Retry-After": "2"}},
+                ConnectionError("reset"),
+                {"status_code": 200, "body": {"resources": [3]}},
+            ]
+        )
+        response = client.devices_count(type="domain", value="x.com")
+        self.assertEqual(response["status_code"], 200)
+        self.assertEqual(service.calls, 3)
+        self.assertEqual(self.sleeps[0], 2.0)
+        stats = client.stats.as_dict()
+        self.assertEqual((stats["calls"], stats["retries"]), (3, 2))
+        self.assertEqual(stats["throttled"], 1)
+        self.assertEqual(client.label, "static")
+
+    def test_writes_only_retry_throttling_or_unsent_requests(self):
+        service, client = self.make_client(
+            [
+                {"status_code": 429, "headers": {"Retry-After": "1"}},
+                ConnectionRefusedError("refused"),
+                {"status_code": 503},
+            ]
+        )
+        response = client.indicator_create(indicators=[])
+        self.assertEqual(response["status_code"], 503)
+        self.assertEqual(service.calls, 3)
+        self.assertEqual(client.stats.as_dict()["failures"], 1)
+
+        service, client = self.make_client([TimeoutError("read timed out"), {}])
+        with self.assertRaises(TimeoutError):
+            client.indicator_create(indicators=[])
+        self.assertEqual(service.calls, 1)
+
+    def test_gives_up_after_max_retries(self):
+        stats = ClientStats()
+        service, client = self.make_client(
+            [{"status_code": 503}] * 3, max_retries=2, stats=stats
+        )
+        self.assertEqual(client.devices_count()["status_code"], 503)
+        self.assertEqual(service.calls, 3)
+        self.assertEqual(stats.as_dict()["failures"], 1)
+
+    def test_low_remaining_budget_paces_next_call(self):
+        service, client = self.make_client(
+            [
+                {"status_code": 200, "headers": {"x-ratelimit-remaining": "1"}},
+                {"status_code": 200, "headers": {}},
+            ]
+        )
+        client.devices_count()
+        client.devices_count()
+        self.assertEqual(len(self.sleeps), 1)
+        self.assertGreater(self.sleeps[0], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,257 @@
+import functools
+import logging
+import random
+import socket
+import threading
+import time
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+DEFAULT_MAX_RETRIES = 5
+# Start pacing once the server reports this many calls left in the window.
+RATE_LIMIT_LOW_WATERMARK = 10
+RATE_LIMIT_WINDOW_SECONDS = 60
+# Not idempotent: a 5xx or a dropped connection may come after the server applied
+# the write, so only a 429 or a request that never left the client is replayed.
+WRITE_METHODS = frozenset({"indicator_create", "indicator_update", "indicator_delete"})
+# requests/urllib3 wrappers that are only raised before any bytes were sent.
+_UNSENT_ERROR_NAMES = frozenset(
+    {"ConnectTimeout", "NewConnectionError", "NameResolutionError"}
+)
+
+LOGGER = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Thread-safe pacing: at most ``rate`` acquisitions per second (0 = unlimited)."""
+
+    def __init__(self, rate: float = 0, burst: int = 1):
+        self.rate = float(rate or 0)
+        self.capacity = max(1, int(burst))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Claim the next slot; return how long the caller must wait before using it."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        """Block until a call may proceed; return the seconds spent waiting."""
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+        return delay
+
+
+class RateLimitPacer:
+    """Spread calls over the rest of the window once ``X-RateLimit-Remaining`` runs low.
+
+    Shared by the falconpy and asyncio clients: ``observe`` reads each response's
+    headers, ``reserve`` returns how long the next call should wait.
+    """
+
+    def __init__(self, max_delay: float = 30.0):
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._not_before = 0.0
+        self._spacing = 0.0
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._not_before)
+            if self._spacing:
+                self._not_before = slot + self._spacing
+        return slot - now
+
+    def observe(self, headers):
+        remaining = _as_float(_header(headers, "X-RateLimit-Remaining"))
+        if remaining is None:
+            return
+        if remaining > RATE_LIMIT_LOW_WATERMARK:
+            with self._lock:
+                self._spacing = 0.0
+            return
+        window = RATE_LIMIT_WINDOW_SECONDS
+        reset_at = _as_float(_header(headers, "X-RateLimit-RetryAfter"))
+        if reset_at:
+            window = max(0.0, reset_at - time.time())
+        spacing = min(self.max_delay, window / max(remaining, 1.0))
+        with self._lock:
+            self._spacing = spacing
+            self._not_before = max(self._not_before, time.monotonic() + spacing)
+
+
+class ClientStats:
+    """Thread-safe counters shared by every wrapped service of one tenant."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.throttled = 0
+        self.throttled_seconds = 0.0
+        self.failures = 0
+
+    def add(self, **deltas):
+        with self._lock:
+            for name, value in deltas.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "throttled": self.throttled,
+                "throttled_seconds": round(self.throttled_seconds, 3),
+                "failures": self.failures,
+            }
+
+
+def _header(headers, name: str):
+    if not headers:
+        return None
+    lowered = name.lower()
+    for key, value in dict(headers).items():
+        if str(key).lower() == lowered:
+            return value
+    return None
+
+
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestNotSent(ConnectionError):
+    """Raised when a connection could not be opened, so nothing reached the server."""
+
+
+def request_not_sent(exc: BaseException) -> bool:
+    """True when ``exc`` (or what it wraps) failed while connecting, before the request went out."""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if isinstance(exc, (RequestNotSent, ConnectionRefusedError, socket.gaierror)):
+            return True
+        if type(exc).__name__ in _UNSENT_ERROR_NAMES:
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def retry_delay(attempt: int, headers, base_delay: float, max_delay: float) -> float:
+    """Seconds to wait before retry ``attempt``: server hint first, else jittered backoff."""
+    retry_after = _as_float(_header(headers, "Retry-After"))
+    if retry_after is None:
+        reset_at = _as_float(_header(headers, "X-RateLimit-RetryAfter"))
+        if reset_at:
+            retry_after = reset_at - time.time()
+    if retry_after is not None and retry_after >= 0:
+        return min(max_delay, retry_after)
+    backoff = min(max_delay, base_delay * (2**attempt))
+    return random.uniform(backoff / 2, backoff)
+
+
+class RetryingClient:
+    """Wrap a falconpy service so every method call is paced and retried.
+
+    Responses with a 429 or 5xx status (or a connection error) are retried up
+    to ``max_retries`` times with jittered exponential backoff, honouring
+    ``Retry-After``/``X-RateLimit-RetryAfter``. Writes (``WRITE_METHODS``) are
+    only retried on a 429 or a connection that was never made; any other write
+    failure is returned or raised at once for the sync journal to handle. When
+    ``X-RateLimit-Remaining`` runs low, later calls are spread over the rest of
+    the rate-limit window instead of running into 429s.
+    """
+
+    def __init__(
+        self,
+        service,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        rate: float = 0,
+        stats: ClientStats | None = None,
+        sleep=time.sleep,
+    ):
+        self._service = service
+        self._max_retries = max(0, int(max_retries))
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._limiter = RateLimiter(rate=rate)
+        self._sleep = sleep
+        self._pacer = RateLimitPacer(max_delay)
+        self.stats = stats or ClientStats()
+
+    def __getattr__(self, name):
+        attr = getattr(self._service, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            return self._call(name, attr, args, kwargs)
+
+        return call
+
+    def _wait_for_slot(self):
+        waited = self._limiter.acquire()
+        delay = self._pacer.reserve()
+        if delay:
+            self._sleep(delay)
+            waited += delay
+        if waited:
+            self.stats.add(throttled_seconds=waited)
+
+    def _call(self, name: str, method, args, kwargs):
+        write = name in WRITE_METHODS
+        for attempt in range(self._max_retries + 1):
+            self._wait_for_slot()
+            self.stats.add(calls=1)
+            try:
+                response = method(*args, **kwargs)
+            except OSError as exc:
+                if attempt >= self._max_retries or (
+                    write and not request_not_sent(exc)
+                ):
+                    self.stats.add(failures=1)
+                    raise
+                delay = retry_delay(attempt, None, self._base_delay, self._max_delay)
+                LOGGER.warning("%s failed (%s); retrying in %.1fs", name, exc, delay)
+            else:
+                if not isinstance(response, dict):
+                    return response
+                headers = response.get("headers")
+                self._pacer.observe(headers)
+                status = response.get("status_code")
+                if status not in RETRY_STATUS_CODES:
+                    return response
+                if write and status != 429:
+                    self.stats.add(failures=1)
+                    LOGGER.error("%s returned %s; not retrying a write", name, status)
+                    return response
+                if attempt >= self._max_retries:
+                    self.stats.add(failures=1)
+                    LOGGER.error("%s still failing after %d retries", name, attempt)
+                    return response
+                delay = retry_delay(attempt, headers, self._base_delay, self._max_delay)
+                if status == 429:
+                    self.stats.add(throttled=1)
+                LOGGER.warning("%s returned %s; retrying in %.1fs", name, status, delay)
+            self.stats.add(retries=1, throttled_seconds=delay)
+            self._sleep(delay)
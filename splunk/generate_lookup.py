@@ -0,0 +1,91 @@
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Share the IOC sync's fetch, cache and normalization code.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "crowdstrike_ioc"))
+
+from config import DEFAULT_CONFIG_PATH, load_simple_yaml  # noqa: E402
+from feed_cache import FeedCache  # noqa: E402
+from feeds import load_desired  # noqa: E402
+from splunk_lookup import write_splunk_files  # noqa: E402
+
+HERE = Path(__file__).resolve().parent
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Build the Splunk RMM domain lookup and the searches that use it"
+    )
+    parser.add_argument(
+        "--config",
+        default=str(DEFAULT_CONFIG_PATH),
+        help="IOC sync config; its exclusions and sources apply here too",
+    )
+    parser.add_argument(
+        "--source",
+        action="append",
+        default=[],
+        help="Extra feed (URL or .json/.csv/.yaml file); may be repeated",
+    )
+    parser.add_argument(
+        "--lookup-dir",
+        default=str(HERE / "lookups"),
+        help="Where to write lolrmm_domains.csv (default: splunk/lookups)",
+    )
+    parser.add_argument(
+        "--searches-dir",
+        default=str(HERE / "searches"),
+        help="Where to write the generated SPL (default: splunk/searches)",
+    )
+    parser.add_argument("--index", default="corelight", help="DNS index")
+    parser.add_argument(
+        "--sourcetype", default="corelight_dns_red", help="DNS sourcetype"
+    )
+    parser.add_argument(
+        "--feed-cache-dir",
+        help="Directory for cached LOLRMM feed snapshots (enables conditional GET)",
+    )
+    parser.add_argument(
+        "--max-feed-age",
+        type=int,
+        default=0,
+        help="Reuse a cached feed younger than this many seconds without revalidating",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    config = load_simple_yaml(Path(args.config))
+    cache = FeedCache(Path(args.feed_cache_dir)) if args.feed_cache_dir else None
+
+    try:
+        desired, stats = load_desired(
+            config, cache=cache, max_age=args.max_feed_age, extra=args.source
+        )
+    except Exception as e:
+        print(f"Error fetching data: {e}")
+        return 1
+
+    if not desired:
+        print("No domains found.")
+        return 1
+
+    print(f"{len(desired)} domains from {stats.get('tools_total', 0)} tools")
+    changed = write_splunk_files(
+        desired,
+        Path(args.lookup_dir),
+        Path(args.searches_dir),
+        index=args.index,
+        sourcetype=args.sourcetype,
+    )
+    for name, was_changed in changed.items():
+        print(f"{name}: {'updated' if was_changed else 'unchanged'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())